@@ -1,15 +1,28 @@
 # app/__init__.py
-import os, pathlib
+from . import startup  # primeiro: com IMPORT_TIMING=1 mede os imports abaixo
+import os, pathlib, time
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_migrate import Migrate
 
-db = SQLAlchemy()
+from .hashing import hasher, HashPoolSaturated
+from .ratelimit import limiter
+from . import sqlite_profile
+from . import replicas
+from . import sessions
+from .replicas import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 login_manager = LoginManager()
-migrate = Migrate()
+
+def _hash_pool_saturated(e):
+    return "Servidor ocupado, tente novamente em instantes.", 503, {
+        "Content-Type": "text/plain; charset=utf-8",
+        "Retry-After": "1",
+    }
 
 def create_app():
+    t0 = time.perf_counter()
     app = Flask(__name__)
 
     # cfg
@@ -22,17 +35,155 @@ def create_app():
         f"sqlite:///{base / 'app.db'}"
     )
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # perfil SQLite ("production" liga WAL/pragmas/pool; "off" usa os defaults)
+    app.config["SQLITE_PROFILE"] = os.getenv("SQLITE_PROFILE", "production")
+    app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    app.config["SQLITE_MMAP_SIZE"] = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    app.config["SQLITE_CACHE_KB"] = int(os.getenv("SQLITE_CACHE_KB", "65536"))
+    app.config["SQLITE_POOL_SIZE"] = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+    app.config["SQLITE_MAX_OVERFLOW"] = int(os.getenv("SQLITE_MAX_OVERFLOW", "4"))
+    app.config["SQLITE_POOL_TIMEOUT"] = float(os.getenv("SQLITE_POOL_TIMEOUT", "10"))
+    app.config["SQLITE_WRITE_QUEUE"] = os.getenv("SQLITE_WRITE_QUEUE", "0") == "1"
+    app.config["SQLITE_WRITE_QUEUE_TIMEOUT"] = float(os.getenv("SQLITE_WRITE_QUEUE_TIMEOUT", "30"))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_profile.engine_options(app.config)
+    # réplicas de leitura (urls separadas por vírgula) para views marcadas com @replica_reads
+    app.config["SQLALCHEMY_BINDS"] = replicas.replica_binds(os.getenv("DATABASE_REPLICA_URLS", ""))
+    app.config["REPLICA_RYW_SECONDS"] = float(os.getenv("REPLICA_RYW_SECONDS", "5"))
     app.config["REQUIRE_TERMS"] = True
+    # cache de vínculos entre requests (segundos, 0 = desligado)
+    app.config["PRINCIPAL_CACHE_TTL"] = float(os.getenv("PRINCIPAL_CACHE_TTL", "0"))
+    # cache do user_loader por worker (0 = desligado)
+    app.config["IDENTITY_CACHE_SIZE"] = int(os.getenv("IDENTITY_CACHE_SIZE", "1024"))
+    app.config["IDENTITY_CACHE_TTL"] = float(os.getenv("IDENTITY_CACHE_TTL", "60"))
+    # pbkdf2 fora da thread da request (workers=0 roda inline)
+    app.config["PASSWORD_HASH_METHOD"] = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256")
+    app.config["PASSWORD_HASH_WORKERS"] = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    app.config["PASSWORD_HASH_QUEUE"] = int(os.getenv("PASSWORD_HASH_QUEUE", "0"))
+    app.config["PASSWORD_HASH_TIMEOUT"] = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+    # rate limit de login/tokens: "memory" por worker ou "sqlite" compartilhado
+    app.config["RATELIMIT_ENABLED"] = os.getenv("RATELIMIT_ENABLED", "1") == "1"
+    app.config["RATELIMIT_BACKEND"] = os.getenv("RATELIMIT_BACKEND", "memory")
+    # proxies reversos confiáveis na frente do app (X-Forwarded-For/-Proto); 0 = acesso direto
+    app.config["PROXY_FIX_HOPS"] = int(os.getenv("PROXY_FIX_HOPS", "0"))
+    app.config["RATELIMIT_SQLITE_PATH"] = os.getenv(
+        "RATELIMIT_SQLITE_PATH", str(base / "instance" / "ratelimit.db")
+    )
+    # import de convites: corpo máximo (413 acima disso) e linhas por arquivo/lote
+    app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("MAX_CONTENT_LENGTH", str(2 * 1024 * 1024)))
+    app.config["INVITE_IMPORT_MAX_ROWS"] = int(os.getenv("INVITE_IMPORT_MAX_ROWS", "10000"))
+    # arquivamento de convites (intervalo em segundos, 0 = só via `flask sweep-invites`)
+    app.config["INVITE_SWEEP_INTERVAL"] = float(os.getenv("INVITE_SWEEP_INTERVAL", "0"))
+    app.config["INVITE_SWEEP_BATCH"] = int(os.getenv("INVITE_SWEEP_BATCH", "500"))
+    app.config["INVITE_SWEEP_PAUSE"] = float(os.getenv("INVITE_SWEEP_PAUSE", "0.05"))
+    app.config["INVITE_ARCHIVE_ACCEPTED_DAYS"] = int(os.getenv("INVITE_ARCHIVE_ACCEPTED_DAYS", "30"))
+    # cache de fragmentos do dashboard/convites: "file" (compartilhado entre workers),
+    # "memory" (só com um processo: as versões não saem do worker que fez o commit) ou "off"
+    app.config["FRAGMENT_CACHE_BACKEND"] = os.getenv("FRAGMENT_CACHE_BACKEND", "file")
+    app.config["FRAGMENT_CACHE_PATH"] = os.getenv(
+        "FRAGMENT_CACHE_PATH", str(base / "instance" / "fragments.db")
+    )
+    app.config["FRAGMENT_CACHE_SIZE"] = int(os.getenv("FRAGMENT_CACHE_SIZE", "2048"))
+    app.config["FRAGMENT_CACHE_TTL"] = float(os.getenv("FRAGMENT_CACHE_TTL", "60"))
+    # ETag/304 no dashboard e convites (janela máx. de revalidação em segundos);
+    # exige FRAGMENT_CACHE_BACKEND=file, senão create_app falha
+    app.config["CONDITIONAL_GET"] = os.getenv("CONDITIONAL_GET", "1") == "1"
+    app.config["CONDITIONAL_GET_WINDOW"] = int(os.getenv("CONDITIONAL_GET_WINDOW", "300"))
+    app.config["APP_BUILD_ID"] = os.getenv("APP_BUILD_ID", "")
+    # sessão no servidor (cookie só com id): "sqlite" compartilhado, "file", "memory" ou "cookie"
+    app.config["SESSION_BACKEND"] = os.getenv("SESSION_BACKEND", "sqlite")
+    app.config["SESSION_STORE_PATH"] = os.getenv(
+        "SESSION_STORE_PATH", str(base / "instance" / "sessions.db")
+    )
+    app.config["SESSION_TTL"] = int(os.getenv("SESSION_TTL", str(24 * 3600)))
+    # workers web sem Alembic/CLI de manutenção (o `flask` CLI carrega tudo mesmo assim)
+    app.config["FAST_START"] = os.getenv("FAST_START", "0") == "1"
+    # e-mails: "smtp", "file" (grava .eml em MAIL_FILE_PATH) ou "null"; entrega via outbox
+    app.config["MAIL_BACKEND"] = os.getenv("MAIL_BACKEND", "file")
+    app.config["MAIL_SERVER"] = os.getenv("MAIL_SERVER", "localhost")
+    app.config["MAIL_PORT"] = int(os.getenv("MAIL_PORT", "25"))
+    app.config["MAIL_USERNAME"] = os.getenv("MAIL_USERNAME")
+    app.config["MAIL_PASSWORD"] = os.getenv("MAIL_PASSWORD")
+    app.config["MAIL_USE_TLS"] = os.getenv("MAIL_USE_TLS", "0") == "1"
+    app.config["MAIL_FROM"] = os.getenv("MAIL_FROM", "App Zero <no-reply@localhost>")
+    app.config["MAIL_FILE_PATH"] = os.getenv("MAIL_FILE_PATH", str(base / "instance" / "mail"))
+    # thread de entrega por worker (intervalo em s, 0 = só via `flask outbox deliver`)
+    app.config["OUTBOX_INTERVAL"] = float(os.getenv("OUTBOX_INTERVAL", "0"))
+    app.config["OUTBOX_BATCH"] = int(os.getenv("OUTBOX_BATCH", "50"))
+    app.config["OUTBOX_MAX_ATTEMPTS"] = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    app.config["OUTBOX_BACKOFF"] = float(os.getenv("OUTBOX_BACKOFF", "30"))
+    # métricas por request: Server-Timing nas respostas e /metrics (Prometheus) opcional
+    app.config["METRICS_ENABLED"] = os.getenv("METRICS_ENABLED", "1") == "1"
+    app.config["SERVER_TIMING"] = os.getenv("SERVER_TIMING", "0") == "1"  # só logados/METRICS_TOKEN
+    app.config["METRICS_ENDPOINT"] = os.getenv("METRICS_ENDPOINT", "0") == "1"
+    app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN", "")
+    # detector de N+1/queries lentas: "warn", "raise" (testes) ou "off" (padrão sem debug)
+    app.config["QUERYWATCH"] = os.getenv("QUERYWATCH", "warn" if app.debug else "off")
+    app.config["QUERYWATCH_REPEAT"] = int(os.getenv("QUERYWATCH_REPEAT", "5"))
+    app.config["QUERYWATCH_SLOW_MS"] = float(os.getenv("QUERYWATCH_SLOW_MS", "100"))
+    # bytecode dos templates em disco, compartilhado pelos workers ("" desliga)
+    app.config["JINJA_BYTECODE_CACHE"] = os.getenv(
+        "JINJA_BYTECODE_CACHE", str(base / "instance" / "jinja_cache")
+    )
+    # /readyz: ping do banco no máximo a cada N s; detalhes só com HEALTH_TOKEN configurado e enviado
+    app.config["HEALTH_DB_INTERVAL"] = float(os.getenv("HEALTH_DB_INTERVAL", "5"))
+    app.config["HEALTH_TOKEN"] = os.getenv("HEALTH_TOKEN", "")
+
+    # alvo ASGI (app/asgi.py): url async (padrão: a mesma com aiosqlite/asyncpg) e threads do fallback WSGI
+    app.config["ASYNC_DATABASE_URL"] = os.getenv("ASYNC_DATABASE_URL", "")
+    app.config["ASGI_WSGI_THREADS"] = int(os.getenv("ASGI_WSGI_THREADS", "16"))
+
+    if app.config["PROXY_FIX_HOPS"]:
+        # remote_addr (rate limit por IP) e esquema reais do cliente
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        hops = app.config["PROXY_FIX_HOPS"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
 
     db.init_app(app)
+    sqlite_profile.init_app(app, db)
+    replicas.init_app(app)
+    sessions.init_app(app)
     login_manager.init_app(app)
+    hasher.init_app(app)
+    limiter.init_app(app)
+    app.register_error_handler(HashPoolSaturated, _hash_pool_saturated)
 
     # IMPORTA OS MODELS AQUI
     from . import models  # noqa
 
-    migrate.init_app(app, db)
+    tooling = not app.config["FAST_START"] or startup.in_cli()
+    if tooling:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    from . import principal, identity, maintenance, mailer, metrics, querywatch, export
+    from .fragments import fragment_cache
+    fragment_cache.init_app(app)
+    from . import assets, conditional, templating
+    assets.init_app(app)
+    templating.init_app(app)
+    conditional.init_app(app)
+    principal.init_app(app)
+    identity.init_app(app)
+    maintenance.init_app(app)
+    export.init_app(app)
+    mailer.init_app(app)
+    metrics.init_app(app)
+    querywatch.init_app(app)
+    if tooling:
+        from . import queryplan
+        queryplan.init_app(app)
 
     from .routes import web_auth
     app.register_blueprint(web_auth)
+    from .api import api
+    app.register_blueprint(api)
+    # por último: o middleware de health fica por fora de todo o resto
+    from . import health
+    health.init_app(app)
 
+    app.extensions["startup"] = {
+        "fast_start": app.config["FAST_START"],
+        "create_app_ms": round((time.perf_counter() - t0) * 1000, 1),
+        "imports": startup.import_report(),
+    }
     return app
@@ -0,0 +1,259 @@
+# app/api.py – API JSON de leitura (membros e convites) com keyset pagination
+#
+#   GET /api/v1/members?role=admin,viewer&status=active&fields=id,email,role&limit=100
+#   GET /api/v1/invites?status=pending&cursor=<next_cursor>
+#   GET /api/v1/members/export?format=ndjson   (streaming; gzip se o cliente aceitar)
+#
+# Ordem estável por id: integrações sincronizam seguindo `next_cursor` e, na
+# próxima rodada, continuam do último cursor para pegar só o que entrou depois.
+# Cada página é um único SELECT (só as colunas pedidas) por (company_id, id).
+import base64
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
+from flask_login import current_user
+from sqlalchemy import and_, select
+from werkzeug.exceptions import HTTPException
+
+from . import db, export
+from .models import Invite, Membership, User
+from .principal import current_principal
+from .rbac import ROLE_CHOICES
+from .replicas import replica_reads
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+MEMBER_FIELDS = {
+    "id": Membership.id,
+    "user_id": Membership.user_id,
+    "email": User.email,
+    "first_name": User.first_name,
+    "last_name": User.last_name,
+    "job_title": User.job_title,
+    "role": Membership.role,
+    "is_active": Membership.is_active,
+    "joined_at": Membership.joined_at,
+}
+INVITE_FIELDS = {
+    "id": Invite.id,
+    "email": Invite.email,
+    "role": Invite.role,
+    "token": Invite.token,
+    "expires_at": Invite.expires_at,
+    "accepted_at": Invite.accepted_at,
+    "created_at": Invite.created_at,
+}
+INVITE_STATUSES = ("pending", "accepted", "expired", "all")  # revogado = expirado
+
+
+class ApiError(HTTPException):
+    def __init__(self, code, error, description=None):
+        super().__init__(description)
+        self.code = code
+        self.error = error
+
+
+@api.errorhandler(HTTPException)
+def _json_error(e):
+    body = {"error": getattr(e, "error", None) or e.name.lower().replace(" ", "_")}
+    if e.description and isinstance(e, ApiError):
+        body["detail"] = e.description
+    return jsonify(body), e.code
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        kind, value = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":", 1)
+        if kind != "id":
+            raise ValueError(kind)
+        return int(value)
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError(400, "invalid_cursor")
+
+
+def _company_id(permission=None):
+    """Empresa da request (?company_id= ou a ativa) checada contra os vínculos do usuário."""
+    if not current_user.is_authenticated:
+        raise ApiError(401, "unauthorized")
+    p = current_principal()
+    raw = request.args.get("company_id")
+    try:
+        cid = int(raw) if raw else p.company_id
+    except ValueError:
+        raise ApiError(400, "invalid_company_id")
+    if cid is None or p.role_in(cid) is None:
+        raise ApiError(404, "no_company")
+    if permission is not None and not p.can(permission, cid):
+        raise ApiError(403, "forbidden")
+    return cid
+
+
+def _fields(allowed: dict):
+    raw = request.args.get("fields")
+    if not raw:
+        return list(allowed)
+    names = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in names if f not in allowed]
+    if unknown:
+        raise ApiError(400, "unknown_fields", ", ".join(unknown))
+    return ["id"] + [f for f in dict.fromkeys(names) if f != "id"]  # id sempre vem (cursor)
+
+
+def _roles():
+    raw = request.args.get("role")
+    if not raw:
+        return None
+    roles = [r.strip().lower() for r in raw.split(",") if r.strip()]
+    unknown = [r for r in roles if r not in ROLE_CHOICES]
+    if unknown:
+        raise ApiError(400, "unknown_role", ", ".join(unknown))
+    return roles
+
+
+def _limit() -> int:
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError(400, "invalid_limit")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _choice(name, choices, default):
+    value = request.args.get(name, default).lower()
+    if value not in choices:
+        raise ApiError(400, f"invalid_{name}", ", ".join(choices))
+    return value
+
+
+def members_query(company_id: int, columns, roles=None, status="active", after=None, limit=DEFAULT_LIMIT):
+    stmt = (
+        select(*columns)
+        .select_from(Membership)
+        .join(User, User.id == Membership.user_id)
+        .where(Membership.company_id == company_id)
+        .order_by(Membership.id)
+        .limit(limit + 1)
+    )
+    if status != "all":
+        stmt = stmt.where(Membership.is_active.is_(status == "active"))
+    if roles:
+        stmt = stmt.where(Membership.role.in_(roles))
+    if after is not None:
+        stmt = stmt.where(Membership.id > after)
+    return stmt
+
+
+def invites_query(company_id: int, columns, roles=None, status="pending", after=None,
+                  limit=DEFAULT_LIMIT, now=None):
+    now = now or datetime.utcnow()
+    stmt = (
+        select(*columns)
+        .where(Invite.company_id == company_id)
+        .order_by(Invite.id)
+        .limit(limit + 1)
+    )
+    if status == "pending":
+        stmt = stmt.where(Invite.accepted_at.is_(None), Invite.expires_at > now)
+    elif status == "accepted":
+        stmt = stmt.where(Invite.accepted_at.isnot(None))
+    elif status == "expired":
+        stmt = stmt.where(and_(Invite.accepted_at.is_(None), Invite.expires_at <= now))
+    if roles:
+        stmt = stmt.where(Invite.role.in_(roles))
+    if after is not None:
+        stmt = stmt.where(Invite.id > after)
+    return stmt
+
+
+def _invite_status(row, now):
+    if row.accepted_at is not None:
+        return "accepted"
+    return "pending" if row.expires_at > now else "expired"
+
+
+def _serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _page(stmt, fields, limit, extra=None):
+    rows = db.session.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    data = []
+    for row in rows:
+        item = {f: _serialize(getattr(row, f)) for f in fields}
+        if extra:
+            item.update(extra(row))
+        data.append(item)
+    body = {"data": data, "has_more": has_more, "next_cursor": None}
+    headers = {}
+    if has_more:
+        body["next_cursor"] = encode_cursor(rows[-1].id)
+        args = {**request.args.to_dict(), "cursor": body["next_cursor"]}
+        headers["Link"] = f'<{url_for(request.endpoint, _external=True, **args)}>; rel="next"'
+    return jsonify(body), 200, headers
+
+
+@api.get("/members")
+@replica_reads
+def members():
+    cid = _company_id("members.read")
+    fields = _fields(MEMBER_FIELDS)
+    limit = _limit()
+    stmt = members_query(
+        cid, [MEMBER_FIELDS[f].label(f) for f in fields],
+        roles=_roles(), status=_choice("status", ("active", "inactive", "all"), "active"),
+        after=decode_cursor(request.args.get("cursor")), limit=limit,
+    )
+    return _page(stmt, fields, limit)
+
+
+@api.get("/invites")
+@replica_reads
+def invites():
+    # convites expõem o token de aceite
+    cid = _company_id("invites.read")
+    fields = _fields({**INVITE_FIELDS, "status": None})
+    want_status = "status" in fields
+    fields = [f for f in fields if f != "status"]
+    # status é derivado: precisa de accepted_at/expires_at mesmo se não pedidos
+    columns = {f: INVITE_FIELDS[f] for f in fields}
+    if want_status:
+        columns.setdefault("accepted_at", Invite.accepted_at)
+        columns.setdefault("expires_at", Invite.expires_at)
+    limit = _limit()
+    now = datetime.utcnow()
+    stmt = invites_query(
+        cid, [col.label(name) for name, col in columns.items()],
+        roles=_roles(), status=_choice("status", INVITE_STATUSES, "pending"),
+        after=decode_cursor(request.args.get("cursor")), limit=limit, now=now,
+    )
+    extra = (lambda row: {"status": _invite_status(row, now)}) if want_status else None
+    return _page(stmt, fields, limit, extra)
+
+
+@api.get("/<any(members, invites):kind>/export")
+@replica_reads
+def export_view(kind):
+    # exports completos têm dados pessoais de todo o roster
+    cid = _company_id("data.export")
+    fmt = _choice("format", tuple(export.FORMATS), "csv")
+    gzip = "gzip" in request.accept_encodings
+    headers = {
+        "Content-Disposition": f'attachment; filename="{export.filename(kind, cid, fmt)}"',
+        "Vary": "Accept-Encoding",
+        "X-Accel-Buffering": "no",  # nginx: repassa os blocos sem bufferizar
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    body = stream_with_context(export.export(kind, cid, fmt, gzip=gzip))
+    return Response(body, mimetype=export.FORMATS[fmt], headers=headers)
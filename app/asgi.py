@@ -0,0 +1,388 @@
+# app/asgi.py – alvo ASGI: leituras pesadas com AsyncSession, o resto no app WSGI
+#
+#   pip install -r requirements-asgi.txt
+#   uvicorn app.asgi:asgi_app --workers 4
+#
+# GET/HEAD de /dashboard, /invites e /accept-invite rodam no event loop: o
+# contexto de request do Flask é o mesmo (sessão, login, flash, CSRF, templates,
+# métricas), mas as consultas vão por um AsyncSession (aiosqlite localmente,
+# asyncpg no Postgres) e a request não prende uma thread esperando o banco.
+# Escritas (POST), o aceite de convite por quem já está logado e as demais
+# rotas seguem pelo app WSGI num pool de ASGI_WSGI_THREADS threads, com corpo
+# e resposta em streaming. Réplicas (@replica_reads) só valem no caminho WSGI.
+# Atrás de proxy, além de PROXY_FIX_HOPS rode o uvicorn com --proxy-headers e
+# --forwarded-allow-ips: o caminho async monta o environ do scope, sem ProxyFix.
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import flash, g, redirect, render_template, request, request_started, session, url_for
+from flask_login import current_user
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload
+
+from . import conditional, create_app, db, login_manager, routes, sqlite_profile
+from .fragments import fragment_cache
+from .identity import identity_cache, parse_user_id, restore, snapshot
+from .models import Company, Invite, User
+from .principal import Principal, membership_cache, memberships_query
+from .ratelimit import limiter, token_prefix
+from .team import TEAM_PAGE_SIZE, decode_cursor, split_page, team_count_query, team_query
+
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+# endpoint -> (view async(session), serves async() ou None)
+ASYNC_VIEWS = {}
+
+
+def async_view(endpoint, serves=None):
+    """`serves()` decide, antes de qualquer before_request, se a request fica no loop;
+    False devolve a request inteira para o app WSGI."""
+    def deco(fn):
+        ASYNC_VIEWS[endpoint] = (fn, serves)
+        return fn
+    return deco
+
+
+def async_url(uri: str):
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"sem driver async para {backend}: defina ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+class AsyncDatabase:
+    """Engine async do primário, com o mesmo pool/pragmas do perfil SQLite."""
+
+    def __init__(self, app):
+        cfg = app.config
+        uri = cfg["SQLALCHEMY_DATABASE_URI"]
+        self.engine = create_async_engine(
+            cfg["ASYNC_DATABASE_URL"] or async_url(uri), **sqlite_profile.engine_options(cfg)
+        )
+        if cfg["SQLITE_PROFILE"] == "production" and sqlite_profile.is_sqlite_file(uri):
+            sqlite_profile.install_pragmas(self.engine.sync_engine, cfg)
+        # objetos seguem legíveis no render depois do fim da sessão
+        self.session = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def dispose(self):
+        await self.engine.dispose()
+
+
+# --- autenticação e principal sem consultas síncronas ---
+async def _fetch_user(s, raw):
+    # mesma regra do user_loader (routes.load_user), com a consulta no AsyncSession
+    try:
+        uid, version = parse_user_id(raw)
+    except Exception:
+        return None
+    cached = identity_cache.get(uid, version)
+    if cached is None:
+        user = await s.get(User, uid)
+        if user is None or (version and version != user.session_version):
+            return None
+        cached = snapshot(user)
+        identity_cache.set(uid, user.session_version, cached)
+    return restore(db.session, User, cached)  # merge sem SELECT, como no caminho WSGI
+
+
+async def load_current_user(s):
+    """current_user da request; o user_loader encontra o usuário já buscado em g."""
+    raw = await asyncio.to_thread(session.get, "_user_id")  # carrega a sessão fora do loop
+    if raw is None:
+        # anônimo ou remember-cookie: Flask-Login pelo caminho normal, numa thread
+        return await asyncio.to_thread(current_user._get_current_object)
+    g._prefetched_user = (raw, await _fetch_user(s, raw))
+    return current_user._get_current_object()
+
+
+async def load_principal(s, user):
+    memberships = membership_cache.get(user.id)
+    if memberships is None:
+        rows = await s.execute(memberships_query(user.id))
+        memberships = tuple((r.company_id, r.role) for r in rows)
+        membership_cache.set(user.id, memberships)
+    p = g._principal = Principal(user.id, memberships)
+    if p.company_id is not None:
+        p._company = await s.get(Company, p.company_id)
+    return p
+
+
+async def _authenticated(s):
+    user = await load_current_user(s)
+    if not user.is_authenticated:
+        return None
+    return await load_principal(s, user)
+
+
+# --- views ---
+# versões, fragmentos e validadores vêm do FileBackend (SQLite, busy timeout de 1 s):
+# toda chamada ao cache e o render que grava fragmentos rodam numa thread, fora do loop
+def _missing(cid, *sections):
+    """Nomes das seções (nome, vary) sem fragmento em cache."""
+    return {name for name, vary in sections if fragment_cache.cached(cid, name, vary) is None}
+
+
+@async_view("web_auth.dashboard")
+async def dashboard(s):
+    p = await _authenticated(s)
+    if p is None:
+        return login_manager.unauthorized()
+    validators = await asyncio.to_thread(conditional.check, "dashboard")
+    if validators and validators[2]:
+        return conditional.not_modified(validators)
+    company = p.company
+    after = request.args.get("after")
+    data = {}
+    if company:
+        cid = company.id
+        # só consulta o que os fragmentos em cache não cobrem
+        missing = await asyncio.to_thread(
+            _missing, cid, ("dashboard:kpis", ()), ("dashboard:pending", (request.host_url,)),
+            ("dashboard:team", (after or "",)),
+        )
+        if "dashboard:kpis" in missing:
+            data["team_count"] = await s.scalar(team_count_query(cid))
+        if missing & {"dashboard:kpis", "dashboard:pending"}:
+            data["pending"] = (await s.scalars(Invite.pending_query(cid).statement)).all()
+        if "dashboard:team" in missing:
+            rows = await s.scalars(team_query(cid, after=decode_cursor(after)))
+            data["team"] = split_page(rows, TEAM_PAGE_SIZE)
+    rv = await asyncio.to_thread(routes.render_dashboard, company, after, data)
+    return conditional.finish(rv, validators)
+
+
+@async_view("web_auth.invites")
+async def invites(s):
+    p = await _authenticated(s)
+    if p is None:
+        return login_manager.unauthorized()
+    company = p.company
+    if company is None:
+        flash("Você não está vinculado a nenhuma empresa.", "danger")
+        return redirect(url_for("web_auth.dashboard"))
+    validators = await asyncio.to_thread(conditional.check, "invites")
+    if validators and validators[2]:
+        return conditional.not_modified(validators)
+    data = {}
+    missing = await asyncio.to_thread(
+        _missing, company.id, ("invites:pending", (request.host_url,)), ("invites:used", ())
+    )
+    if "invites:pending" in missing:
+        stmt = Invite.pending_query(company.id).order_by(Invite.created_at.desc()).statement
+        data["pending"] = (await s.scalars(stmt)).all()
+    if "invites:used" in missing:
+        data["used"] = (await s.scalars(Invite.used_query(company.id).limit(20).statement)).all()
+    form = routes.forms.InviteCreateForm()
+    rv = await asyncio.to_thread(routes._render_invites, company, form, data=data)
+    return conditional.finish(rv, validators)
+
+
+async def _anonymous_with_token():
+    # sem token ou já logado (o aceite grava o vínculo): caminho WSGI
+    if not request.args.get("token", "").strip():
+        return False
+    return await asyncio.to_thread(session.get, "_user_id") is None
+
+
+@async_view("web_auth.accept_invite", serves=_anonymous_with_token)
+async def accept_invite(s):
+    token = request.args.get("token", "").strip()
+    await asyncio.to_thread(limiter.check_ip, "token_ip")
+    await asyncio.to_thread(limiter.check, "token_prefix", token_prefix(token))
+
+    stmt = Invite.query.options(joinedload(Invite.company)).filter_by(token=token).statement
+    inv = (await s.scalars(stmt)).first()
+    problem = routes.invite_problem(inv)
+    if problem is not None:
+        return problem
+    if await s.scalar(User.query.with_entities(User.id).filter_by(email=inv.email.strip().lower()).statement):
+        return routes.login_to_accept(token)
+    # GET: o form só é renderizado; o POST de criação de conta vai pelo WSGI
+    form = routes.forms.AcceptInviteForm()
+    return render_template("dashboard/accept_invite.html", form=form, invite=inv, title="Aceitar convite")
+
+
+# --- ponte ASGI <-> WSGI ---
+def wsgi_environ(scope, body):
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode().decode("latin-1"),
+        "PATH_INFO": path.encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,  # lê até o fim mesmo sem Content-Length (chunked)
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name, value = name.decode("latin-1"), value.decode("latin-1")
+        if name == "content-type":
+            key = "CONTENT_TYPE"
+        elif name == "content-length":
+            key = "CONTENT_LENGTH"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class _Body(io.RawIOBase):
+    """wsgi.input que puxa o corpo do receive() do loop conforme a view lê."""
+
+    def __init__(self, receive, loop):
+        self.receive = receive
+        self.loop = loop
+        self.buf = b""
+        self.more = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self.buf and self.more:
+            msg = asyncio.run_coroutine_threadsafe(self.receive(), self.loop).result()
+            if msg["type"] == "http.disconnect":
+                self.more = False
+                break
+            self.buf = msg.get("body", b"")
+            self.more = msg.get("more_body", False)
+        n = min(len(b), len(self.buf))
+        b[:n] = self.buf[:n]
+        self.buf = self.buf[n:]
+        return n
+
+
+def _start_message(status, headers):
+    return {
+        "type": "http.response.start",
+        "status": int(status.split(" ", 1)[0]) if isinstance(status, str) else status,
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+    }
+
+
+class AsgiApp:
+    def __init__(self, app, threads: int = 16):
+        self.app = app
+        self.wsgi_app = app.wsgi_app  # com o middleware de health na frente
+        self.db = AsyncDatabase(app)
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="asgi-wsgi")
+        self.paths = {
+            rule.rule for rule in app.url_map.iter_rules() if rule.endpoint in ASYNC_VIEWS
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            raise RuntimeError(f"tipo ASGI não suportado: {scope['type']}")
+        loop = asyncio.get_running_loop()
+        environ = wsgi_environ(scope, io.BufferedReader(_Body(receive, loop)))
+        if environ["REQUEST_METHOD"] in ("GET", "HEAD") and environ["PATH_INFO"] in self.paths:
+            if await self._dispatch_async(environ, send):
+                return
+        await loop.run_in_executor(self.executor, self._run_wsgi, environ, send, loop)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            msg = await receive()
+            if msg["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif msg["type"] == "lifespan.shutdown":
+                await self.db.dispose()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _dispatch_async(self, environ, send) -> bool:
+        # o mesmo ciclo de Flask.wsgi_app/full_dispatch_request, com a view aguardada no loop
+        app = self.app
+        ctx = app.request_context(environ)
+        ctx.push()
+        error = None
+        try:
+            # a decisão de ir para o WSGI vem antes dos hooks: lá eles rodam uma vez só
+            view, serves = ASYNC_VIEWS.get(request.endpoint, (None, None))
+            if view is None or (serves is not None and not await serves()):
+                return False
+            try:
+                try:
+                    request_started.send(app, _async_wrapper=app.ensure_sync)
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        async with self.db.session() as s:
+                            rv = await view(s)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                # after_request grava a sessão no servidor: fora do loop
+                response = await asyncio.to_thread(app.finalize_request, rv)
+            except Exception as e:
+                error = e
+                response = app.handle_exception(e)
+            headers = response.get_wsgi_headers(environ)
+            await send(_start_message(response.status_code, headers.to_wsgi_list()))
+            for chunk in response.get_app_iter(environ):
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return True
+        finally:
+            ctx.pop(error)
+
+    def _run_wsgi(self, environ, send, loop):
+        # cada mensagem espera o send() do loop: backpressure para respostas em streaming
+        def push(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        pending, sent = [], []  # start ainda não enviado / cabeçalhos já na rede
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and sent:
+                raise exc_info[1].with_traceback(exc_info[2])
+            pending[:] = [_start_message(status, headers)]
+
+        def flush_start():
+            if pending:
+                push(pending.pop())
+                sent.append(True)
+
+        body = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in body:
+                flush_start()
+                if chunk:
+                    push({"type": "http.response.body", "body": chunk, "more_body": True})
+            flush_start()
+            push({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+
+
+def __getattr__(name):
+    # uvicorn app.asgi:asgi_app cria o app no primeiro acesso; importar o módulo
+    # (testes, AsgiApp(outro_app)) não cria nada
+    if name not in ("flask_app", "asgi_app"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    global flask_app, asgi_app
+    flask_app = create_app()
+    asgi_app = AsgiApp(flask_app, threads=flask_app.config["ASGI_WSGI_THREADS"])
+    return globals()[name]
@@ -0,0 +1,158 @@
+# app/assets.py – bundles de CSS com hash no nome, pré-compressão e cache longo
+#
+# Build:   flask assets build      (gera app/static/dist/* + manifest.json)
+# Runtime: url_for('static', filename='bundles/<nome>.css') vira o arquivo com hash;
+#          sem manifest (dev) os templates usam os arquivos soltos como antes.
+import gzip
+import hashlib
+import json
+import pathlib
+import re
+import urllib.request
+
+import click
+from flask import current_app, g, request, send_from_directory, url_for
+from flask.cli import AppGroup
+from markupsafe import Markup
+
+try:
+    import brotli
+except ImportError:  # opcional: sem brotli só gera .gz
+    brotli = None
+
+PICO_VERSION = "2.0.6"
+PICO_URL = f"https://cdn.jsdelivr.net/npm/@picocss/pico@{PICO_VERSION}/css/pico.min.css"
+PICO_FILE = "vendor/pico.min.css"
+
+_BASE = [PICO_FILE, "css/main.css"]
+BUNDLES = {
+    "base": _BASE,
+    "index": _BASE + ["css/index.css"],
+    "login": _BASE + ["css/login.css"],
+    "dashboard": _BASE + ["css/dashboard.css"],
+    "register": _BASE + ["css/register.css"],
+    "register_wizard": _BASE + ["css/register_wizard.css"],
+}
+
+ONE_YEAR = 31536000
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def minify_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def build(static_folder: str, fetch: bool = True) -> dict:
+    root = pathlib.Path(static_folder)
+    vendor = root / PICO_FILE
+    if not vendor.exists():
+        if not fetch:
+            raise click.ClickException(f"{vendor} ausente (rode sem --no-fetch)")
+        vendor.parent.mkdir(parents=True, exist_ok=True)
+        with urllib.request.urlopen(PICO_URL, timeout=30) as resp:
+            vendor.write_bytes(resp.read())
+
+    dist = root / "dist"
+    dist.mkdir(exist_ok=True)
+    manifest = {}
+    for name, files in BUNDLES.items():
+        css = "\n".join((root / f).read_text(encoding="utf-8") for f in files)
+        data = minify_css(css).encode()
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        out = dist / f"{name}.{digest}.css"
+        out.write_bytes(data)
+        with gzip.GzipFile(out.with_name(out.name + ".gz"), "wb", compresslevel=9, mtime=0) as fh:
+            fh.write(data)
+        if brotli is not None:
+            out.with_name(out.name + ".br").write_bytes(brotli.compress(data, quality=11))
+        manifest[f"bundles/{name}.css"] = f"dist/{out.name}"
+
+    (dist / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    # remove bundles antigos que não estão mais no manifest
+    keep = {pathlib.Path(p).name for p in manifest.values()}
+    for f in dist.glob("*.css*"):
+        if f.name.split(".css")[0] + ".css" not in keep:
+            f.unlink()
+    return manifest
+
+
+def load_manifest(static_folder: str) -> dict:
+    path = pathlib.Path(static_folder) / "dist" / "manifest.json"
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def css_links(bundle: str = "base") -> Markup:
+    """<link> do bundle; também registra o href para o header Link: preload."""
+    manifest = current_app.extensions["assets"]
+    key = f"bundles/{bundle}.css"
+    if key in manifest:
+        hrefs = [url_for("static", filename=key)]
+    else:
+        vendor = pathlib.Path(current_app.static_folder) / PICO_FILE
+        hrefs = [
+            url_for("static", filename=f) if f != PICO_FILE or vendor.exists() else PICO_URL
+            for f in BUNDLES.get(bundle, _BASE)
+        ]
+    g.setdefault("_preload_css", []).extend(hrefs)
+    return Markup("\n  ".join(f'<link href="{h}" rel="stylesheet">' for h in hrefs))
+
+
+def _fingerprint(endpoint, values):
+    if endpoint == "static":
+        filename = values.get("filename")
+        if filename in current_app.extensions["assets"]:
+            values["filename"] = current_app.extensions["assets"][filename]
+
+
+def _static(filename):
+    if not filename.startswith("dist/"):
+        return current_app.send_static_file(filename)
+    # arquivos com hash: imutáveis e servidos pré-comprimidos quando o cliente aceita
+    root = pathlib.Path(current_app.static_folder)
+    mimetype = "text/css" if filename.endswith(".css") else None
+    for encoding, ext in ENCODINGS:
+        if encoding in request.accept_encodings and (root / (filename + ext)).is_file():
+            response = send_from_directory(root, filename + ext, mimetype=mimetype, max_age=ONE_YEAR)
+            response.headers["Content-Encoding"] = encoding
+            break
+    else:
+        response = send_from_directory(root, filename, mimetype=mimetype, max_age=ONE_YEAR)
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = f"public, max-age={ONE_YEAR}, immutable"
+    return response
+
+
+def _preload_header(response):
+    # proxies/CDNs (h2o, Cloudflare) convertem este header em 103 Early Hints
+    hrefs = g.get("_preload_css")
+    if hrefs and response.mimetype == "text/html":
+        response.headers.add("Link", ", ".join(f"<{h}>; rel=preload; as=style" for h in hrefs))
+    return response
+
+
+assets_cli = AppGroup("assets", help="Pipeline de assets estáticos.")
+
+
+@assets_cli.command("build")
+@click.option("--no-fetch", is_flag=True, help="Não baixa o Pico se estiver ausente.")
+def build_command(no_fetch):
+    """Gera bundles minificados com hash + .gz/.br e o manifest."""
+    manifest = build(current_app.static_folder, fetch=not no_fetch)
+    for logical, path in sorted(manifest.items()):
+        click.echo(f"{logical} -> {path}")
+
+
+def init_app(app):
+    app.extensions["assets"] = load_manifest(app.static_folder)
+    app.jinja_env.globals["css_links"] = css_links
+    app.url_defaults(_fingerprint)
+    app.view_functions["static"] = _static
+    app.after_request(_preload_header)
+    app.cli.add_command(assets_cli)
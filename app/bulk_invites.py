@@ -0,0 +1,162 @@
+# app/bulk_invites.py – importação de convites em lote (CSV/API): inserts em chunks, um único commit
+import csv
+import io
+from datetime import datetime, timedelta
+from secrets import token_urlsafe
+
+from sqlalchemy import insert, select
+
+from . import db
+from .fragments import mark_changed
+from .models import Invite, Membership, User
+from .rbac import INVITE_ROLES
+
+CHUNK_SIZE = 500
+MAX_ROWS = 10_000  # default de INVITE_IMPORT_MAX_ROWS
+
+
+class InvalidCsv(ValueError):
+    """Arquivo ilegível (encoding ou formato); nada foi gravado."""
+
+
+class TooManyRows(InvalidCsv):
+    """Mais linhas que INVITE_IMPORT_MAX_ROWS; nada foi gravado."""
+
+
+def parse_csv(stream, default_role: str = "viewer"):
+    """Lê o CSV linha a linha: (nº da linha, email, papel). Cabeçalho é opcional."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for line_no, row in enumerate(csv.reader(text), start=1):
+        if not row or not row[0].strip():
+            continue
+        email = row[0].strip()
+        if line_no == 1 and email.lower() == "email":
+            continue
+        role = (row[1].strip().lower() if len(row) > 1 else "") or default_role
+        yield line_no, email, role
+
+
+def read_csv(stream, default_role: str = "viewer", max_rows: int = MAX_ROWS):
+    """parse_csv do arquivo inteiro antes de gravar: erro no meio não deixa import parcial.
+
+    A lista fica limitada por `max_rows` (e o corpo por MAX_CONTENT_LENGTH).
+    """
+    rows = []
+    try:
+        for row in parse_csv(stream, default_role):
+            if len(rows) >= max_rows:
+                raise TooManyRows(f"O arquivo tem mais de {max_rows} convites. Divida em partes menores.")
+            rows.append(row)
+    except UnicodeDecodeError:
+        raise InvalidCsv("O arquivo não está em UTF-8. Salve como \"CSV UTF-8\" e envie de novo.") from None
+    except csv.Error as e:
+        line = rows[-1][0] + 1 if rows else 1
+        raise InvalidCsv(f"CSV inválido perto da linha {line}: {e}.") from None
+    return rows
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def member_emails_query(company_id: int, emails):
+    return (
+        select(User.email)
+        .join(Membership, Membership.user_id == User.id)
+        .where(Membership.company_id == company_id, User.email.in_(emails))
+    )
+
+
+def pending_emails_query(company_id: int, emails, now):
+    return select(Invite.email).where(
+        Invite.company_id == company_id,
+        Invite.accepted_at.is_(None),
+        Invite.expires_at > now,
+        Invite.email.in_(emails),
+    )
+
+
+def _existing(company_id: int, emails, now):
+    members = set(db.session.execute(member_emails_query(company_id, emails)).scalars())
+    pending = set(db.session.execute(pending_emails_query(company_id, emails, now)).scalars())
+    return members, pending
+
+
+def import_invites(company_id: int, rows, days_valid: int = 7, chunk_size: int = CHUNK_SIZE,
+                   on_chunk=None):
+    """Valida, deduplica e insere convites; devolve um relatório por linha.
+
+    `rows` é um iterável de (linha, email, papel). Os chunks limitam o IN(...) e o
+    executemany, mas tudo é uma transação só: erro de banco em qualquer chunk
+    desfaz o import inteiro. `on_chunk(values)` roda dentro da mesma transação.
+    """
+    from email_validator import EmailNotValidError, validate_email  # adiado: só o import usa
+
+    now = datetime.utcnow()
+    expires_at = now + timedelta(days=days_valid)
+    seen = set()
+    report = []
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            candidates = []
+            for line_no, raw_email, role in chunk:
+                entry = {"line": line_no, "email": raw_email, "role": role}
+                report.append(entry)
+                try:
+                    email = validate_email(raw_email, check_deliverability=False).normalized.lower()
+                except EmailNotValidError:
+                    entry["status"] = "invalid_email"
+                    continue
+                entry["email"] = email
+                if role not in INVITE_ROLES:
+                    entry["status"] = "invalid_role"
+                elif email in seen:
+                    entry["status"] = "duplicate"
+                else:
+                    seen.add(email)
+                    candidates.append(entry)
+            if not candidates:
+                continue
+
+            members, pending = _existing(company_id, [e["email"] for e in candidates], now)
+            values = []
+            for entry in candidates:
+                if entry["email"] in members:
+                    entry["status"] = "member"
+                elif entry["email"] in pending:
+                    entry["status"] = "pending"
+                else:
+                    entry["status"] = "created"
+                    entry["token"] = token_urlsafe(24)
+                    values.append({
+                        "company_id": company_id,
+                        "email": entry["email"],
+                        "role": entry["role"],
+                        "token": entry["token"],
+                        "expires_at": expires_at,
+                        "created_at": now,
+                    })
+            if values:
+                db.session.execute(insert(Invite), values)  # executemany
+                mark_changed(db.session(), company_id=company_id)  # insert Core não dispara eventos de mapper
+                if on_chunk:
+                    on_chunk(values)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()  # nada do import fica gravado
+        raise
+    return report
+
+
+def summarize(report) -> dict:
+    out = {}
+    for entry in report:
+        out[entry["status"]] = out.get(entry["status"], 0) + 1
+    return out
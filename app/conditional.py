@@ -0,0 +1,120 @@
+# app/conditional.py – ETag/Last-Modified + 304 para páginas autenticadas
+import hashlib
+import os
+import pathlib
+import sqlite3
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+from .fragments import fragment_cache
+from .principal import current_principal
+from .replicas import reading_replica
+
+
+def build_id(app) -> str:
+    # muda a cada deploy: env explícita ou o mtime mais recente dos templates/manifest de assets
+    if app.config.get("APP_BUILD_ID"):
+        return str(app.config["APP_BUILD_ID"])
+    root = pathlib.Path(app.root_path) / (app.template_folder or "templates")
+    mtimes = [p.stat().st_mtime for p in root.rglob("*.html")]
+    manifest = pathlib.Path(app.static_folder) / "dist" / "manifest.json"
+    if manifest.exists():
+        mtimes.append(manifest.stat().st_mtime)
+    return str(int(max(mtimes, default=0)))
+
+
+def _validators(page: str):
+    """(etag, last_modified) baratos: só versões em cache, nenhuma query de roster/convites."""
+    p = current_principal()
+    cid = p.company_id if p else None
+    company_v = fragment_cache.version(cid)
+    user_v = fragment_cache.user_version(current_user.id)
+    window = int(current_app.config["CONDITIONAL_GET_WINDOW"])
+    # a janela limita quanto tempo uma página (token CSRF, convites vencendo) pode ser revalidada
+    bucket = int(time.time() // window) * window
+    parts = [
+        page, current_app.config["APP_BUILD_ID"], current_user.get_id(), cid,
+        p.role if p else "", company_v, user_v, bucket, request.query_string.decode(),
+    ]
+    etag = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:20]
+    last_ms = max(company_v, user_v, bucket * 1000)
+    return etag, datetime.fromtimestamp(last_ms / 1000, tz=timezone.utc).replace(microsecond=0)
+
+
+def _private(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Cookie")
+    return response
+
+
+def check(page: str):
+    """(etag, last_modified, fresh) da request atual; None quando a página não é validada."""
+    if (
+        request.method not in ("GET", "HEAD")
+        or not current_app.config["CONDITIONAL_GET"]
+        or session.get("_flashes")  # mensagens pendentes mudam o corpo
+    ):
+        return None
+    try:
+        etag, last_modified = _validators(page)
+    except sqlite3.OperationalError:
+        return None  # store de versões indisponível: responde a página inteira, sem validadores
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif request.query_string:
+        # páginas (?after=...) só pelo ETag: o Last-Modified não distingue uma página da outra
+        fresh = False
+    else:
+        ims = request.if_modified_since
+        fresh = bool(ims and ims >= last_modified)
+    return etag, last_modified, fresh
+
+
+def not_modified(validators):
+    etag, last_modified, _ = validators
+    return _private(current_app.response_class(status=304), etag, last_modified)
+
+
+def finish(rv, validators):
+    response = make_response(rv)
+    # corpo lido de réplica pode ser anterior à versão do ETag: sem validadores, sem 304 velho
+    if validators and response.status_code == 200 and not reading_replica():
+        _private(response, *validators[:2])
+    return response
+
+
+def conditional(page: str):
+    """Responde 304 antes de executar a view quando o cliente já tem a versão atual."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            validators = check(page)
+            if validators is None:
+                return view(*args, **kwargs)
+            if validators[2]:
+                return not_modified(validators)
+            return finish(view(*args, **kwargs), validators)
+
+        return wrapped
+
+    return decorator
+
+
+def init_app(app):
+    app.config.setdefault("CONDITIONAL_GET", True)
+    app.config.setdefault("CONDITIONAL_GET_WINDOW", 300)
+    # as versões do ETag precisam ser as mesmas em todos os workers: com versões
+    # por processo, outro worker responderia 304 para conteúdo velho
+    if app.config["CONDITIONAL_GET"] and not getattr(fragment_cache.backend, "shared", False):
+        raise RuntimeError(
+            "CONDITIONAL_GET requer FRAGMENT_CACHE_BACKEND=file "
+            f"(atual: {app.config['FRAGMENT_CACHE_BACKEND']}); ou defina CONDITIONAL_GET=0"
+        )
+    app.config["APP_BUILD_ID"] = build_id(app)
@@ -0,0 +1,190 @@
+# app/export.py – exportação em streaming (CSV/NDJSON, gzip opcional) do roster e do histórico de convites
+#
+# As linhas saem do cursor em lotes (yield_per + stream_results) e viram blocos
+# de ~64 KB de texto; nada acumula a lista inteira, então a memória fica
+# constante com 500 ou 500 mil linhas. Usado pela API (/api/v1/*/export) e por
+# `flask export members|invites`.
+import csv
+import json
+import sys
+import zlib
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, literal, select
+
+from . import db
+from .models import Company, Invite, InviteArchive, Membership, User
+
+YIELD_PER = 1000
+CHUNK_BYTES = 64 * 1024
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+MEMBER_COLUMNS = (
+    Membership.id.label("membership_id"),
+    User.id.label("user_id"),
+    User.email,
+    User.first_name,
+    User.last_name,
+    User.job_title,
+    User.phone,
+    Membership.role,
+    Membership.is_active,
+    Membership.joined_at,
+)
+INVITE_HEADER = ("invite_id", "email", "role", "status", "created_at", "expires_at", "accepted_at",
+                 "archived_at")
+
+
+def members_export_query(company_id: int):
+    # todos os vínculos (ativos e inativos) na ordem do índice (company_id, id)
+    return (
+        select(*MEMBER_COLUMNS)
+        .join(User, User.id == Membership.user_id)
+        .where(Membership.company_id == company_id)
+        .order_by(Membership.id)
+    )
+
+
+def invites_export_queries(company_id: int, now=None):
+    """Histórico completo: convites vivos e depois os já arquivados pelo sweeper."""
+    now = now or datetime.utcnow()
+    live = (
+        select(
+            Invite.id.label("invite_id"), Invite.email, Invite.role,
+            case(
+                (Invite.accepted_at.isnot(None), "accepted"),
+                (Invite.expires_at > now, "pending"),
+                else_="expired",
+            ).label("status"),
+            Invite.created_at, Invite.expires_at, Invite.accepted_at,
+            literal(None).label("archived_at"),
+        )
+        .where(Invite.company_id == company_id)
+        .order_by(Invite.id)
+    )
+    archived = (
+        select(
+            InviteArchive.id.label("invite_id"), InviteArchive.email, InviteArchive.role,
+            InviteArchive.reason.label("status"),
+            InviteArchive.created_at, InviteArchive.expires_at, InviteArchive.accepted_at,
+            InviteArchive.archived_at,
+        )
+        .where(InviteArchive.company_id == company_id)
+        .order_by(InviteArchive.id)
+    )
+    return live, archived
+
+
+def stream_rows(*statements):
+    """Linhas de cada statement em sequência, lidas do cursor em lotes de YIELD_PER."""
+    for stmt in statements:
+        result = db.session.execute(stmt, execution_options={"yield_per": YIELD_PER, "stream_results": True})
+        try:
+            for partition in result.partitions():
+                yield from partition
+        finally:
+            result.close()
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    # csv.writer "escreve" aqui e devolve a linha formatada
+    def write(self, line):
+        return line
+
+
+def _csv_cell(value):
+    value = _value(value)
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    # =, +, -, @ no início viram fórmula no Excel/Sheets (CSV injection)
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@"):
+        return "'" + value
+    return value
+
+
+def encode_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_cell(v) for v in row])
+
+
+def encode_ndjson(header, rows):
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str).encode
+    for row in rows:
+        yield dumps({k: _value(v) for k, v in zip(header, row)}) + "\n"
+
+
+def chunked(lines, size: int = CHUNK_BYTES):
+    """Agrupa as linhas em blocos de bytes de ~size (menos writes no socket)."""
+    buf, length = [], 0
+    for line in lines:
+        data = line.encode()
+        buf.append(data)
+        length += len(data)
+        if length >= size:
+            yield b"".join(buf)
+            buf, length = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+def gzipped(chunks, level: int = 6):
+    comp = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # wbits 16+: cabeçalho gzip
+    for chunk in chunks:
+        data = comp.compress(chunk)
+        if data:
+            yield data
+    yield comp.flush()
+
+
+def export(kind: str, company_id: int, fmt: str = "csv", gzip: bool = False):
+    """Gerador de bytes do export `kind` ("members" ou "invites") da empresa."""
+    if kind == "members":
+        header = tuple(c.key for c in MEMBER_COLUMNS)
+        rows = stream_rows(members_export_query(company_id))
+    else:
+        header = INVITE_HEADER
+        rows = stream_rows(*invites_export_queries(company_id))
+    lines = encode_csv(header, rows) if fmt == "csv" else encode_ndjson(header, rows)
+    out = chunked(lines)
+    return gzipped(out) if gzip else out
+
+
+def filename(kind: str, company_id: int, fmt: str, gzip: bool = False) -> str:
+    return f"{kind}-{company_id}-{datetime.utcnow():%Y%m%d}.{fmt}" + (".gz" if gzip else "")
+
+
+@click.command("export")
+@click.argument("kind", type=click.Choice(["members", "invites"]))
+@click.option("--company", "company_id", type=int, required=True)
+@click.option("--format", "fmt", type=click.Choice(sorted(FORMATS)), default="csv")
+@click.option("--gzip", is_flag=True, help="Comprime (gzip) durante a escrita.")
+@click.option("-o", "--output", type=click.Path(dir_okay=False, writable=True),
+              help="Arquivo de saída (padrão: stdout).")
+@with_appcontext
+def export_command(kind, company_id, fmt, gzip, output):
+    """Exporta KIND (members/invites) em streaming, sem carregar tudo em memória."""
+    if db.session.get(Company, company_id) is None:
+        raise click.ClickException(f"empresa {company_id} não existe")
+    out = open(output, "wb") if output else sys.stdout.buffer
+    try:
+        for chunk in export(kind, company_id, fmt, gzip):
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
+
+
+def init_app(app):
+    app.cli.add_command(export_command)
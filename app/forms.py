@@ -1,8 +1,11 @@
 # app/forms.py
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired
 from wtforms import StringField, PasswordField, SubmitField, SelectField, BooleanField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, Optional, NumberRange
 
+from .rbac import INVITE_ROLE_OPTIONS, ROLE_LABELS
+
 
 TZ_CHOICES = [
     ("America/Sao_Paulo", "America/Sao_Paulo"),
@@ -10,13 +13,8 @@ TZ_CHOICES = [
     ("UTC", "UTC"),
 ]
 
-ROLE_CHOICES = [
-    ("owner", "Owner"),
-    ("admin", "Admin"),
-    ("manager", "Manager"),
-    ("operator", "Operator"),
-    ("viewer", "Viewer"),
-]
+# (valor, rótulo) de todos os papéis; a lista vem de app/rbac.py
+ROLE_CHOICES = list(ROLE_LABELS.items())
 
 class RegisterForm(FlaskForm):
     # Usuário
@@ -47,15 +45,16 @@ class LoginForm(FlaskForm):
 
 class InviteCreateForm(FlaskForm):
     email = StringField("E-mail do convidado", validators=[DataRequired(), Email(), Length(max=160)])
-    role = SelectField("Papel", choices=[
-        ("viewer","Viewer"),
-        ("operator","Operator"),
-        ("manager","Manager"),
-        ("admin","Admin"),
-    ], default="viewer")
+    role = SelectField("Papel", choices=INVITE_ROLE_OPTIONS, default="viewer")
     days_valid = StringField("Validade (dias)", default="7")
     submit = SubmitField("Gerar convite")
 
+class InviteImportForm(FlaskForm):
+    file = FileField("Arquivo CSV (email,papel)", validators=[FileRequired()])
+    role = SelectField("Papel padrão", choices=INVITE_ROLE_OPTIONS, default="viewer")
+    days_valid = StringField("Validade (dias)", default="7")
+    submit = SubmitField("Importar convites")
+
 class AcceptInviteForm(FlaskForm):
     first_name = StringField("Nome", validators=[DataRequired(), Length(max=80)])
     last_name = StringField("Sobrenome", validators=[DataRequired(), Length(max=80)])
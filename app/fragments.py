@@ -0,0 +1,285 @@
+# app/fragments.py – cache de fragmentos HTML versionado por empresa
+#
+# A chave de cada fragmento inclui a versão da empresa; a versão (timestamp em ms,
+# sempre crescente) é incrementada após o commit de qualquer escrita em
+# Membership/Invite/Company daquela empresa, então nada precisa ser apagado.
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from .models import Company, Invite, Membership, User
+from .replicas import reading_replica
+
+log = logging.getLogger(__name__)
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class MemoryBackend:
+    """LRU por processo. Versões ficam fora do LRU (nunca são despejadas).
+
+    Só para um processo (dev, testes): o bump do commit não chega aos outros
+    workers, que serviriam fragmentos velhos até o TTL.
+    """
+
+    shared = False
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def version(self, scope):
+        with self._lock:
+            return self._versions.setdefault(scope, _now_ms())
+
+    def bump(self, scope):
+        with self._lock:
+            v = max(_now_ms(), self._versions.get(scope, 0) + 1)
+            self._versions[scope] = v
+            return v
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._versions.clear()
+
+
+class FileBackend:
+    """Arquivo SQLite compartilhado entre workers (fragmentos + versões)."""
+
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS fragments ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS fragment_versions ("
+            " scope TEXT PRIMARY KEY, v INTEGER NOT NULL) WITHOUT ROWID"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM fragments WHERE key = ? AND expires >= ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO fragments (key, value, expires) VALUES (?, ?, ?)",
+            (key, str(value), time.time() + ttl),
+        )
+        self._writes += 1
+        if self._writes % 500 == 0:
+            conn.execute("DELETE FROM fragments WHERE expires < ?", (time.time(),))
+
+    def version(self, scope):
+        conn = self._conn()
+        row = conn.execute("SELECT v FROM fragment_versions WHERE scope = ?", (scope,)).fetchone()
+        if row:
+            return row[0]
+        conn.execute(
+            "INSERT OR IGNORE INTO fragment_versions (scope, v) VALUES (?, ?)", (scope, _now_ms())
+        )
+        return conn.execute("SELECT v FROM fragment_versions WHERE scope = ?", (scope,)).fetchone()[0]
+
+    def bump(self, scope):
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO fragment_versions (scope, v) VALUES (?, ?)"
+            " ON CONFLICT (scope) DO UPDATE SET v = max(excluded.v, v + 1)",
+            (scope, _now_ms()),
+        )
+        return conn.execute("SELECT v FROM fragment_versions WHERE scope = ?", (scope,)).fetchone()[0]
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM fragments")
+        conn.execute("DELETE FROM fragment_versions")
+
+
+class FragmentCache:
+    def __init__(self):
+        self.enabled = False
+        self.ttl = 60
+        self.backend = MemoryBackend()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def init_app(self, app):
+        app.config.setdefault("FRAGMENT_CACHE_BACKEND", "file")
+        app.config.setdefault("FRAGMENT_CACHE_PATH", "fragments.db")
+        app.config.setdefault("FRAGMENT_CACHE_SIZE", 2048)
+        app.config.setdefault("FRAGMENT_CACHE_TTL", 60)
+        kind = app.config["FRAGMENT_CACHE_BACKEND"]
+        self.enabled = kind != "off"
+        self.ttl = float(app.config["FRAGMENT_CACHE_TTL"])
+        if kind == "file":
+            self.backend = FileBackend(app.config["FRAGMENT_CACHE_PATH"])
+        else:
+            self.backend = MemoryBackend(int(app.config["FRAGMENT_CACHE_SIZE"]))
+        app.extensions["fragment_cache"] = self
+
+    def version(self, company_id) -> int:
+        return self.backend.version(f"company:{company_id}")
+
+    def bump(self, company_id) -> int:
+        return self.backend.bump(f"company:{company_id}")
+
+    def user_version(self, user_id) -> int:
+        return self.backend.version(f"user:{user_id}")
+
+    @staticmethod
+    def _key(company_id, name, version, vary):
+        return ":".join([name, str(company_id), str(version), *map(str, vary)])
+
+    def cached(self, company_id, name, vary=()):
+        """HTML em cache ou None, sem renderizar (para buscar antes só os dados que faltam)."""
+        if not self.enabled:
+            return None
+        try:
+            return self.backend.get(self._key(company_id, name, self.version(company_id), vary))
+        except sqlite3.OperationalError as e:
+            self._failed(e)
+            return None
+
+    def _failed(self, e):
+        # "database is locked" etc. no arquivo do cache: a página sai sem cache, não com 500
+        self.errors += 1
+        log.warning("fragment cache indisponível (%s), renderizando sem cache", e)
+
+    def render(self, company_id, name, render, vary=(), ttl=None):
+        """Devolve o fragmento em cache ou chama `render()`.
+
+        `render` retorna o HTML ou (HTML, ttl) quando o próprio conteúdo
+        expira antes do TTL padrão (ex.: convites perto de vencer).
+        """
+        if not self.enabled:
+            out = render()
+            return Markup(out[0] if isinstance(out, tuple) else out)
+        try:
+            key = self._key(company_id, name, self.version(company_id), vary)
+            html = self.backend.get(key)
+        except sqlite3.OperationalError as e:
+            self._failed(e)
+            out = render()
+            return Markup(out[0] if isinstance(out, tuple) else out)
+        if html is not None:
+            self.hits += 1
+            return Markup(html)
+        self.misses += 1
+        out = render()
+        html, item_ttl = out if isinstance(out, tuple) else (out, None)
+        ttl = min(x for x in (ttl, item_ttl, self.ttl) if x is not None)
+        # a versão vem do store compartilhado, mas a réplica pode não ter o commit que a
+        # incrementou: HTML dela ficaria em cache sob a versão nova até o TTL
+        if ttl > 0 and not reading_replica():
+            try:
+                self.backend.set(key, str(html), ttl)
+            except sqlite3.OperationalError as e:
+                self._failed(e)
+        return Markup(html)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+            "errors": self.errors,
+        }
+
+
+fragment_cache = FragmentCache()
+
+
+def mark_changed(session, company_id=None, user_id=None):
+    """Agenda o bump das versões para depois do commit."""
+    if session is None:
+        return
+    scopes = session.info.setdefault("_changed_scopes", set())
+    if company_id is not None:
+        scopes.add(f"company:{company_id}")
+    if user_id is not None:
+        scopes.add(f"user:{user_id}")
+
+
+@event.listens_for(Membership, "after_insert")
+@event.listens_for(Membership, "after_update")
+@event.listens_for(Membership, "after_delete")
+def _membership_written(mapper, connection, target):
+    # o principal do usuário também muda (empresa ativa/papel)
+    mark_changed(object_session(target), company_id=target.company_id, user_id=target.user_id)
+
+
+@event.listens_for(Invite, "after_insert")
+@event.listens_for(Invite, "after_update")
+@event.listens_for(Invite, "after_delete")
+def _invite_written(mapper, connection, target):
+    mark_changed(object_session(target), company_id=target.company_id)
+
+
+@event.listens_for(Company, "after_update")
+@event.listens_for(Company, "after_delete")
+def _company_written(mapper, connection, target):
+    mark_changed(object_session(target), company_id=target.id)
+
+
+@event.listens_for(User, "after_update")
+def _user_written(mapper, connection, target):
+    mark_changed(object_session(target), user_id=target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session):
+    # só depois do commit: quem renderizar com a versão nova já enxerga os dados novos
+    for scope in session.info.pop("_changed_scopes", ()):
+        fragment_cache.backend.bump(scope)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("_changed_scopes", None)
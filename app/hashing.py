@@ -0,0 +1,107 @@
+# app/hashing.py – hash/verificação de senha num pool de processos limitado
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from .metrics import phase
+
+
+class HashPoolSaturated(Exception):
+    """Pool de hash cheio: a request deve falhar rápido (503) em vez de enfileirar."""
+
+
+class PasswordHasher:
+    def __init__(self):
+        self.method = "pbkdf2:sha256"
+        self.salt_length = 16
+        self.workers = 0  # 0 = roda na thread da request
+        self.max_pending = 0
+        self.timeout = 10.0
+        self._pool = None
+        self._pool_pid = None
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("PASSWORD_HASH_METHOD", self.method)
+        app.config.setdefault("PASSWORD_HASH_WORKERS", 2)
+        app.config.setdefault("PASSWORD_HASH_QUEUE", 0)
+        app.config.setdefault("PASSWORD_HASH_TIMEOUT", 10)
+        self.method = app.config["PASSWORD_HASH_METHOD"]
+        self.workers = int(app.config["PASSWORD_HASH_WORKERS"])
+        self.max_pending = int(app.config["PASSWORD_HASH_QUEUE"]) or self.workers * 4
+        self.timeout = float(app.config["PASSWORD_HASH_TIMEOUT"])
+        self.shutdown()
+
+    def _executor(self):
+        # o pool é criado sob demanda e recriado após fork (cada worker gunicorn tem o seu)
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._pool_pid = os.getpid()
+                self._inflight = 0
+            return self._pool
+
+    def _release(self, _fut=None):
+        with self._lock:
+            self._inflight -= 1
+
+    def _run(self, fn, *args):
+        with phase("hash"):
+            return self._submit(fn, *args)
+
+    def _submit(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        pool = self._executor()
+        with self._lock:
+            if self._inflight >= self.max_pending:
+                raise HashPoolSaturated()
+            self._inflight += 1
+        try:
+            fut = pool.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        fut.add_done_callback(self._release)
+        try:
+            return fut.result(timeout=self.timeout)
+        except FutureTimeout:
+            fut.cancel()
+            raise HashPoolSaturated()
+
+    def pending(self) -> int:
+        return self._inflight if self._pool_pid == os.getpid() else 0
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        try:
+            method, salt, _ = pwhash.split("$", 2)
+        except ValueError:
+            return True
+        stored = method.split(":")
+        wanted = self.method.split(":")
+        # sem iterações explícitas na config, vale o default do werkzeug
+        return stored[: len(wanted)] != wanted or len(salt) != self.salt_length
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._pool_pid = None
+
+
+hasher = PasswordHasher()
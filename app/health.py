@@ -0,0 +1,144 @@
+# app/health.py – /livez e /readyz na camada WSGI, antes de sessão, login e blueprints
+#
+# /livez (e o antigo /healthz): o processo responde; não toca em nada.
+# /readyz: 200/503 conforme o ping do primário. O corpo é só {"status": ...};
+#          com HEALTH_TOKEN configurado e enviado (Authorization: Bearer), vem
+#          também o detalhe: ping das réplicas, pool, filas, RSS e pid.
+# O ping é cacheado por HEALTH_DB_INTERVAL segundos e só uma thread o refaz:
+# probes agressivos (ou vários balanceadores) não viram carga no banco.
+import json
+import os
+import resource
+import threading
+import time
+from datetime import datetime
+
+LIVE_PATHS = ("/livez", "/healthz")
+READY_PATH = "/readyz"
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        # sem /proc (macOS): pico em vez do atual
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    out = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            out[name] = fn()
+    if "overflow" in out:
+        out["overflow"] = max(0, out["overflow"])  # QueuePool conta vagas livres como negativo
+    return out
+
+
+class DbCheck:
+    """Ping cacheado: no máximo um SELECT por intervalo, feito por uma thread só."""
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._result = None
+        self._checked_at = 0.0
+
+    def get(self, app) -> dict:
+        stale = self._result is None or time.monotonic() - self._checked_at >= self.interval
+        # com resultado anterior, quem não pega o lock devolve o cache em vez de esperar
+        if stale and self._lock.acquire(blocking=self._result is None):
+            try:
+                if self._result is None or time.monotonic() - self._checked_at >= self.interval:
+                    self._result = self._run(app)
+                    self._checked_at = time.monotonic()
+            finally:
+                self._lock.release()
+        return {**self._result, "age_s": round(time.monotonic() - self._checked_at, 1)}
+
+    def _run(self, app) -> dict:
+        from . import db
+        from .mailer import backlog_query
+
+        out = {"engines": {}, "queues": {}}
+        with app.app_context():
+            for name, engine in db.engines.items():
+                key = name or "primary"
+                t0 = time.perf_counter()
+                try:
+                    with engine.connect() as conn:
+                        conn.exec_driver_sql("SELECT 1")
+                        if name is None:
+                            # backlog da outbox: contagem pelo índice ix_outbox_due
+                            out["queues"]["outbox_due"] = conn.execute(
+                                backlog_query(datetime.utcnow())).scalar_one()
+                    out["engines"][key] = {"ok": True, "latency_ms": round((time.perf_counter() - t0) * 1000, 2)}
+                except Exception as e:  # noqa: BLE001 – qualquer falha deixa o worker "not ready"
+                    out["engines"][key] = {"ok": False, "error": f"{type(e).__name__}: {e}".splitlines()[0][:300]}
+        out["ok"] = out["engines"].get("primary", {}).get("ok", False)
+        return out
+
+
+db_check = DbCheck()
+
+
+def readiness(app) -> dict:
+    from . import db
+    from .hashing import hasher
+    from .sqlite_profile import write_queue
+
+    check = db_check.get(app)
+    with app.app_context():
+        pools = {name or "primary": pool_stats(engine) for name, engine in db.engines.items()}
+    return {
+        "status": "ok" if check["ok"] else "fail",
+        "db": {"age_s": check["age_s"], **check["engines"]},
+        "pool": pools,
+        "queues": {
+            **check["queues"],
+            "password_hash_pending": hasher.pending(),
+            "sqlite_write_queue_waiting": write_queue.waiting,  # agora, não acumulado
+        },
+        "rss_mb": round(rss_mb(), 1),
+        "pid": os.getpid(),
+    }
+
+
+class HealthMiddleware:
+    def __init__(self, wsgi_app, app):
+        self.wsgi_app = wsgi_app
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if path in LIVE_PATHS:
+            return self._send(start_response, "200 OK", b"ok", "text/plain")
+        if path == READY_PATH:
+            token = self.app.config["HEALTH_TOKEN"]
+            if token and environ.get("HTTP_AUTHORIZATION") == f"Bearer {token}":
+                report = readiness(self.app)
+            else:
+                # anônimo (ou sem HEALTH_TOKEN): só o veredito, sem pool/pid/erro do banco
+                report = {"status": "ok" if db_check.get(self.app)["ok"] else "fail"}
+            status = "200 OK" if report["status"] == "ok" else "503 Service Unavailable"
+            return self._send(start_response, status, json.dumps(report).encode(), "application/json")
+        return self.wsgi_app(environ, start_response)
+
+    @staticmethod
+    def _send(start_response, status, body, content_type):
+        start_response(status, [
+            ("Content-Type", content_type),
+            ("Content-Length", str(len(body))),
+            ("Cache-Control", "no-store"),
+        ])
+        return [body]
+
+
+def init_app(app):
+    app.config.setdefault("HEALTH_DB_INTERVAL", 5)
+    app.config.setdefault("HEALTH_TOKEN", "")
+    db_check.interval = float(app.config["HEALTH_DB_INTERVAL"])
+    app.wsgi_app = HealthMiddleware(app.wsgi_app, app)
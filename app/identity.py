@@ -0,0 +1,89 @@
+# app/identity.py – cache LRU+TTL por worker para o user_loader do Flask-Login
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+
+class IdentityCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # user_id -> (expira_em, versão, snapshot)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id: int, version=None):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return None
+        with self._lock:
+            item = self._data.get(user_id)
+            if item is None or item[0] < time.monotonic() or (
+                version is not None and item[1] != version
+            ):
+                self.misses += 1
+                return None
+            self._data.move_to_end(user_id)
+            self.hits += 1
+            return item[2]
+
+    def set(self, user_id: int, version, snapshot: dict):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, version, snapshot)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        if user_id is None:
+            return
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+        }
+
+
+identity_cache = IdentityCache()
+
+
+def snapshot(obj) -> dict:
+    return {attr.key: getattr(obj, attr.key) for attr in sa_inspect(obj).mapper.column_attrs}
+
+
+def restore(session, model, data: dict):
+    # reconstrói a instância sem consultar o banco e a anexa à sessão atual
+    obj = model(**data)
+    make_transient_to_detached(obj)
+    return session.merge(obj, load=False)
+
+
+def parse_user_id(value):
+    """Aceita "id:versão" (sessões novas) ou só "id" (sessões antigas)."""
+    uid, _, version = str(value).partition(":")
+    return int(uid), (version or None)
+
+
+def init_app(app):
+    app.config.setdefault("IDENTITY_CACHE_SIZE", 1024)
+    app.config.setdefault("IDENTITY_CACHE_TTL", 60)
+    identity_cache.maxsize = int(app.config["IDENTITY_CACHE_SIZE"])
+    identity_cache.ttl = float(app.config["IDENTITY_CACHE_TTL"])
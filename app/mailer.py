@@ -0,0 +1,418 @@
+# app/mailer.py – entrega dos e-mails da outbox fora do caminho da request
+#
+# A request só grava a linha em `outbox` (mesma transação do convite). A entrega
+# roda em `flask outbox deliver` ou numa thread por worker (OUTBOX_INTERVAL > 0):
+# reserva um lote com lease, envia pela conexão SMTP reaproveitada e grava o
+# status de cada mensagem logo após o envio, só se a reserva ainda é deste
+# worker (claim_token); falhas temporárias voltam para a fila com backoff exponencial.
+import logging
+import os
+import pathlib
+import random
+import smtplib
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import make_msgid
+
+import click
+from flask import current_app, render_template, url_for
+from flask.cli import AppGroup
+from sqlalchemy import and_, delete, event, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from . import db
+from .models import OutboxMessage
+
+log = logging.getLogger(__name__)
+
+SUBJECTS = {
+    "invite": "Convite para {company} no App Zero",
+}
+
+
+# =========================
+# Enfileirar (dentro da transação da request)
+# =========================
+def invite_payload(company, token: str, role: str, expires_at) -> dict:
+    return {
+        "company": company.trade_name or company.legal_name,
+        "role": role,
+        "expires_at": expires_at.strftime("%d/%m/%Y %H:%M"),
+        "accept_url": url_for("web_auth.accept_invite", token=token, _external=True),
+    }
+
+
+def enqueue(kind: str, recipient: str, payload: dict, ref_id=None):
+    """Adiciona a mensagem à sessão atual; vai junto no próximo commit."""
+    msg = OutboxMessage(kind=kind, recipient=recipient, payload=payload, ref_id=ref_id)
+    db.session.add(msg)
+    db.session.info["_outbox"] = True
+    return msg
+
+
+def enqueue_many(kind: str, messages):
+    """Versão executemany para o import em lote: [(destinatário, payload, ref_id)]."""
+    now = datetime.utcnow()
+    rows = [
+        {"kind": kind, "recipient": r, "payload": p, "ref_id": ref, "status": "pending",
+         "attempts": 0, "next_attempt_at": now, "created_at": now}
+        for r, p, ref in messages
+    ]
+    if rows:
+        db.session.execute(insert(OutboxMessage), rows)
+        db.session.info["_outbox"] = True
+
+
+# =========================
+# Backends de envio
+# =========================
+class PermanentFailure(Exception):
+    """Servidor recusou de vez (5xx): não adianta tentar de novo."""
+
+
+class SMTPBackend:
+    """Uma conexão SMTP reaproveitada entre mensagens e lotes (reconecta se cair)."""
+
+    def __init__(self, host, port=25, username=None, password=None, use_tls=False, timeout=10.0,
+                 idle_check=30.0):
+        self.host, self.port = host, int(port)
+        self.username, self.password = username, password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self._conn = None
+        self._last_used = 0.0
+
+    def _connection(self):
+        if self._conn is not None and time.monotonic() - self._last_used > self.idle_check:
+            try:
+                self._conn.noop()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._conn is None:
+            conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                conn.starttls()
+            if self.username:
+                conn.login(self.username, self.password or "")
+            self._conn = conn
+        return self._conn
+
+    def send(self, msg: EmailMessage):
+        try:
+            try:
+                self._connection().send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self.close()
+                self._connection().send_message(msg)  # conexão velha: uma nova tentativa
+        except smtplib.SMTPRecipientsRefused as e:
+            raise PermanentFailure(str(e)) from e
+        except smtplib.SMTPResponseException as e:
+            if 500 <= e.smtp_code < 600:
+                raise PermanentFailure(f"{e.smtp_code} {e.smtp_error!r}") from e
+            raise
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._conn = None
+
+
+class FileBackend:
+    """Grava cada mensagem como .eml num diretório (dev/testes)."""
+
+    def __init__(self, path: str):
+        self.root = pathlib.Path(path)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def send(self, msg: EmailMessage):
+        name = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.eml"
+        (self.root / name).write_bytes(msg.as_bytes())
+
+    def close(self):
+        pass
+
+
+class NullBackend:
+    def send(self, msg: EmailMessage):
+        log.info("mail (null): %s -> %s", msg["Subject"], msg["To"])
+
+    def close(self):
+        pass
+
+
+def make_backend(app):
+    kind = app.config["MAIL_BACKEND"]
+    if kind == "smtp":
+        return SMTPBackend(
+            app.config["MAIL_SERVER"], app.config["MAIL_PORT"],
+            app.config["MAIL_USERNAME"], app.config["MAIL_PASSWORD"],
+            use_tls=app.config["MAIL_USE_TLS"], timeout=float(app.config["MAIL_TIMEOUT"]),
+        )
+    if kind == "file":
+        return FileBackend(app.config["MAIL_FILE_PATH"])
+    return NullBackend()
+
+
+# =========================
+# Entrega
+# =========================
+def _due(now):
+    # pendentes no horário ou reservas cujo lease venceu (worker morreu no meio)
+    return or_(
+        and_(OutboxMessage.status == "pending", OutboxMessage.next_attempt_at <= now),
+        and_(OutboxMessage.status == "sending", OutboxMessage.locked_until < now),
+    )
+
+
+def claim_query(now, limit: int):
+    return select(OutboxMessage.id).where(_due(now)).order_by(OutboxMessage.next_attempt_at).limit(limit)
+
+
+def backlog_query(now):
+    return select(func.count()).select_from(OutboxMessage).where(_due(now))
+
+
+def claim(batch_size: int, lease: float, now=None):
+    """Reserva um lote (um UPDATE atômico): (token da reserva, linhas desanexadas da sessão)."""
+    now = now or datetime.utcnow()
+    token = uuid.uuid4().hex
+    ids = claim_query(now, batch_size).scalar_subquery()
+    rows = db.session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(ids), _due(now))
+        .values(status="sending", locked_until=now + timedelta(seconds=lease),
+                attempts=OutboxMessage.attempts + 1, claim_token=token)
+        .returning(OutboxMessage.id, OutboxMessage.kind, OutboxMessage.recipient,
+                   OutboxMessage.payload, OutboxMessage.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return token, rows
+
+
+def _finish(row_id: int, token: str, **values) -> bool:
+    """Grava o resultado se a reserva ainda é nossa; False = lease venceu e outro worker pegou."""
+    n = db.session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id == row_id, OutboxMessage.status == "sending",
+               OutboxMessage.claim_token == token)
+        .values(locked_until=None, claim_token=None, **values)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return n == 1
+
+
+def build_message(row, sender: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = sender
+    msg["To"] = row.recipient
+    msg["Subject"] = SUBJECTS.get(row.kind, "App Zero").format(**row.payload)
+    msg["Message-ID"] = make_msgid(idstring=f"outbox-{row.id}")
+    msg.set_content(render_template(f"email/{row.kind}.txt", **row.payload))
+    return msg
+
+
+def backoff(attempts: int, base: float, cap: float = 3600.0) -> float:
+    # exponencial com jitter: base, 2*base, 4*base... até `cap`
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def deliver_batch(backend, batch_size: int = 50, lease: float = 120.0, max_attempts: int = 8,
+                  backoff_base: float = 30.0, now=None) -> dict:
+    """Entrega um lote; devolve contadores {sent, retry, failed, lost}.
+
+    O status de cada mensagem é gravado logo após o envio. Se a reserva venceu
+    no meio do lote (lost), o resto fica para quem a pegou.
+    """
+    token, rows = claim(batch_size, lease, now)
+    out = {"sent": 0, "retry": 0, "failed": 0, "lost": 0}
+    sender = current_app.config["MAIL_FROM"]
+    for row in rows:
+        try:
+            backend.send(build_message(row, sender))
+            result, values = "sent", {"status": "sent", "sent_at": datetime.utcnow(), "last_error": None}
+        except Exception as e:
+            permanent = isinstance(e, PermanentFailure)
+            if not permanent:  # rede/timeout/4xx: tenta de novo mais tarde
+                log.warning("outbox %s: %s", row.id, e)
+            give_up = permanent or row.attempts >= max_attempts
+            result = "failed" if give_up else "retry"
+            values = {
+                "status": "failed" if give_up else "pending",
+                "next_attempt_at": datetime.utcnow() + timedelta(seconds=backoff(row.attempts, backoff_base)),
+                "last_error": (str(e) if permanent else f"{type(e).__name__}: {e}")[:1000],
+            }
+        if not _finish(row.id, token, **values):
+            log.warning("outbox %s: reserva perdida (lease de %ss venceu), lote interrompido", row.id, lease)
+            out["lost"] += 1
+            break
+        out[result] += 1
+    return out
+
+
+def _deliver_kwargs(app):
+    batch_size = int(app.config["OUTBOX_BATCH"])
+    return {
+        "batch_size": batch_size,
+        # o lease cobre o pior caso do lote: todo envio esgotando o timeout do SMTP
+        "lease": max(float(app.config["OUTBOX_LEASE"]), batch_size * float(app.config["MAIL_TIMEOUT"]) + 30),
+        "max_attempts": int(app.config["OUTBOX_MAX_ATTEMPTS"]),
+        "backoff_base": float(app.config["OUTBOX_BACKOFF"]),
+    }
+
+
+def drain(app, backend, max_batches=None) -> dict:
+    """Entrega lotes até a fila (do momento) esvaziar."""
+    total = {"sent": 0, "retry": 0, "failed": 0, "lost": 0, "batches": 0}
+    while max_batches is None or total["batches"] < max_batches:
+        res = deliver_batch(backend, **_deliver_kwargs(app))
+        if not any(res.values()):
+            break
+        total["batches"] += 1
+        for k, v in res.items():
+            total[k] += v
+    return total
+
+
+def stats() -> dict:
+    rows = db.session.execute(
+        select(OutboxMessage.status, func.count()).group_by(OutboxMessage.status)
+    ).all()
+    return dict(rows)
+
+
+def purge_sent(days: int) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    n = db.session.execute(
+        delete(OutboxMessage).where(OutboxMessage.status == "sent", OutboxMessage.sent_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return n
+
+
+class _Worker:
+    """Thread de entrega por worker; acorda no intervalo ou logo após um commit com e-mail."""
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def ensure_started(self, app):
+        interval = float(app.config["OUTBOX_INTERVAL"])
+        if interval <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake = threading.Event()
+            t = threading.Thread(target=self._loop, args=(app, interval), name="outbox-worker", daemon=True)
+            t.start()
+
+    def _loop(self, app, interval):
+        backend = make_backend(app)
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                with app.app_context():
+                    res = drain(app, backend)
+                    db.session.remove()
+                if res["batches"]:
+                    log.info("outbox: %s", res)
+            except Exception:
+                log.exception("entrega da outbox falhou")
+                backend.close()
+
+
+worker = _Worker()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session):
+    if session.info.pop("_outbox", False):
+        worker.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("_outbox", None)
+
+
+# =========================
+# CLI
+# =========================
+outbox_cli = AppGroup("outbox", help="Fila de e-mails (outbox).")
+
+
+@outbox_cli.command("deliver")
+@click.option("--once", is_flag=True, help="Esvazia a fila e sai (padrão: fica em loop).")
+@click.option("--interval", type=float, default=None, help="Intervalo entre varreduras (s).")
+def deliver_command(once, interval):
+    """Entrega os e-mails pendentes da outbox."""
+    app = current_app._get_current_object()
+    interval = interval if interval is not None else float(app.config["OUTBOX_INTERVAL"]) or 5.0
+    backend = make_backend(app)
+    try:
+        while True:
+            res = drain(app, backend)
+            db.session.remove()
+            if res["batches"] or once:
+                click.echo(f"{res['sent']} enviados, {res['retry']} para nova tentativa, {res['failed']} falharam.")
+            if once:
+                return
+            time.sleep(interval)
+    finally:
+        backend.close()
+
+
+@outbox_cli.command("status")
+def status_command():
+    """Quantidade de mensagens por status."""
+    for status, n in sorted(stats().items()):
+        click.echo(f"{status}: {n}")
+
+
+@outbox_cli.command("purge")
+@click.option("--days", type=int, default=7, help="Remove enviados há mais de N dias.")
+def purge_command(days):
+    """Apaga mensagens já entregues."""
+    click.echo(f"{purge_sent(days)} mensagens removidas.")
+
+
+def init_app(app):
+    app.config.setdefault("MAIL_BACKEND", "null")
+    app.config.setdefault("MAIL_SERVER", "localhost")
+    app.config.setdefault("MAIL_PORT", 25)
+    app.config.setdefault("MAIL_USERNAME", None)
+    app.config.setdefault("MAIL_PASSWORD", None)
+    app.config.setdefault("MAIL_USE_TLS", False)
+    app.config.setdefault("MAIL_TIMEOUT", 10)
+    app.config.setdefault("MAIL_FROM", "App Zero <no-reply@localhost>")
+    app.config.setdefault("MAIL_FILE_PATH", "mail")
+    app.config.setdefault("OUTBOX_INTERVAL", 0)
+    app.config.setdefault("OUTBOX_BATCH", 50)
+    app.config.setdefault("OUTBOX_LEASE", 120)
+    app.config.setdefault("OUTBOX_MAX_ATTEMPTS", 8)
+    app.config.setdefault("OUTBOX_BACKOFF", 30)
+    app.cli.add_command(outbox_cli)
+
+    if float(app.config["OUTBOX_INTERVAL"]) > 0:
+        # como o sweeper: a thread sobe na primeira request de cada worker
+        @app.before_request
+        def _start_outbox_worker():
+            worker.ensure_started(app)
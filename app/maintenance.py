@@ -0,0 +1,135 @@
+# app/maintenance.py – varredura de convites expirados/aceitos para invites_archive
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, delete, insert, or_, select
+
+from . import db
+from .models import Invite, InviteArchive
+
+log = logging.getLogger(__name__)
+
+
+def _sweepable(now, accepted_days: int):
+    return or_(
+        and_(Invite.accepted_at.is_(None), Invite.expires_at <= now),
+        Invite.accepted_at <= now - timedelta(days=accepted_days),
+    )
+
+
+def sweep_invites(batch_size: int = 500, pause: float = 0.05, accepted_days: int = 30,
+                  max_batches=None, now=None) -> dict:
+    """Move convites para o arquivo em lotes pequenos (uma transação por lote)."""
+    now = now or datetime.utcnow()
+    cols = [
+        Invite.id, Invite.company_id, Invite.email, Invite.role, Invite.token,
+        Invite.expires_at, Invite.accepted_at, Invite.created_at,
+    ]
+    moved = {"expired": 0, "accepted": 0, "batches": 0}
+    while max_batches is None or moved["batches"] < max_batches:
+        ids = db.session.execute(
+            select(Invite.id).where(_sweepable(now, accepted_days)).order_by(Invite.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        # DELETE ... RETURNING é o claim: com dois sweepers no mesmo lote, cada linha
+        # volta para um só, e só o que este DELETE removeu vai para o arquivo
+        claimed = db.session.execute(
+            delete(Invite).where(Invite.id.in_(ids)).returning(*cols),
+            execution_options={"synchronize_session": False},
+        ).all()
+        if claimed:
+            db.session.execute(insert(InviteArchive), [
+                {**row._asdict(), "archived_at": now,
+                 "reason": "accepted" if row.accepted_at is not None else "expired"}
+                for row in claimed
+            ])
+        db.session.commit()
+        accepted = sum(1 for row in claimed if row.accepted_at is not None)
+        moved["accepted"] += accepted
+        moved["expired"] += len(claimed) - accepted
+        moved["batches"] += 1
+        if pause:
+            time.sleep(pause)  # deixa os writers das requests passarem entre lotes
+    return moved
+
+
+class _Scheduler:
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self, app):
+        interval = float(app.config["INVITE_SWEEP_INTERVAL"])
+        if interval <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            t = threading.Thread(target=self._loop, args=(app, interval), name="invite-sweeper", daemon=True)
+            t.start()
+
+    def _loop(self, app, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                with app.app_context():
+                    moved = sweep_invites(**_sweep_kwargs(app))
+                    db.session.remove()
+                if moved["batches"]:
+                    log.info("invite sweep: %s", moved)
+            except Exception:
+                log.exception("invite sweep falhou")
+
+
+scheduler = _Scheduler()
+
+
+def _sweep_kwargs(app):
+    return {
+        "batch_size": int(app.config["INVITE_SWEEP_BATCH"]),
+        "pause": float(app.config["INVITE_SWEEP_PAUSE"]),
+        "accepted_days": int(app.config["INVITE_ARCHIVE_ACCEPTED_DAYS"]),
+    }
+
+
+@click.command("sweep-invites")
+@click.option("--batch-size", type=int, default=None, help="Convites por transação.")
+@click.option("--pause", type=float, default=None, help="Pausa entre lotes (s).")
+@click.option("--accepted-days", type=int, default=None, help="Arquiva aceitos há mais de N dias.")
+@click.option("--max-batches", type=int, default=None)
+@with_appcontext
+def sweep_invites_command(batch_size, pause, accepted_days, max_batches):
+    """Arquiva convites expirados, revogados e aceitos antigos."""
+    kwargs = _sweep_kwargs(current_app)
+    if batch_size is not None:
+        kwargs["batch_size"] = batch_size
+    if pause is not None:
+        kwargs["pause"] = pause
+    if accepted_days is not None:
+        kwargs["accepted_days"] = accepted_days
+    moved = sweep_invites(max_batches=max_batches, **kwargs)
+    click.echo(
+        f"{moved['expired']} expirados e {moved['accepted']} aceitos arquivados em {moved['batches']} lotes."
+    )
+
+
+def init_app(app):
+    app.config.setdefault("INVITE_SWEEP_INTERVAL", 0)
+    app.config.setdefault("INVITE_SWEEP_BATCH", 500)
+    app.config.setdefault("INVITE_SWEEP_PAUSE", 0.05)
+    app.config.setdefault("INVITE_ARCHIVE_ACCEPTED_DAYS", 30)
+    app.cli.add_command(sweep_invites_command)
+
+    if float(app.config["INVITE_SWEEP_INTERVAL"]) > 0:
+        # a thread sobe no primeiro request de cada worker (sobrevive ao preload/fork)
+        @app.before_request
+        def _start_invite_sweeper():
+            scheduler.ensure_started(app)
@@ -0,0 +1,259 @@
+# app/metrics.py – latência por endpoint, SQL/templates/hash por request, Server-Timing e /metrics
+#
+# Cada request dos blueprints em METRICS_BLUEPRINTS acumula em `g` o tempo de
+# cada fase (db, template, hash, user loader); no fim vira header Server-Timing
+# (SERVER_TIMING=1, só para usuário logado ou com o METRICS_TOKEN) e entra nos
+# histogramas do worker. As fases se sobrepõem: queries disparadas
+# pelo user loader ou durante o render contam também em "db". /metrics (METRICS_ENDPOINT=1) expõe tudo em formato Prometheus.
+# Os números são por processo: com N workers, o Prometheus deve raspar cada um
+# (ou somar por `instance`).
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Response, abort, current_app, g, has_request_context, request, template_rendered
+from flask import before_render_template
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# fases fora do Server-Timing nessas rotas: o hash só roda quando o e-mail tem
+# conta, então a fase diria a qualquer um quais e-mails estão cadastrados
+HIDDEN_PHASES = {"web_auth.login": {"hash"}, "web_auth.accept_invite": {"hash"}}
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}  # (endpoint, método) -> [contagens por bucket..., +Inf, soma_ms]
+        self.statuses = {}  # (endpoint, método, status) -> n
+        self.phases = {}    # (endpoint, fase) -> soma_ms
+        self.statements = {}  # endpoint -> total de statements SQL
+
+    def observe(self, endpoint, method, status, total_ms, phases, statements):
+        with self._lock:
+            hist = self.requests.get((endpoint, method))
+            if hist is None:
+                hist = self.requests[(endpoint, method)] = [0] * (len(BUCKETS_MS) + 2)
+            for i, le in enumerate(BUCKETS_MS):
+                if total_ms <= le:
+                    hist[i] += 1
+                    break
+            else:
+                hist[len(BUCKETS_MS)] += 1
+            hist[-1] += total_ms
+            key = (endpoint, method, status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            for phase, ms in phases.items():
+                self.phases[(endpoint, phase)] = self.phases.get((endpoint, phase), 0.0) + ms
+            self.statements[endpoint] = self.statements.get(endpoint, 0) + statements
+
+    def snapshot(self):
+        with self._lock:
+            return (
+                {k: list(v) for k, v in self.requests.items()},
+                dict(self.statuses), dict(self.phases), dict(self.statements),
+            )
+
+    def clear(self):
+        with self._lock:
+            self.requests.clear()
+            self.statuses.clear()
+            self.phases.clear()
+            self.statements.clear()
+
+
+registry = Registry()
+
+
+def _current():
+    if not has_request_context():
+        return None
+    return g.get("_metrics")
+
+
+@contextmanager
+def phase(name: str):
+    """Soma o tempo do bloco à fase `name` da request atual (sem request: no-op)."""
+    m = _current()
+    if m is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        m["phases"][name] = m["phases"].get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+
+def timed(name: str):
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+# --- SQL: todos os engines (primário e réplicas) ---
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current() is not None:
+        conn.info.setdefault("_metrics_t0", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    m = _current()
+    stack = conn.info.get("_metrics_t0")
+    if m is None or not stack:
+        return
+    m["phases"]["db"] = m["phases"].get("db", 0.0) + (time.perf_counter() - stack.pop()) * 1000
+    m["statements"] += 1
+
+
+# --- templates: só o render mais externo conta (fragmentos aninhados já estão dentro) ---
+def _before_render(sender, template, context, **extra):
+    m = _current()
+    if m is not None:
+        m["tpl_stack"].append(time.perf_counter())
+
+
+def _rendered(sender, template, context, **extra):
+    m = _current()
+    if m is None or not m["tpl_stack"]:
+        return
+    t0 = m["tpl_stack"].pop()
+    if not m["tpl_stack"]:
+        m["phases"]["template"] = m["phases"].get("template", 0.0) + (time.perf_counter() - t0) * 1000
+
+
+def _start():
+    if request.blueprint not in current_app.config["METRICS_BLUEPRINTS"]:
+        return
+    g._metrics = {"t0": time.perf_counter(), "phases": {}, "statements": 0, "tpl_stack": []}
+
+
+def _timing_allowed() -> bool:
+    # só para usuário logado ou quem traz o METRICS_TOKEN; anônimos não veem tempos
+    token = current_app.config["METRICS_TOKEN"]
+    if token and request.headers.get("Authorization") == f"Bearer {token}":
+        return True
+    return current_user.is_authenticated
+
+
+def _finish(response):
+    m = g.pop("_metrics", None)
+    if m is None:
+        return response
+    total_ms = (time.perf_counter() - m["t0"]) * 1000
+    endpoint = request.endpoint or "unknown"
+    registry.observe(endpoint, request.method, response.status_code, total_ms, m["phases"], m["statements"])
+    if current_app.config["SERVER_TIMING"] and _timing_allowed():
+        hidden = HIDDEN_PHASES.get(endpoint, ())
+        parts = [f'{name};dur={ms:.1f}' for name, ms in m["phases"].items() if name not in hidden]
+        parts.append(f'sql;desc="{m["statements"]} statements"')
+        parts.append(f"total;dur={total_ms:.1f}")
+        response.headers.add("Server-Timing", ", ".join(parts))
+    return response
+
+
+# --- exposição ---
+def _esc(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**kw) -> str:
+    return "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in kw.items()) + "}"
+
+
+def _gauges():
+    # estatísticas que os outros módulos já mantêm
+    from .fragments import fragment_cache
+    from .hashing import hasher
+    from .identity import identity_cache
+    from .ratelimit import limiter
+    from .sqlite_profile import write_queue
+
+    out = [
+        ("app_password_hash_pending", "gauge", {}, hasher.pending()),
+        ("app_sqlite_write_queue_waiting", "gauge", {}, write_queue.waiting),
+        ("app_sqlite_write_queue_waits_total", "counter", {}, write_queue.waits),
+        ("app_sqlite_write_queue_timeouts_total", "counter", {}, write_queue.timeouts),
+    ]
+    for name, value in identity_cache.stats().items():
+        out.append((f"app_identity_cache_{name}", "gauge", {}, value))
+    for name, value in fragment_cache.stats().items():
+        out.append((f"app_fragment_cache_{name}", "gauge", {}, value))
+    for rule, s in limiter.stats().items():
+        out.append(("app_ratelimit_allowed_total", "counter", {"rule": rule}, s["allowed"]))
+        out.append(("app_ratelimit_rejected_total", "counter", {"rule": rule}, s["rejected"]))
+        out.append(("app_ratelimit_errors_total", "counter", {"rule": rule}, s["errors"]))
+    return out
+
+
+def render_prometheus() -> str:
+    requests_, statuses, phases, statements = registry.snapshot()
+    lines = [
+        "# HELP app_request_duration_seconds Latência das requests por endpoint.",
+        "# TYPE app_request_duration_seconds histogram",
+    ]
+    for (endpoint, method), hist in sorted(requests_.items()):
+        cumulative = 0
+        for le, n in zip(BUCKETS_MS, hist):
+            cumulative += n
+            lines.append(f"app_request_duration_seconds_bucket"
+                         f"{_labels(endpoint=endpoint, method=method, le=le / 1000)} {cumulative}")
+        count = cumulative + hist[len(BUCKETS_MS)]
+        lines.append(f"app_request_duration_seconds_bucket"
+                     f"{_labels(endpoint=endpoint, method=method, le='+Inf')} {count}")
+        lines.append(f"app_request_duration_seconds_sum{_labels(endpoint=endpoint, method=method)} "
+                     f"{hist[-1] / 1000:.6f}")
+        lines.append(f"app_request_duration_seconds_count{_labels(endpoint=endpoint, method=method)} {count}")
+
+    lines += ["# TYPE app_requests_total counter"]
+    for (endpoint, method, status), n in sorted(statuses.items()):
+        lines.append(f"app_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {n}")
+
+    lines += ["# HELP app_request_phase_seconds_total Tempo gasto em cada fase (db, template, hash, user_loader).",
+              "# TYPE app_request_phase_seconds_total counter"]
+    for (endpoint, name), ms in sorted(phases.items()):
+        lines.append(f"app_request_phase_seconds_total{_labels(endpoint=endpoint, phase=name)} {ms / 1000:.6f}")
+
+    lines += ["# TYPE app_sql_statements_total counter"]
+    for endpoint, n in sorted(statements.items()):
+        lines.append(f"app_sql_statements_total{_labels(endpoint=endpoint)} {n}")
+
+    seen = set()
+    for name, kind, labels, value in _gauges():
+        if name not in seen:
+            lines.append(f"# TYPE {name} {kind}")
+            seen.add(name)
+        lines.append(f"{name}{_labels(**labels) if labels else ''} {float(value):g}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view():
+    token = current_app.config["METRICS_TOKEN"]
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        abort(401)
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app):
+    app.config.setdefault("METRICS_ENABLED", True)
+    app.config.setdefault("METRICS_BLUEPRINTS", ("web_auth", "api"))
+    app.config.setdefault("SERVER_TIMING", False)
+    app.config.setdefault("METRICS_ENDPOINT", False)
+    app.config.setdefault("METRICS_TOKEN", "")
+    if not app.config["METRICS_ENABLED"]:
+        return
+    app.before_request(_start)
+    app.after_request(_finish)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+    if app.config["METRICS_ENDPOINT"]:
+        app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -1,12 +1,14 @@
 # app/models.py
 from datetime import datetime, timedelta
+from hashlib import sha256
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import UniqueConstraint, Index
-from secrets import token_urlsafe
+from sqlalchemy import UniqueConstraint, Index, event
+from secrets import token_hex, token_urlsafe
 from . import db
+from .identity import identity_cache
+from .hashing import hasher
 
-ROLE_CHOICES = ("owner", "admin", "manager", "operator", "viewer")
+from .rbac import ROLE_CHOICES  # noqa: F401 – papéis definidos em app/rbac.py
 
 class Company(db.Model):
     __tablename__ = "companies"
@@ -37,14 +39,37 @@ class User(UserMixin, db.Model):
     tz = db.Column(db.String(64), default="America/Sao_Paulo")
     locale = db.Column(db.String(8), default="pt-BR")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # versão das sessões; trocada só quando a senha muda (NULL: contas antigas, deriva do hash)
+    session_key = db.Column(db.String(16))
 
     memberships = db.relationship("Membership", backref="user", lazy="dynamic")
 
-    def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password, method="pbkdf2:sha256", salt_length=16)
+    def set_password(self, password: str, rehash: bool = False):
+        # rehash (mesma senha, parâmetros novos): as sessões abertas continuam válidas
+        self.session_key = self.session_version if rehash else token_hex(6)
+        self.password_hash = hasher.hash(password)
+        identity_cache.invalidate(self.id)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        return hasher.needs_rehash(self.password_hash)
+
+    @property
+    def session_version(self) -> str:
+        # muda quando a senha muda; invalida sessões e entradas antigas do cache
+        if self.session_key:
+            return self.session_key
+        return sha256((self.password_hash or "").encode()).hexdigest()[:12]
+
+    def get_id(self):
+        return f"{self.id}:{self.session_version}"
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_written(mapper, connection, target):
+    identity_cache.invalidate(target.id)
 
 class Membership(db.Model):
     __tablename__ = "memberships"
@@ -60,6 +85,9 @@ class Membership(db.Model):
     __table_args__ = (
         UniqueConstraint("user_id", "company_id", name="uq_user_company"),
         Index("ix_memberships_company", "company_id"),
+        # vínculos ativos do usuário (principal) e roster paginado por (joined_at, id)
+        Index("ix_memberships_user_active", "user_id", "is_active"),
+        Index("ix_memberships_roster", "company_id", "is_active", "joined_at"),
     )
 
 class Invite(db.Model):
@@ -75,8 +103,38 @@ class Invite(db.Model):
 
     company = db.relationship("Company")
 
+    __table_args__ = (
+        # parciais: só convites pendentes / só aceitos
+        Index("ix_invites_pending", "company_id", "expires_at",
+              sqlite_where=db.text("accepted_at IS NULL"),
+              postgresql_where=db.text("accepted_at IS NULL")),
+        Index("ix_invites_used", "company_id", "accepted_at",
+              sqlite_where=db.text("accepted_at IS NOT NULL"),
+              postgresql_where=db.text("accepted_at IS NOT NULL")),
+        # keyset da API (/api/v1/invites) por (company_id, id), qualquer status
+        Index("ix_invites_company", "company_id", "id"),
+        # AUTOINCREMENT: id de convite arquivado nunca volta (o arquivo usa o mesmo id)
+        {"sqlite_autoincrement": True},
+    )
+
     @staticmethod
-    def new(company_id: int, email: str, role: str = "viewer", days_valid: int = 7):
+    def pending_query(company_id: int, now=None):
+        return Invite.query.filter(
+            Invite.company_id == company_id,
+            Invite.accepted_at.is_(None),
+            Invite.expires_at > (now or datetime.utcnow()),
+        )
+
+    @staticmethod
+    def used_query(company_id: int):
+        return Invite.query.filter(
+            Invite.company_id == company_id,
+            Invite.accepted_at.isnot(None),
+        ).order_by(Invite.accepted_at.desc())
+
+    @staticmethod
+    def new(company_id: int, email: str, role: str = "viewer", days_valid: int = 7, commit: bool = True):
+        # commit=False: só flush, para gravar outras linhas (ex.: outbox) na mesma transação
         inv = Invite(
             company_id=company_id,
             email=email.strip().lower(),
@@ -85,5 +143,48 @@ class Invite(db.Model):
             expires_at=datetime.utcnow() + timedelta(days=days_valid),
         )
         db.session.add(inv)
-        db.session.commit()
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
         return inv
+
+class InviteArchive(db.Model):
+    # convites expirados/aceitos antigos saem de "invites" para cá (ver maintenance.py)
+    __tablename__ = "invites_archive"
+    # mesmo id do convite original (invites é AUTOINCREMENT: o id não volta a ser usado)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    company_id = db.Column(db.Integer, nullable=False)
+    email = db.Column(db.String(160), nullable=False)
+    role = db.Column(db.String(16))
+    token = db.Column(db.String(64), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    accepted_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    reason = db.Column(db.String(16))  # expired/accepted
+
+    __table_args__ = (
+        Index("ix_invites_archive_company", "company_id"),
+    )
+
+class OutboxMessage(db.Model):
+    # e-mails gravados na mesma transação do negócio; entregues por mailer.py
+    __tablename__ = "outbox"
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)               # template: email/<kind>.txt
+    recipient = db.Column(db.String(160), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    ref_id = db.Column(db.Integer)                                # ex.: id do convite
+    status = db.Column(db.String(16), nullable=False, default="pending")  # pending/sending/sent/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)                         # lease do worker que reservou
+    claim_token = db.Column(db.String(32))                        # de qual claim() é a reserva
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        Index("ix_outbox_due", "status", "next_attempt_at"),
+    )
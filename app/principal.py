@@ -0,0 +1,134 @@
+# app/principal.py – principal por request (vínculos + papéis) com cache opcional
+import threading
+import time
+
+from flask import g
+from flask_login import current_user
+from sqlalchemy import event, select
+
+from . import db
+from .models import Company, Membership
+from .rbac import ROLE_MASKS, bit
+
+
+class MembershipCache:
+    """Cache TTL entre requests: user_id -> ((company_id, role), ...)."""
+
+    def __init__(self, ttl: float = 0):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        if self.ttl <= 0:
+            return None
+        item = self._data.get(user_id)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def set(self, user_id, memberships):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, memberships)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+membership_cache = MembershipCache()
+
+
+class Principal:
+    def __init__(self, user_id: int, memberships):
+        self.user_id = user_id
+        # company_id -> role, na ordem dos vínculos (o primeiro é a empresa ativa)
+        self.memberships = dict(memberships)
+        self.company_id = next(iter(self.memberships), None)
+        # máscaras de permissão (app/rbac.py) por empresa, resolvidas uma vez aqui
+        self.masks = {cid: ROLE_MASKS.get(role, 0) for cid, role in self.memberships.items()}
+        self.mask = self.masks.get(self.company_id, 0)
+        self._company = None
+
+    @property
+    def company(self):
+        if self.company_id is None:
+            return None
+        if self._company is None:
+            self._company = db.session.get(Company, self.company_id)
+        return self._company
+
+    @property
+    def role(self):
+        return self.memberships.get(self.company_id)
+
+    @property
+    def roles(self) -> frozenset:
+        return frozenset([self.role]) if self.role else frozenset()
+
+    def role_in(self, company_id: int):
+        return self.memberships.get(company_id)
+
+    def can(self, permission: str, company_id=None) -> bool:
+        """Permissão na empresa ativa (ou em `company_id`), sem consulta."""
+        mask = self.mask if company_id is None else self.masks.get(company_id, 0)
+        return bool(mask & bit(permission))
+
+    def companies_with(self, permission: str, company_ids=None) -> set:
+        b = bit(permission)
+        ids = self.masks if company_ids is None else company_ids
+        return {cid for cid in ids if self.masks.get(cid, 0) & b}
+
+
+def memberships_query(user_id: int):
+    return (
+        select(Membership.company_id, Membership.role)
+        .where(Membership.user_id == user_id, Membership.is_active.is_(True))
+        .order_by(Membership.id)
+    )
+
+
+def _load_memberships(user_id: int):
+    cached = membership_cache.get(user_id)
+    if cached is not None:
+        return cached
+    rows = db.session.execute(memberships_query(user_id)).all()
+    memberships = tuple((r.company_id, r.role) for r in rows)
+    membership_cache.set(user_id, memberships)
+    return memberships
+
+
+def current_principal():
+    """Principal do usuário logado, construído uma vez por request e guardado em g."""
+    if not current_user.is_authenticated:
+        return None
+    p = g.get("_principal")
+    if p is None or p.user_id != current_user.id:
+        p = Principal(current_user.id, _load_memberships(current_user.id))
+        g._principal = p
+    return p
+
+
+def _drop(user_id):
+    membership_cache.invalidate(user_id)
+    p = g.get("_principal") if g else None
+    if p is not None and p.user_id == user_id:
+        g.pop("_principal", None)
+
+
+@event.listens_for(Membership, "after_insert")
+@event.listens_for(Membership, "after_update")
+@event.listens_for(Membership, "after_delete")
+def _membership_written(mapper, connection, target):
+    _drop(target.user_id)
+
+
+def init_app(app):
+    app.config.setdefault("PRINCIPAL_CACHE_TTL", 0)
+    membership_cache.ttl = float(app.config["PRINCIPAL_CACHE_TTL"])
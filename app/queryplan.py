@@ -0,0 +1,132 @@
+# app/queryplan.py – EXPLAIN QUERY PLAN das queries das rotas contra um banco semeado
+import re
+import sys
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import configure_mappers
+
+from . import db
+from .api import INVITE_FIELDS, MEMBER_FIELDS, invites_query, members_query
+from .export import invites_export_queries, members_export_query
+from .bulk_invites import member_emails_query, pending_emails_query
+from .mailer import backlog_query, claim_query
+from .models import Company, Invite, Membership, User
+from .principal import memberships_query
+from .rbac import permitted_companies_query
+from .team import team_count_query, team_query
+
+# "SCAN t" sem índice = full table scan; "SCAN t USING [COVERING] INDEX" é ok
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?!\w| USING)")
+
+
+def route_queries(now=None):
+    """(rota, descrição, statement) das queries principais das rotas.
+
+    Lista mantida à mão para o `flask explain-routes`; o que as rotas executam
+    de fato é coberto por tests/test_query_plans.py (watch.capture + EXPLAIN).
+    """
+    configure_mappers()  # backrefs (Membership.user) precisam existir antes do join
+    now = now or datetime.utcnow()
+    cid, uid = 1, 1
+    emails = ["a@x.com", "b@x.com"]
+    return [
+        ("*", "load_user", select(User).where(User.id == uid)),
+        ("*", "principal memberships", memberships_query(uid)),
+        ("*", "principal company", select(Company).where(Company.id == cid)),
+        ("rbac", "permitted companies", permitted_companies_query(uid, "invites.create", [cid, 2])),
+        ("dashboard", "team page", team_query(cid)),
+        ("dashboard", "team page (cursor)", team_query(cid, after=(now, 10))),
+        ("dashboard", "team count", team_count_query(cid)),
+        ("dashboard", "pending invites", Invite.pending_query(cid, now).statement),
+        ("invites", "pending invites", Invite.pending_query(cid, now)
+            .order_by(Invite.created_at.desc()).statement),
+        ("invites", "used invites", Invite.used_query(cid).limit(20).statement),
+        ("revoke_invite", "invite by id", select(Invite).where(Invite.id == 1)),
+        ("accept_invite", "invite by token", select(Invite).where(Invite.token == "t")),
+        ("accept_invite", "membership exists", select(Membership).where(
+            Membership.user_id == uid, Membership.company_id == cid)),
+        ("login", "user by email", select(User).where(User.email == "a@x.com")),
+        ("bulk_invites", "member emails", member_emails_query(cid, emails)),
+        ("bulk_invites", "pending emails", pending_emails_query(cid, emails, now)),
+        ("outbox", "claim batch", claim_query(now, 50)),
+        ("readyz", "outbox backlog", backlog_query(now)),
+        ("api.members", "page", members_query(cid, MEMBER_FIELDS.values(), after=10)),
+        ("api.members", "page (all, roles)", members_query(
+            cid, MEMBER_FIELDS.values(), roles=["admin", "viewer"], status="all", after=10)),
+        ("api.invites", "page (pending)", invites_query(cid, INVITE_FIELDS.values(), after=10, now=now)),
+        ("api.invites", "page (all)", invites_query(cid, INVITE_FIELDS.values(), status="all", now=now)),
+        ("api.invites", "page (accepted)", invites_query(cid, INVITE_FIELDS.values(), status="accepted", now=now)),
+        ("export", "members", members_export_query(cid)),
+        *(("export", f"invites ({name})", stmt)
+          for name, stmt in zip(("live", "archived"), invites_export_queries(cid, now))),
+    ]
+
+
+def seed(conn, companies: int = 20, members: int = 50, invites: int = 100):
+    now = datetime.utcnow()
+    conn.execute(insert(Company), [{"id": c, "legal_name": f"C{c}"} for c in range(1, companies + 1)])
+    users, mems, invs = [], [], []
+    for c in range(1, companies + 1):
+        for m in range(members):
+            uid = len(users) + 1
+            users.append({"id": uid, "email": f"u{uid}@x.com", "password_hash": "x"})
+            mems.append({"user_id": uid, "company_id": c, "role": "viewer", "is_active": m % 10 != 0,
+                         "joined_at": now - timedelta(minutes=m)})
+        for i in range(invites):
+            invs.append({
+                "company_id": c, "email": f"i{c}-{i}@x.com", "role": "viewer",
+                "token": f"t{c}-{i}", "expires_at": now + timedelta(days=(i % 3) - 1),
+                "accepted_at": now - timedelta(days=i) if i % 4 == 0 else None,
+            })
+    conn.execute(insert(User), users)
+    conn.execute(insert(Membership), mems)
+    conn.execute(insert(Invite), invs)
+    conn.exec_driver_sql("ANALYZE")
+
+
+def explain(conn, stmt):
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[k] for k in (compiled.positiontup or ()))
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).all()
+    return [r[-1] for r in rows]
+
+
+def check_plans(url: str = "sqlite://"):
+    """Retorna [(rota, descrição, plano, full_scans)] num banco semeado do zero."""
+    engine = create_engine(url)
+    results = []
+    with engine.begin() as conn:
+        db.metadata.create_all(conn)
+        seed(conn)
+        for route, name, stmt in route_queries():
+            plan = explain(conn, stmt)
+            scans = [d for d in plan if FULL_SCAN.match(d)]
+            results.append((route, name, plan, scans))
+    engine.dispose()
+    return results
+
+
+@click.command("check-query-plans")
+@click.option("-v", "--verbose", is_flag=True, help="Mostra o plano de todas as queries.")
+@with_appcontext
+def check_query_plans_command(verbose):
+    """Falha (exit 1) se alguma query das rotas cair em full table scan."""
+    failed = 0
+    for route, name, plan, scans in check_plans():
+        if scans:
+            failed += 1
+        if scans or verbose:
+            click.echo(f"[{'SCAN' if scans else 'ok'}] {route}: {name}")
+            for line in plan:
+                click.echo(f"    {line}")
+    if failed:
+        click.echo(f"{failed} queries com full table scan.", err=True)
+        sys.exit(1)
+    click.echo("Nenhum full table scan.")
+
+
+def init_app(app):
+    app.cli.add_command(check_query_plans_command)
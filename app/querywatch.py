@@ -0,0 +1,154 @@
+# app/querywatch.py – detector de N+1 e queries lentas (dev/testes)
+#
+# QUERYWATCH=warn   loga quando o mesmo formato de statement roda mais de
+#                   QUERYWATCH_REPEAT vezes na request, e toda query acima de
+#                   QUERYWATCH_SLOW_MS, com rota e linha de origem no app
+# QUERYWATCH=raise  idem, mas N+1 vira exceção (para a suíte de testes)
+# QUERYWATCH=off    nenhum listener instalado (padrão fora do modo debug)
+#
+# Orçamento de queries em testes (fixture query_budget em tests/conftest.py):
+#
+#     def test_dashboard(client, query_budget):
+#         with query_budget(6, endpoint="web_auth.dashboard"):
+#             client.get("/dashboard")
+import logging
+import os
+import re
+import sysconfig
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+_PKG_DIR = os.path.dirname(os.path.abspath(__file__))
+_LIB_DIRS = tuple({sysconfig.get_paths()[k] for k in ("stdlib", "platstdlib", "purelib", "platlib")})
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_SPACES = re.compile(r"\s+")
+
+
+class NPlusOneDetected(AssertionError):
+    pass
+
+
+def fingerprint(statement: str) -> str:
+    """Formato do statement: listas IN e literais numéricos colapsados."""
+    sql = _SPACES.sub(" ", statement.strip())
+    sql = _IN_LIST.sub("(?+)", sql)
+    return _NUMBER.sub("N", sql)
+
+
+def origin() -> str:
+    """Linha mais interna do nosso código (fora de libs e deste módulo) na pilha atual."""
+    for frame in reversed(traceback.extract_stack()):
+        path = frame.filename
+        if path == __file__ or path.startswith(_LIB_DIRS) or path.startswith("<"):
+            continue
+        if path.startswith(_PKG_DIR):
+            path = os.path.relpath(path, os.path.dirname(_PKG_DIR))
+        return f"{path}:{frame.lineno} ({frame.name})"
+    return "?"
+
+
+def _route() -> str:
+    return request.endpoint or request.path if has_request_context() else "-"
+
+
+class Watch:
+    def __init__(self):
+        self.mode = "off"
+        self.repeat = 5
+        self.slow_ms = 100.0
+        self._installed = False
+        self._local = threading.local()  # orçamentos ativos na thread
+
+    def install(self):
+        if self._installed:
+            return
+        self._installed = True
+        event.listen(Engine, "before_cursor_execute", self._before)
+        event.listen(Engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_qw_t0", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("_qw_t0")
+        elapsed_ms = (time.perf_counter() - stack.pop()) * 1000 if stack else 0.0
+        fp = None
+        for recorder in getattr(self._local, "budgets", ()):
+            fp = fp or fingerprint(statement)
+            recorder.append((_route(), fp))
+        for captured in getattr(self._local, "captures", ()):
+            captured.append((_route(), statement, parameters, executemany))
+        if self.mode == "off":
+            return
+
+        if elapsed_ms >= self.slow_ms:
+            log.warning("query lenta %.1fms em %s, %s: %s", elapsed_ms, _route(), origin(),
+                        _SPACES.sub(" ", statement)[:300])
+        if not has_request_context():
+            return
+        counts = g.get("_querywatch")
+        if counts is None:
+            counts = g._querywatch = Counter()
+        fp = fp or fingerprint(statement)
+        counts[fp] += 1
+        if counts[fp] == self.repeat + 1:  # avisa uma vez por formato por request
+            msg = (f"possível N+1 em {_route()}: mesmo statement {counts[fp]}x, "
+                   f"origem {origin()}: {fp[:200]}")
+            if self.mode == "raise":
+                raise NPlusOneDetected(msg)
+            log.warning(msg)
+
+    @contextmanager
+    def budget(self, max_statements: int, endpoint=None):
+        """Falha (AssertionError) se o bloco rodar mais statements que o orçamento."""
+        self.install()
+        recorded = []
+        budgets = self._local.__dict__.setdefault("budgets", [])
+        budgets.append(recorded)
+        try:
+            yield recorded
+        finally:
+            budgets.remove(recorded)
+        hits = [fp for route, fp in recorded if endpoint is None or route == endpoint]
+        if len(hits) > max_statements:
+            top = "\n".join(f"  {n}x {fp[:160]}" for fp, n in Counter(hits).most_common(10))
+            raise AssertionError(
+                f"{endpoint or 'bloco'}: {len(hits)} statements (orçamento {max_statements})\n{top}"
+            )
+
+
+    @contextmanager
+    def capture(self):
+        """(rota, statement, parâmetros, executemany) de tudo que o bloco executar, para EXPLAIN."""
+        self.install()
+        captured = []
+        captures = self._local.__dict__.setdefault("captures", [])
+        captures.append(captured)
+        try:
+            yield captured
+        finally:
+            captures.remove(captured)
+
+
+watch = Watch()
+
+
+def init_app(app):
+    app.config.setdefault("QUERYWATCH", "warn" if app.debug else "off")
+    app.config.setdefault("QUERYWATCH_REPEAT", 5)
+    app.config.setdefault("QUERYWATCH_SLOW_MS", 100)
+    watch.mode = app.config["QUERYWATCH"]
+    watch.repeat = int(app.config["QUERYWATCH_REPEAT"])
+    watch.slow_ms = float(app.config["QUERYWATCH_SLOW_MS"])
+    if watch.mode != "off":
+        watch.install()
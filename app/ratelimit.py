@@ -0,0 +1,194 @@
+# app/ratelimit.py – rate limit com janela deslizante, checado antes de qualquer hash/query
+#
+# As chaves por IP usam request.remote_addr: atrás de proxy/balanceador defina
+# PROXY_FIX_HOPS (ProxyFix em create_app), senão todos os clientes caem no
+# mesmo bucket (o IP do proxy).
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import request
+from werkzeug.exceptions import TooManyRequests
+
+log = logging.getLogger(__name__)
+
+DEFAULT_RULES = {
+    # nome: "limite/janela_em_segundos"
+    "login_ip": "30/60",
+    "login_email": "10/300",
+    "token_ip": "30/60",
+    "token_prefix": "10/300",
+}
+
+
+def parse_rule(spec: str):
+    limit, window = spec.split("/", 1)
+    return int(limit), int(window)
+
+
+class MemoryBackend:
+    """Contadores por processo: (chave) -> [início da janela, atual, anterior, expira em].
+
+    Ordem de uso (LRU): cada incr move a chave para o fim, então a limpeza só
+    olha a frente do OrderedDict, em O(1) amortizado em vez de varrer tudo.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, window_start: int, window: int):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < window_start - window:
+                item = [window_start, 0, 0, 0]
+            elif item[0] < window_start:
+                item = [window_start, 0, item[1], 0]
+            item[1] += 1
+            item[3] = window_start + 2 * window  # depois disso nem a janela anterior conta
+            self._data[key] = item
+            self._data.move_to_end(key)
+            self._evict(window_start)
+            return item[1], item[2]
+
+    def _evict(self, now: int):
+        # vencidas saem da frente; acima de max_keys sai a menos usada mesmo viva (teto de memória)
+        data = self._data
+        while data:
+            key, item = next(iter(data.items()))
+            if item[3] > now and len(data) <= self.max_keys:
+                break
+            del data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteBackend:
+    """Contadores compartilhados entre workers num arquivo SQLite (WAL)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._ops = 0
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ratelimit ("
+                " key TEXT NOT NULL, win INTEGER NOT NULL, n INTEGER NOT NULL,"
+                " PRIMARY KEY (key, win)) WITHOUT ROWID"
+            )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def incr(self, key: str, window_start: int, window: int):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO ratelimit (key, win, n) VALUES (?, ?, 1)"
+                " ON CONFLICT (key, win) DO UPDATE SET n = n + 1",
+                (key, window_start),
+            )
+            rows = dict(
+                conn.execute(
+                    "SELECT win, n FROM ratelimit WHERE key = ? AND win IN (?, ?)",
+                    (key, window_start, window_start - window),
+                ).fetchall()
+            )
+            self._ops += 1
+            if self._ops % 1000 == 0:
+                conn.execute("DELETE FROM ratelimit WHERE win < ?", (window_start - window,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return rows.get(window_start, 0), rows.get(window_start - window, 0)
+
+    def clear(self):
+        self._conn().execute("DELETE FROM ratelimit")
+
+
+class Limiter:
+    def __init__(self):
+        self.enabled = True
+        self.backend = MemoryBackend()
+        self.rules = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("RATELIMIT_ENABLED", True)
+        app.config.setdefault("RATELIMIT_BACKEND", "memory")
+        app.config.setdefault("RATELIMIT_SQLITE_PATH", "ratelimit.db")
+        app.config.setdefault("RATELIMIT_RULES", {})
+        self.enabled = bool(app.config["RATELIMIT_ENABLED"])
+        if app.config["RATELIMIT_BACKEND"] == "sqlite":
+            self.backend = SQLiteBackend(app.config["RATELIMIT_SQLITE_PATH"])
+        else:
+            self.backend = MemoryBackend()
+        rules = {**DEFAULT_RULES, **app.config["RATELIMIT_RULES"]}
+        self.rules = {name: parse_rule(spec) for name, spec in rules.items()}
+        app.extensions["ratelimit"] = self
+
+    def hit(self, rule: str, key: str):
+        """Conta uma tentativa; retorna (permitido, segundos até liberar)."""
+        t0 = time.perf_counter_ns()
+        limit, window = self.rules[rule]
+        now = time.time()
+        window_start = int(now // window) * window
+        curr, prev = self.backend.incr(f"{rule}:{key}", window_start, window)
+        # janela deslizante aproximada: peso da janela anterior decai linearmente
+        weight = 1 - (now - window_start) / window
+        allowed = prev * weight + curr <= limit
+        retry_after = 0 if allowed else int(window_start + window - now) + 1
+        self._record(rule, allowed, time.perf_counter_ns() - t0)
+        return allowed, retry_after
+
+    def check(self, rule: str, key):
+        # a chave vai como veio: quem precisa normalizar (e-mail) normaliza antes;
+        # prefixos de token diferenciam maiúsculas
+        if not self.enabled or not key:
+            return
+        try:
+            allowed, retry_after = self.hit(rule, str(key))
+        except sqlite3.OperationalError as e:
+            # store compartilhado travado além do timeout: deixa passar em vez de 500
+            log.warning("ratelimit: %s indisponível (%s), request liberada", rule, e)
+            self._record(rule, None, 0)
+            return
+        if not allowed:
+            raise TooManyRequests(
+                "Muitas tentativas. Aguarde e tente novamente.", retry_after=retry_after
+            )
+
+    def check_ip(self, rule: str):
+        self.check(rule, request.remote_addr)
+
+    def _record(self, rule, allowed, elapsed_ns):
+        with self._lock:
+            s = self._stats.setdefault(rule, {"allowed": 0, "rejected": 0, "errors": 0, "time_ns": 0})
+            s["errors" if allowed is None else "allowed" if allowed else "rejected"] += 1
+            s["time_ns"] += elapsed_ns
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {rule: dict(s) for rule, s in self._stats.items()}
+
+
+limiter = Limiter()
+
+
+def token_prefix(token: str) -> str:
+    # só o prefixo vira chave: agrupa tentativas de força bruta sem guardar o token inteiro
+    return (token or "").strip()[:8]
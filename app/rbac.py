@@ -0,0 +1,126 @@
+# app/rbac.py – papéis e permissões: matriz de bits compilada no import
+#
+# Adicionar um papel = uma linha em ROLES. Cada papel vira uma máscara de bits
+# (ROLE_MASKS) e cada permissão um bit (PERMISSION_BITS); checar é um lookup
+# em dict e um AND, sem consulta: o papel do usuário em cada empresa já vem
+# do principal da request (app/principal.py), carregado uma vez por request.
+from functools import wraps
+
+from flask import abort, current_app
+from sqlalchemy import select
+
+from . import db
+
+PERMISSIONS = (
+    "members.read",     # roster da empresa (dashboard, /api/v1/members)
+    "invites.read",     # convites com token de aceite (/api/v1/invites)
+    "invites.create",   # criar e importar convites
+    "invites.revoke",
+    "data.export",      # exports completos do roster e do histórico de convites
+)
+ALL = "*"
+
+# (papel, rótulo, permissões), do mais para o menos privilegiado
+ROLES = (
+    ("owner", "Owner", ALL),
+    ("admin", "Admin", ALL),
+    ("manager", "Manager", ("members.read",)),
+    ("operator", "Operator", ("members.read",)),
+    ("viewer", "Viewer", ("members.read",)),
+)
+
+ROLE_CHOICES = tuple(name for name, _, _ in ROLES)
+ROLE_LABELS = {name: label for name, label, _ in ROLES}
+# owner não é concedido por convite
+INVITE_ROLES = tuple(r for r in ROLE_CHOICES if r != "owner")
+# <select> dos formulários de convite: do menor para o maior privilégio
+INVITE_ROLE_OPTIONS = [(r, ROLE_LABELS[r]) for r in reversed(INVITE_ROLES)]
+
+PERMISSION_BITS = {perm: 1 << i for i, perm in enumerate(PERMISSIONS)}
+
+
+def _compile():
+    masks = {}
+    for name, _, perms in ROLES:
+        perms = PERMISSIONS if perms == ALL else perms
+        unknown = set(perms) - set(PERMISSION_BITS)
+        if unknown:
+            raise ValueError(f"papel {name}: permissões desconhecidas {sorted(unknown)}")
+        mask = 0
+        for perm in perms:
+            mask |= PERMISSION_BITS[perm]
+        masks[name] = mask
+    return masks
+
+
+ROLE_MASKS = _compile()
+# permissão -> papéis que a têm (para filtrar no SQL)
+ROLES_WITH = {
+    perm: tuple(r for r in ROLE_CHOICES if ROLE_MASKS[r] & bit) for perm, bit in PERMISSION_BITS.items()
+}
+
+
+def bit(permission: str) -> int:
+    try:
+        return PERMISSION_BITS[permission]
+    except KeyError:
+        raise ValueError(f"permissão desconhecida: {permission}") from None
+
+
+def can(role, permission: str) -> bool:
+    return bool(ROLE_MASKS.get(role, 0) & bit(permission))
+
+
+def permitted_companies_query(user_id: int, permission: str, company_ids=None):
+    from .models import Membership  # models importa ROLE_CHOICES daqui
+
+    stmt = select(Membership.company_id).where(
+        Membership.user_id == user_id,
+        Membership.is_active.is_(True),
+        Membership.role.in_(ROLES_WITH[permission]),
+    )
+    if company_ids is not None:
+        stmt = stmt.where(Membership.company_id.in_(company_ids))
+    return stmt
+
+
+def permitted_companies(user_id: int, permission: str, company_ids=None) -> set:
+    """Quais empresas (de company_ids, ou todas) permitem `permission` ao usuário: um SELECT só.
+
+    Para o usuário logado, `current_principal().companies_with(...)` responde sem consulta.
+    """
+    bit(permission)
+    if company_ids is not None:
+        company_ids = list(company_ids)
+        if not company_ids:
+            return set()
+    stmt = permitted_companies_query(user_id, permission, company_ids)
+    return set(db.session.execute(stmt).scalars())
+
+
+def requires(permission: str, denied=None):
+    """A view só roda se o papel do usuário na empresa ativa tem `permission`.
+
+    Sem login: login_manager.unauthorized(). Sem empresa ou sem permissão:
+    `denied()` (ex.: flash + redirect) ou 403.
+    """
+    mask = bit(permission)  # nome errado falha no import, não na primeira request
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            from .principal import current_principal
+
+            p = current_principal()
+            if p is None:
+                return current_app.login_manager.unauthorized()
+            if not p.mask & mask:
+                if denied is not None:
+                    return denied()
+                abort(403)
+            return view(*args, **kwargs)
+
+        wrapped._permission = permission
+        return wrapped
+
+    return decorator
@@ -0,0 +1,86 @@
+# app/replicas.py – roteamento de leituras para réplicas (GET read-only) e escritas p/ o primário
+#
+# Réplicas vêm de DATABASE_REPLICA_URLS (separadas por vírgula) e viram binds
+# "replica_0", "replica_1"... Localmente dá para testar com cópias do arquivo:
+#   cp app.db /tmp/replica.db
+#   DATABASE_REPLICA_URLS=sqlite:////tmp/replica.db flask run
+import random
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+RYW_COOKIE = "ryw"
+
+
+def replica_reads(view):
+    """Marca a view como read-only: em GET/HEAD as leituras podem ir para uma réplica."""
+    view._replica_reads = True
+    return view
+
+
+def reading_replica() -> bool:
+    """A request atual lê de uma réplica (pode estar atrás das versões do cache de fragmentos)."""
+    return has_request_context() and bool(g.get("_replica"))
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._route_to_replica(clause):
+            return self._db.engines[g._replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _route_to_replica(self, clause) -> bool:
+        if not has_request_context() or not g.get("_replica"):
+            return False
+        if self._flushing or self.new or self.dirty or self.deleted:
+            return False
+        return bool(getattr(clause, "is_select", False))
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session):
+    # read-your-writes: o resto desta request e as próximas N s vão no primário
+    if has_request_context():
+        g._replica = None
+        g._ryw = True
+
+
+def replica_binds(urls: str) -> dict:
+    return {f"replica_{i}": u.strip() for i, u in enumerate(urls.split(",")) if u.strip()}
+
+
+def _choose_replica():
+    g._replica = None
+    keys = current_app.extensions.get("replicas")
+    if not keys or request.method not in ("GET", "HEAD"):
+        return
+    view = current_app.view_functions.get(request.endpoint)
+    if not getattr(view, "_replica_reads", False):
+        return
+    try:
+        if float(request.cookies.get(RYW_COOKIE, 0)) > time.time():
+            return
+    except ValueError:
+        pass
+    g._replica = random.choice(keys)
+
+
+def _mark_ryw(response):
+    if g.get("_ryw"):
+        window = current_app.config["REPLICA_RYW_SECONDS"]
+        response.set_cookie(
+            RYW_COOKIE, f"{time.time() + window:.0f}", max_age=int(window),
+            httponly=True, samesite="Lax",
+        )
+    return response
+
+
+def init_app(app):
+    app.config.setdefault("REPLICA_RYW_SECONDS", 5)
+    keys = sorted(k for k in (app.config.get("SQLALCHEMY_BINDS") or {}) if k.startswith("replica_"))
+    app.extensions["replicas"] = keys
+    if keys:
+        app.before_request(_choose_replica)
+        app.after_request(_mark_ryw)
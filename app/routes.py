@@ -1,24 +1,31 @@
 # app/routes.py
 from datetime import datetime
+from functools import cache
 from flask import (
     Blueprint, render_template, redirect, url_for, flash, request,
-    session, current_app
+    session, current_app, jsonify, g
 )
 from flask_login import (
     login_user, logout_user, login_required, current_user
 )
 
 from . import db, login_manager
-from .models import User, Company, Membership, Invite, ROLE_CHOICES
-from .forms import (
-    # login básico
-    LoginForm,
-    # convites
-    InviteCreateForm, AcceptInviteForm,
-    # wizard de registro
-    RegisterModeForm, RegUserStepForm, RegCompanyStepForm, RegConfirmForm,
-    InviteTokenForm, InviteProfileForm,
-)
+from .models import User, Company, Membership, Invite
+from .team import team_page, team_count
+from .principal import current_principal
+from .rbac import requires
+from .identity import identity_cache, parse_user_id, restore, snapshot
+from .ratelimit import limiter, token_prefix
+from .bulk_invites import InvalidCsv, TooManyRows, import_invites, read_csv, summarize
+from .replicas import replica_reads
+from .fragments import fragment_cache
+from .conditional import conditional
+from .hashing import hasher
+from . import mailer, metrics
+from .startup import lazy_import
+
+# WTForms/email_validator só carregam no primeiro form instanciado
+forms = lazy_import(f"{__package__}.forms")
 
 web_auth = Blueprint("web_auth", __name__)
 
@@ -26,15 +33,27 @@ web_auth = Blueprint("web_auth", __name__)
 # Helpers
 # =========================
 @login_manager.user_loader
+@metrics.timed("user_loader")
 def load_user(user_id):
+    prefetched = g.get("_prefetched_user")
+    if prefetched is not None and prefetched[0] == user_id:
+        return prefetched[1]  # já carregado pelo alvo ASGI (app/asgi.py)
     try:
-        return User.query.get(int(user_id))
+        uid, version = parse_user_id(user_id)
+        cached = identity_cache.get(uid, version)
+        if cached is not None:
+            return restore(db.session, User, cached)
+        user = db.session.get(User, uid)
+        if user is None or (version and version != user.session_version):
+            return None
+        identity_cache.set(uid, user.session_version, snapshot(user))
+        return user
     except Exception:
         return None
 
 def _current_company_or_none():
-    m = Membership.query.filter_by(user_id=current_user.id, is_active=True).first()
-    return m.company if m else None
+    p = current_principal()
+    return p.company if p else None
 
 def _must_company():
     c = _current_company_or_none()
@@ -43,13 +62,23 @@ def _must_company():
         return None
     return c
 
-def _require_role(company, roles=("owner", "admin")):
-    mem = Membership.query.filter_by(
-        user_id=current_user.id,
-        company_id=company.id,
-        is_active=True
-    ).first()
-    return bool(mem and mem.role in roles)
+def _can(company, permission):
+    p = current_principal()
+    return bool(p and p.can(permission, company.id))
+
+def _forbidden(message, no_company="web_auth.invites"):
+    # resposta do @requires nas páginas: sem empresa ou sem permissão, flash + redirect
+    def respond():
+        if _must_company() is None:
+            return redirect(url_for(no_company))
+        flash(message, "danger")
+        return redirect(url_for("web_auth.invites"))
+    return respond
+
+def _bulk_forbidden():
+    if _current_company_or_none() is None:
+        return jsonify(error="no_company"), 400
+    return jsonify(error="forbidden"), 403
 
 # Wizard session helpers
 def _reg_reset():
@@ -74,13 +103,20 @@ def home():
 def login():
     if current_user.is_authenticated:
         return redirect(url_for("web_auth.dashboard"))
-    form = LoginForm()
+    form = forms.LoginForm()
+    if request.method == "POST":
+        limiter.check_ip("login_ip")
     if form.validate_on_submit():
         email = form.email.data.strip().lower()
+        limiter.check("login_email", email)
         user = User.query.filter_by(email=email).first()
         if not user or not user.check_password(form.password.data):
             flash("Credenciais inválidas.", "danger")
             return redirect(url_for("web_auth.login"))
+        if user.password_needs_rehash():
+            # parâmetros do hash mudaram: regrava com o custo atual
+            user.set_password(form.password.data, rehash=True)
+            db.session.commit()
         login_user(user, remember=True)
         nxt = request.args.get("next") or url_for("web_auth.dashboard")
         return redirect(nxt)
@@ -101,87 +137,205 @@ def terms():
 # Dashboard
 # =========================
 @web_auth.get("/dashboard")
+@replica_reads
 @login_required
+@conditional("dashboard")
 def dashboard():
-    company = _current_company_or_none()
-    team = []
-    pending_invites = []
-    if company:
-        team = Membership.query.filter_by(company_id=company.id, is_active=True).all()
-        pending_invites = Invite.query.filter(
-            Invite.company_id == company.id,
-            Invite.accepted_at.is_(None),
-            Invite.expires_at > datetime.utcnow(),
-        ).all()
+    return render_dashboard(_current_company_or_none(), request.args.get("after"))
+
+def render_dashboard(company, after, data=None):
+    """Corpo do dashboard; `data` traz consultas já feitas (alvo ASGI), o resto é lazy."""
+    cid = company.id if company else None
+    data = data or {}
+    # cada seção só consulta o banco quando o fragmento não está em cache
+    pending = cache(lambda: data["pending"] if "pending" in data else (
+        Invite.pending_query(cid).all() if company else []))
+
+    def kpis():
+        count = data["team_count"] if "team_count" in data else (team_count(cid) if company else 0)
+        return render_template(
+            "dashboard/_kpis.html",
+            users_count=(count or 1) if company else 1,
+            projects_count=0,
+            pending_invites=pending(),
+        ), _expiry_ttl(pending())
+
+    def team():
+        if "team" in data:
+            members, next_cursor = data["team"]
+        else:
+            members, next_cursor = team_page(cid, cursor=after) if company else ([], None)
+        return render_template(
+            "dashboard/_team.html", company=company, team=members, next_cursor=next_cursor
+        )
+
+    def pending_section():
+        return render_template(
+            "dashboard/_pending_invites.html", pending_invites=pending()
+        ), _expiry_ttl(pending())
 
     return render_template(
         "dashboard/dashboard.html",
         title="Dashboard",
         company=company,
-        team=team,
-        pending_invites=pending_invites,
-        users_count=len(team) if team else 1,
-        projects_count=0,
+        kpis_html=fragment_cache.render(cid, "dashboard:kpis", kpis),
+        team_html=fragment_cache.render(cid, "dashboard:team", team, vary=(after or "",)),
+        pending_html=fragment_cache.render(
+            cid, "dashboard:pending", pending_section, vary=(request.host_url,)
+        ),
     )
 
+def _expiry_ttl(invites):
+    # o fragmento não pode sobreviver ao convite pendente que vence primeiro
+    if not invites:
+        return None
+    return max(1.0, (min(i.expires_at for i in invites) - datetime.utcnow()).total_seconds())
+
 # =========================
 # Convites
 # =========================
 @web_auth.route("/invites", methods=["GET", "POST"])
+@replica_reads
 @login_required
+@conditional("invites")
 def invites():
     company = _must_company()
     if company is None:
         return redirect(url_for("web_auth.dashboard"))
 
-    form = InviteCreateForm()
+    form = forms.InviteCreateForm()
     if form.validate_on_submit():
-        if not _require_role(company, roles=("owner", "admin")):
+        if not _can(company, "invites.create"):
             flash("Sem permissão para convidar.", "danger")
             return redirect(url_for("web_auth.invites"))
-        try:
-            days = int((form.days_valid.data or "7").strip())
-        except ValueError:
-            days = 7
+        days = _days_valid(form.days_valid.data)
         inv = Invite.new(
             company_id=company.id,
             email=form.email.data,
             role=form.role.data,
-            days_valid=days
+            days_valid=days,
+            commit=False,
         )
+        # e-mail vai para a outbox na mesma transação; o envio é do mailer
+        mailer.enqueue("invite", inv.email, mailer.invite_payload(company, inv.token, inv.role, inv.expires_at),
+                       ref_id=inv.id)
+        db.session.commit()
         link = url_for("web_auth.accept_invite", token=inv.token, _external=True)
-        flash(f"Convite criado. Envie este link: {link}", "success")
+        flash(f"Convite criado e enviado para {inv.email}. Link: {link}", "success")
         return redirect(url_for("web_auth.invites"))
 
-    pending = Invite.query.filter(
-        Invite.company_id == company.id,
-        Invite.accepted_at.is_(None),
-        Invite.expires_at > datetime.utcnow(),
-    ).order_by(Invite.created_at.desc()).all()
+    return _render_invites(company, form)
+
+def _enqueue_invite_emails(company):
+    # import em lote: e-mails entram na outbox na mesma transação dos convites
+    def on_chunk(values):
+        mailer.enqueue_many("invite", [
+            (v["email"], mailer.invite_payload(company, v["token"], v["role"], v["expires_at"]), None)
+            for v in values
+        ])
+    return on_chunk
 
-    used = Invite.query.filter(
-        Invite.company_id == company.id,
-        Invite.accepted_at.isnot(None),
-    ).order_by(Invite.accepted_at.desc()).limit(20).all()
+MAX_DAYS_VALID = 365
+
+def _days_valid(raw, default=7):
+    try:
+        days = int((raw or str(default)).strip())
+    except ValueError:
+        return default
+    return max(1, min(days, MAX_DAYS_VALID))  # valores enormes estouram o timedelta
+
+def _render_invites(company, form, import_form=None, data=None, **extra):
+    data = data or {}
+
+    def pending_section():
+        pending = data.get("pending")
+        if pending is None:
+            pending = Invite.pending_query(company.id).order_by(Invite.created_at.desc()).all()
+        return render_template("dashboard/_invites_pending.html", pending=pending), _expiry_ttl(pending)
+
+    def used_section():
+        used = data.get("used")
+        if used is None:
+            used = Invite.used_query(company.id).limit(20).all()
+        return render_template("dashboard/_invites_used.html", used=used)
 
     return render_template(
         "dashboard/invites.html",
         form=form,
+        import_form=import_form or forms.InviteImportForm(formdata=None),
         company=company,
-        pending=pending,
-        used=used,
+        pending_html=fragment_cache.render(
+            company.id, "invites:pending", pending_section, vary=(request.host_url,)
+        ),
+        used_html=fragment_cache.render(company.id, "invites:used", used_section),
         title="Convites",
+        **extra,
     )
 
-@web_auth.post("/invites/<int:invite_id>/revoke")
+@web_auth.post("/invites/import")
 @login_required
-def revoke_invite(invite_id):
-    company = _must_company()
-    if company is None:
+@requires("invites.create", denied=_forbidden("Sem permissão para convidar.", no_company="web_auth.dashboard"))
+def import_invites_csv():
+    company = _current_company_or_none()
+    import_form = forms.InviteImportForm()
+    if not import_form.validate_on_submit():
+        flash("Envie um arquivo CSV válido.", "warning")
         return redirect(url_for("web_auth.invites"))
-    if not _require_role(company, roles=("owner", "admin")):
-        flash("Sem permissão para revogar.", "danger")
+    try:
+        rows = read_csv(import_form.file.data.stream, default_role=import_form.role.data,
+                        max_rows=current_app.config["INVITE_IMPORT_MAX_ROWS"])
+    except InvalidCsv as e:
+        flash(str(e), "danger")
         return redirect(url_for("web_auth.invites"))
+    report = import_invites(
+        company.id,
+        rows,
+        days_valid=_days_valid(import_form.days_valid.data),
+        on_chunk=_enqueue_invite_emails(company),
+    )
+    return _render_invites(
+        company, forms.InviteCreateForm(formdata=None), import_form,
+        import_report=report, import_summary=summarize(report),
+    )
+
+@web_auth.post("/invites/bulk")
+@login_required
+@requires("invites.create", denied=_bulk_forbidden)
+def bulk_invites():
+    # API: JSON {"invites": [{"email", "role"}], "days_valid": 7} ou corpo text/csv
+    company = _current_company_or_none()
+    max_rows = current_app.config["INVITE_IMPORT_MAX_ROWS"]
+
+    if request.mimetype == "text/csv":
+        try:
+            rows = read_csv(request.stream, default_role=request.args.get("role", "viewer"),
+                            max_rows=max_rows)
+        except TooManyRows as e:
+            return jsonify(error="too_many_rows", detail=str(e)), 413
+        except InvalidCsv as e:
+            return jsonify(error="invalid_csv", detail=str(e)), 400
+        days = _days_valid(request.args.get("days_valid"))
+    else:
+        payload = request.get_json(silent=True) or {}
+        items = payload.get("invites")
+        if not isinstance(items, list):
+            return jsonify(error="invalid_payload"), 400
+        if len(items) > max_rows:
+            return jsonify(error="too_many_rows", detail=f"Máximo de {max_rows} convites por lote."), 413
+        rows = (
+            (n, str(item.get("email", "")), str(item.get("role") or "viewer").lower())
+            for n, item in enumerate(items, start=1) if isinstance(item, dict)
+        )
+        days = _days_valid(str(payload.get("days_valid", 7)))
+
+    report = import_invites(company.id, rows, days_valid=days, on_chunk=_enqueue_invite_emails(company))
+    return jsonify(summary=summarize(report), rows=report)
+
+@web_auth.post("/invites/<int:invite_id>/revoke")
+@login_required
+@requires("invites.revoke", denied=_forbidden("Sem permissão para revogar."))
+def revoke_invite(invite_id):
+    company = _current_company_or_none()
 
     inv = Invite.query.get(invite_id)
     if not inv or inv.company_id != company.id:
@@ -196,25 +350,21 @@ def revoke_invite(invite_id):
     flash("Convite revogado.", "info")
     return redirect(url_for("web_auth.invites"))
 
+# sem @replica_reads: logado, o GET grava (Membership, accepted_at) e as checagens
+# de "já aceito"/"já é membro" precisam ver o primário
 @web_auth.route("/accept-invite", methods=["GET", "POST"])
 def accept_invite():
     token = request.args.get("token", "").strip()
     if not token:
         flash("Token ausente.", "danger")
         return redirect(url_for("web_auth.home"))
+    limiter.check_ip("token_ip")
+    limiter.check("token_prefix", token_prefix(token))
 
     inv = Invite.query.filter_by(token=token).first()
-    if not inv:
-        flash("Convite inválido.", "danger")
-        return redirect(url_for("web_auth.home"))
-
-    if inv.accepted_at:
-        flash("Este convite já foi usado.", "warning")
-        return redirect(url_for("web_auth.login"))
-
-    if inv.expires_at <= datetime.utcnow():
-        flash("Convite expirado.", "warning")
-        return redirect(url_for("web_auth.home"))
+    problem = invite_problem(inv)
+    if problem is not None:
+        return problem
 
     # Usuário já logado
     if current_user.is_authenticated:
@@ -239,12 +389,10 @@ def accept_invite():
     # Usuário não logado
     existing = User.query.filter_by(email=inv.email.strip().lower()).first()
     if existing:
-        flash("Já existe uma conta para este e-mail. Faça login para aceitar o convite.", "info")
-        login_url = url_for("web_auth.login") + f"?next={url_for('web_auth.accept_invite', token=token)}"
-        return redirect(login_url)
+        return login_to_accept(token)
 
     # Renderiza tela de criação de conta a partir do convite
-    form = AcceptInviteForm()
+    form = forms.AcceptInviteForm()
     if form.validate_on_submit():
         user = User(
             email=inv.email.strip().lower(),
@@ -269,6 +417,24 @@ def accept_invite():
 
     return render_template("dashboard/accept_invite.html", form=form, invite=inv, title="Aceitar convite")
 
+def invite_problem(inv):
+    """Redirect (com flash) quando o convite não serve mais; None se pode ser aceito."""
+    if not inv:
+        flash("Convite inválido.", "danger")
+        return redirect(url_for("web_auth.home"))
+    if inv.accepted_at:
+        flash("Este convite já foi usado.", "warning")
+        return redirect(url_for("web_auth.login"))
+    if inv.expires_at <= datetime.utcnow():
+        flash("Convite expirado.", "warning")
+        return redirect(url_for("web_auth.home"))
+    return None
+
+def login_to_accept(token):
+    flash("Já existe uma conta para este e-mail. Faça login para aceitar o convite.", "info")
+    login_url = url_for("web_auth.login") + f"?next={url_for('web_auth.accept_invite', token=token)}"
+    return redirect(login_url)
+
 # =========================
 # Wizard de registro
 # =========================
@@ -276,7 +442,7 @@ def accept_invite():
 def register_mode():
     if current_user.is_authenticated:
         return redirect(url_for("web_auth.dashboard"))
-    form = RegisterModeForm()
+    form = forms.RegisterModeForm()
     url_token = request.args.get("token")
     if url_token:
         form.mode.data = "invite"
@@ -300,7 +466,7 @@ web_auth.add_url_rule(
 def register_company_step1():
     if current_user.is_authenticated:
         return redirect(url_for("web_auth.dashboard"))
-    form = RegUserStepForm()
+    form = forms.RegUserStepForm()
     if form.validate_on_submit():
         email = form.email.data.strip().lower()
         if User.query.filter_by(email=email).first():
@@ -312,7 +478,8 @@ def register_company_step1():
                 "first_name": form.first_name.data.strip(),
                 "last_name": form.last_name.data.strip(),
                 "email": email,
-                "password": form.password.data,
+                # só o hash fica na sessão, nunca a senha em texto
+                "password_hash": hasher.hash(form.password.data),
                 "job_title": (form.job_title.data or "").strip() or None,
                 "phone": (form.phone.data or "").strip() or None,
                 "tz": form.tz.data,
@@ -329,7 +496,7 @@ def register_company_step2():
     reg = _reg_get()
     if not reg or reg.get("mode") != "company" or "user" not in reg:
         return redirect(url_for("web_auth.register_company_step1"))
-    form = RegCompanyStepForm()
+    form = forms.RegCompanyStepForm()
     if form.validate_on_submit():
         _reg_set({
             "company": {
@@ -352,7 +519,7 @@ def register_company_confirm():
     if not reg or reg.get("mode") != "company" or "user" not in reg or "company" not in reg:
         return redirect(url_for("web_auth.register_company_step1"))
 
-    form = RegConfirmForm()
+    form = forms.RegConfirmForm()
     if not current_app.config.get("REQUIRE_TERMS", True):
         form.accept_terms.validators = []
         form.accept_terms.data = True
@@ -362,6 +529,12 @@ def register_company_confirm():
         if User.query.filter_by(email=u["email"]).first():
             flash("E-mail já cadastrado. Faça login.", "warning")
             return redirect(url_for("web_auth.login"))
+        # wizards abertos antes do deploy guardavam a senha em texto ("password")
+        password_hash = u.get("password_hash") or (u.get("password") and hasher.hash(u["password"]))
+        if not password_hash:
+            _reg_reset()
+            flash("Sua sessão de cadastro expirou. Preencha seus dados de novo.", "warning")
+            return redirect(url_for("web_auth.register_company_step1"))
 
         company = Company(
             legal_name=c["legal_name"], trade_name=c["trade_name"], tax_id=c["tax_id"],
@@ -373,7 +546,7 @@ def register_company_confirm():
             email=u["email"], first_name=u["first_name"], last_name=u["last_name"],
             job_title=u["job_title"], phone=u["phone"], tz=u["tz"], locale="pt-BR"
         )
-        user.set_password(u["password"])
+        user.password_hash = password_hash
         db.session.add(user); db.session.flush()
 
         company.owner_user_id = user.id
@@ -394,12 +567,14 @@ def register_company_confirm():
 def register_invite_step1():
     if current_user.is_authenticated:
         return redirect(url_for("web_auth.dashboard"))
-    form = InviteTokenForm()
+    form = forms.InviteTokenForm()
     pre = request.args.get("token", "").strip()
     if pre:
         form.token.data = pre
     if form.validate_on_submit():
         token = form.token.data.strip()
+        limiter.check_ip("token_ip")
+        limiter.check("token_prefix", token_prefix(token))
         inv = Invite.query.filter_by(token=token).first()
         if not inv or inv.accepted_at or inv.expires_at <= datetime.utcnow():
             flash("Convite inválido ou expirado.", "danger")
@@ -409,6 +584,7 @@ def register_invite_step1():
     return render_template("register/register_invite_step1.html", form=form, title="Informe o convite")
 
 # Entrar com convite - passo 2
+# sem @replica_reads: o GET valida o token (aceito/expirado) e precisa do primário
 @web_auth.route("/register/invite/step-2", methods=["GET", "POST"])
 def register_invite_step2():
     if current_user.is_authenticated:
@@ -422,7 +598,7 @@ def register_invite_step2():
         flash("Convite inválido ou expirado.", "danger")
         return redirect(url_for("web_auth.register_invite_step1"))
 
-    form = InviteProfileForm()
+    form = forms.InviteProfileForm()
     if form.validate_on_submit():
         existing = User.query.filter_by(email=inv.email.strip().lower()).first()
         if existing:
@@ -448,10 +624,3 @@ def register_invite_step2():
         return redirect(url_for("web_auth.dashboard"))
 
     return render_template("register/register_invite_step2.html", form=form, invite=inv, title="Seu perfil")
-
-# =========================
-# Healthcheck
-# =========================
-@web_auth.get("/healthz")
-def healthz():
-    return "ok", 200, {"Content-Type": "text/plain"}
@@ -0,0 +1,361 @@
+# app/sessions.py – sessão no servidor: o cookie leva só um id opaco assinado
+#
+# Backends: "memory" (por processo), "sqlite" (arquivo compartilhado entre
+# workers), "file" (um arquivo por sessão) ou "cookie" (padrão do Flask).
+# Os dados só são lidos do backend quando a view toca em `session`, então
+# requests de estáticos e afins não custam nada.
+import hashlib
+import os
+import pathlib
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+import click
+from flask.cli import with_appcontext
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from flask import current_app, request
+from itsdangerous import BadSignature, Signer
+
+CLEANUP_EVERY = 500  # writes entre limpezas oportunistas
+# endpoints que nunca usam sessão (o after_request do Flask-Login consulta `session` em todas)
+STATELESS_ENDPOINTS = {"static"}
+_COMPRESSED = b"z"
+_PLAIN = b"j"
+
+
+class Serializer:
+    """JSON com tags do Flask (tuplas, bytes, datetime, Markup), compactado acima de 512 bytes."""
+
+    def __init__(self, threshold: int = 512):
+        self.threshold = threshold
+        self._json = TaggedJSONSerializer()
+
+    def dumps(self, data: dict) -> bytes:
+        raw = self._json.dumps(data).encode()
+        if len(raw) > self.threshold:
+            return _COMPRESSED + zlib.compress(raw, 6)
+        return _PLAIN + raw
+
+    def loads(self, blob: bytes) -> dict:
+        kind, body = blob[:1], blob[1:]
+        if kind == _COMPRESSED:
+            body = zlib.decompress(body)
+        return self._json.loads(body.decode())
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, sid):
+        item = self._data.get(sid)
+        if item is None or item[0] < time.time():
+            return None
+        return item
+
+    def set(self, sid, blob, ttl):
+        with self._lock:
+            self._data[sid] = (time.time() + ttl, blob)
+            self._writes += 1
+        if self._writes % CLEANUP_EVERY == 0:
+            self.cleanup()
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def cleanup(self) -> int:
+        now = time.time()
+        with self._lock:
+            dead = [k for k, v in self._data.items() if v[0] < now]
+            for k in dead:
+                del self._data[k]
+        return len(dead)
+
+
+class SQLiteBackend:
+    """Tabela `sessions` num arquivo SQLite (WAL) compartilhado entre workers."""
+
+    def __init__(self, path: str):
+        self.path = path
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " sid TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid):
+        row = self._conn().execute(
+            "SELECT expires, data FROM sessions WHERE sid = ? AND expires >= ?", (sid, time.time())
+        ).fetchone()
+        return (row[0], bytes(row[1])) if row else None
+
+    def set(self, sid, blob, ttl):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)",
+            (sid, blob, time.time() + ttl),
+        )
+        self._writes += 1
+        if self._writes % CLEANUP_EVERY == 0:
+            self.cleanup()
+
+    def delete(self, sid):
+        self._conn().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def cleanup(self) -> int:
+        return self._conn().execute("DELETE FROM sessions WHERE expires < ?", (time.time(),)).rowcount
+
+
+class FileBackend:
+    """Um arquivo por sessão; o mtime guarda a expiração."""
+
+    def __init__(self, path: str):
+        self.root = pathlib.Path(path)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._writes = 0
+
+    def _path(self, sid):
+        # o nome do arquivo não revela o id do cookie
+        return self.root / hashlib.sha256(sid.encode()).hexdigest()
+
+    def get(self, sid):
+        path = self._path(sid)
+        try:
+            expires = path.stat().st_mtime
+            if expires < time.time():
+                return None
+            return expires, path.read_bytes()
+        except OSError:
+            return None
+
+    def set(self, sid, blob, ttl):
+        path = self._path(sid)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(blob)
+        expires = time.time() + ttl
+        os.utime(tmp, (expires, expires))
+        os.replace(tmp, path)
+        self._writes += 1
+        if self._writes % CLEANUP_EVERY == 0:
+            self.cleanup()
+
+    def delete(self, sid):
+        self._path(sid).unlink(missing_ok=True)
+
+    def cleanup(self) -> int:
+        now, removed = time.time(), 0
+        for path in self.root.iterdir():
+            try:
+                if path.stat().st_mtime < now:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+class ServerSession(SessionMixin):
+    """Sessão preguiçosa: só busca no backend no primeiro acesso."""
+
+    def __init__(self, sid=None, loader=None):
+        self.sid = sid
+        self.new = sid is None
+        self.modified = False
+        self.accessed = False
+        self.expires = None
+        self.replaced = None
+        self.transient = False
+        self._loader = loader
+        self._data = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    def _load(self):
+        self.accessed = True
+        if self._data is None:
+            if request.endpoint in STATELESS_ENDPOINTS:
+                self.transient, self._data = True, {}
+                return self._data
+            item = self._loader(self.sid) if self.sid else None
+            if item is None:
+                self.new, self._data = True, {}
+            else:
+                self.expires, self._data = item
+        return self._data
+
+    def regenerate(self):
+        """Troca o id mantendo os dados (evita fixação de sessão no login)."""
+        self._load()
+        if self.sid and not self.new:
+            self.replaced = self.sid
+        self.sid = None
+        self.new = True
+        self.modified = True
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self._load()[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def clear(self):
+        if self._load():
+            self._data.clear()
+            self.modified = True
+
+
+class ServerSessionInterface(SessionInterface):
+    salt = "server-session"
+
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.serializer = Serializer()
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt)
+
+    def _ttl(self, app, session) -> int:
+        if session.permanent:
+            return int(app.permanent_session_lifetime.total_seconds())
+        return self.ttl
+
+    def _load(self, sid):
+        item = self.backend.get(sid)
+        if item is None:
+            return None
+        expires, blob = item
+        try:
+            return expires, self.serializer.loads(blob)
+        except Exception:
+            return None
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        sid = None
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+        return ServerSession(sid, self._load)
+
+    def save_session(self, app, session, response):
+        if not session.loaded or session.transient:
+            return  # a view nem olhou a sessão: nada a gravar nem a renovar
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        response.vary.add("Cookie")
+
+        if not session:
+            # esvaziada nesta request (ex.: logout): apaga no backend e no navegador
+            if session.modified:
+                for sid in (session.sid, session.replaced):
+                    if sid:
+                        self.backend.delete(sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       httponly=self.get_cookie_httponly(app),
+                                       samesite=self.get_cookie_samesite(app))
+            return
+
+        ttl = self._ttl(app, session)
+        # sem alteração só regrava quando passou da metade do TTL (renovação deslizante)
+        stale = session.expires is None or session.expires - time.time() < ttl / 2
+        if not (session.modified or session.new or stale):
+            return
+
+        if session.new:
+            # id sempre gerado aqui: um id vindo do cliente que não existe nunca é adotado
+            session.sid = secrets.token_urlsafe(32)
+        self.backend.set(session.sid, self.serializer.dumps(dict(session)), ttl)
+        if session.replaced:
+            self.backend.delete(session.replaced)
+
+        response.set_cookie(
+            name, self._signer(app).sign(session.sid).decode(),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+            secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app),
+        )
+
+
+def make_backend(kind: str, path: str):
+    if kind == "sqlite":
+        return SQLiteBackend(path)
+    if kind == "file":
+        return FileBackend(path)
+    return MemoryBackend()
+
+
+def _rotate_on_login(sender, user, **extra):
+    from flask import session
+    if isinstance(session._get_current_object(), ServerSession):
+        session.regenerate()
+
+
+@click.group("sessions")
+def sessions_cli():
+    """Sessões no servidor."""
+
+
+@sessions_cli.command("cleanup")
+@with_appcontext
+def cleanup_command():
+    """Remove sessões expiradas do backend configurado."""
+    interface = current_app.session_interface
+    if not isinstance(interface, ServerSessionInterface):
+        click.echo("SESSION_BACKEND=cookie: nada a limpar.")
+        return
+    click.echo(f"{interface.backend.cleanup()} sessões expiradas removidas.")
+
+
+def init_app(app):
+    app.config.setdefault("SESSION_BACKEND", "memory")
+    app.config.setdefault("SESSION_STORE_PATH", "sessions.db")
+    app.config.setdefault("SESSION_TTL", 86400)
+    kind = app.config["SESSION_BACKEND"]
+    app.cli.add_command(sessions_cli)
+    if kind == "cookie":
+        app.session_interface = SecureCookieSessionInterface()
+        return
+    backend = make_backend(kind, app.config["SESSION_STORE_PATH"])
+    app.session_interface = ServerSessionInterface(backend, int(app.config["SESSION_TTL"]))
+
+    from flask_login import user_logged_in
+    user_logged_in.connect(_rotate_on_login, app)
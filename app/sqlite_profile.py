@@ -0,0 +1,184 @@
+# app/sqlite_profile.py – perfil de produção p/ SQLite: WAL, pragmas, pool e fila de escrita
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: a fila vale só dentro do processo
+    fcntl = None
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+log = logging.getLogger(__name__)
+
+
+def is_sqlite_file(uri: str) -> bool:
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def engine_options(config) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS do perfil; precisa existir antes de db.init_app."""
+    if config["SQLITE_PROFILE"] != "production" or not is_sqlite_file(config["SQLALCHEMY_DATABASE_URI"]):
+        return {}
+    return {
+        "pool_size": int(config["SQLITE_POOL_SIZE"]),
+        "max_overflow": int(config["SQLITE_MAX_OVERFLOW"]),
+        "pool_timeout": float(config["SQLITE_POOL_TIMEOUT"]),
+        "connect_args": {
+            # o driver também espera pelo lock (segundos); busy_timeout abaixo cobre o SQLite em si
+            "timeout": int(config["SQLITE_BUSY_TIMEOUT_MS"]) / 1000,
+            "check_same_thread": False,
+        },
+    }
+
+
+def _pragmas(config):
+    return [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_KB'])}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+class WriteQueue:
+    """Serializa as transações de escrita entre threads e workers (FIFO aproximado).
+
+    O lock é pego no primeiro flush/DML da sessão e solto quando a transação
+    raiz termina (commit, rollback ou close), então writers concorrentes esperam
+    aqui em vez de girar em SQLITE_BUSY. Dentro do processo é um threading.Lock;
+    entre workers (gunicorn -w N) é um flock() num arquivo ao lado do banco
+    (`<banco>-writelock`), pego por quem já tem o lock do processo.
+    """
+
+    POLL = 0.005  # flock não tem timeout: tentativas não bloqueantes até o prazo
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+        self.path = None  # sem arquivo: só o lock do processo
+        self._lock = threading.Lock()
+        self._fd = None
+        self._fd_pid = None
+        self._count_lock = threading.Lock()
+        self.waits = 0  # total acumulado de esperas
+        self.waiting = 0  # esperando agora (threads deste processo)
+        self.timeouts = 0
+        self._installed = False
+
+    def _file(self):
+        # um fd por processo: flock é por descrição de arquivo, herdada no fork
+        if self._fd_pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._fd_pid = os.getpid()
+        return self._fd
+
+    def _waiting(self, delta: int):
+        with self._count_lock:
+            self.waiting += delta
+            if delta > 0:
+                self.waits += 1
+
+    def _flock(self, deadline) -> bool:
+        fd = self._file()
+        waited = False
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return True
+                except BlockingIOError:
+                    if not waited:
+                        waited = True
+                        self._waiting(1)
+                    if time.monotonic() >= deadline:
+                        return False
+                    time.sleep(self.POLL)
+        finally:
+            if waited:
+                self._waiting(-1)
+
+    def acquire(self, session):
+        if session.info.get("_write_lock"):
+            return
+        deadline = time.monotonic() + self.timeout
+        if not self._lock.acquire(blocking=False):
+            self._waiting(1)
+            try:
+                acquired = self._lock.acquire(timeout=self.timeout)
+            finally:
+                self._waiting(-1)
+            if not acquired:
+                self._timed_out()
+                return
+        if self.path and fcntl is not None and not self._flock(deadline):
+            self._lock.release()
+            self._timed_out()
+            return
+        session.info["_write_lock"] = True
+
+    def _timed_out(self):
+        # segue sem o lock: o busy_timeout do SQLite ainda protege
+        self.timeouts += 1
+        log.warning("write queue: timeout após %.1fs", self.timeout)
+
+    def release(self, session):
+        if session.info.pop("_write_lock", False):
+            if self.path and fcntl is not None:
+                fcntl.flock(self._file(), fcntl.LOCK_UN)
+            self._lock.release()
+
+    def install(self, session_target):
+        if self._installed:
+            return
+        self._installed = True
+
+        @event.listens_for(session_target, "before_flush")
+        def _before_flush(session, flush_context, instances):
+            if session.new or session.dirty or session.deleted:
+                self.acquire(session)
+
+        @event.listens_for(session_target, "do_orm_execute")
+        def _do_orm_execute(state):
+            if state.is_insert or state.is_update or state.is_delete:
+                self.acquire(state.session)
+
+        @event.listens_for(session_target, "after_transaction_end")
+        def _after_transaction_end(session, transaction):
+            if transaction.parent is None:
+                self.release(session)
+
+
+write_queue = WriteQueue()
+
+
+def install_pragmas(engine, config):
+    """Pragmas do perfil em cada conexão nova do engine (também o sync_engine de um AsyncEngine)."""
+    pragmas = _pragmas(config)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, record):
+        cur = dbapi_conn.cursor()
+        for pragma in pragmas:
+            cur.execute(pragma)
+        cur.close()
+
+
+def init_app(app, db):
+    cfg = app.config
+    if cfg["SQLITE_PROFILE"] != "production" or not is_sqlite_file(cfg["SQLALCHEMY_DATABASE_URI"]):
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                install_pragmas(engine, cfg)
+
+    if cfg["SQLITE_WRITE_QUEUE"]:
+        write_queue.timeout = float(cfg["SQLITE_WRITE_QUEUE_TIMEOUT"])
+        write_queue.path = make_url(cfg["SQLALCHEMY_DATABASE_URI"]).database + "-writelock"
+        write_queue.install(db.session)
@@ -0,0 +1,139 @@
+# app/startup.py – partida rápida dos workers e preload compatível com copy-on-write
+#
+# FAST_START=1      adia Alembic/Flask-Migrate e ferramentas de CLI nos workers web
+#                   (dentro de `flask ...` tudo continua sendo carregado)
+# IMPORT_TIMING=1   registra o tempo de import de cada módulo (ver import_report)
+# WSGI_PRELOAD=1    em app/wsgi.py: aquece tudo no master e faz gc.freeze() antes do fork
+#                   (gunicorn --preload -w 4 app.wsgi:wsgi_app)
+#
+# Só stdlib aqui: o módulo é importado antes de Flask/SQLAlchemy para medir os imports.
+import gc
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+_preloaded = None
+
+
+def in_cli() -> bool:
+    """True quando rodando dentro do `flask` CLI (db upgrade, check-query-plans...)."""
+    click = sys.modules.get("click")
+    return click is not None and click.get_current_context(silent=True) is not None
+
+
+class _LazyModule:
+    # proxy em vez do importlib.util.LazyLoader: no 3.11 o LazyLoader não é
+    # thread-safe e duas requests simultâneas viam o módulo pela metade
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)  # lock de import por módulo
+        return getattr(self._module, attr)
+
+
+def lazy_import(name: str):
+    """Módulo que só é importado no primeiro acesso a um atributo."""
+    return sys.modules.get(name) or _LazyModule(name)
+
+
+class ImportTimer:
+    """Meta path finder que cronometra o exec_module de cada módulo importado."""
+
+    def __init__(self):
+        self.timings = {}  # nome -> [cumulativo_ms, próprio_ms]
+        self._local = threading.local()  # pilha por thread (sem lock: imports já têm o seu)
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        # loaders de classe (builtin/frozen) são compartilhados: não dá para embrulhar
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+        exec_module = loader.exec_module
+
+        def timed_exec(module):
+            stack = self._local.__dict__.setdefault("stack", [])
+            stack.append(0.0)
+            t0 = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                total = (time.perf_counter() - t0) * 1000
+                children = stack.pop()
+                if stack:
+                    stack[-1] += total
+                self.timings[name] = [total, total - children]
+
+        loader.exec_module = timed_exec
+        return spec
+
+    def report(self, top: int = 20, key: str = "self"):
+        idx = 1 if key == "self" else 0
+        rows = sorted(self.timings.items(), key=lambda kv: kv[1][idx], reverse=True)
+        return [(name, round(cum, 2), round(own, 2)) for name, (cum, own) in rows[:top]]
+
+
+import_timer = None
+if os.getenv("IMPORT_TIMING") == "1":
+    import_timer = ImportTimer()
+    sys.meta_path.insert(0, import_timer)
+
+
+def import_report(top: int = 20):
+    return import_timer.report(top) if import_timer else []
+
+
+def warm(app):
+    """Carrega o que os workers usariam na 1ª request, para ficar nas páginas compartilhadas."""
+    import email_validator  # noqa: F401  (import de CSV)
+    from sqlalchemy.orm import configure_mappers
+
+    lazy_import(f"{__package__}.forms").LoginForm  # noqa: B018  resolve o módulo adiado pelas rotas
+    configure_mappers()
+    app.url_map.update()
+    for name in app.jinja_env.list_templates(extensions=("html",)):
+        app.jinja_env.get_template(name)
+
+
+def _after_fork_in_child():
+    # conexões abertas no master não podem ser usadas pelo filho
+    from . import db
+    from .fragments import fragment_cache
+    from .ratelimit import limiter
+
+    app = _preloaded
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    backends = [limiter.backend, fragment_cache.backend, getattr(app.session_interface, "backend", None)]
+    for backend in backends:
+        if hasattr(backend, "_local"):
+            backend._local = threading.local()
+
+
+def preload(app):
+    """Aquece no master e congela o heap: o GC dos workers não toca nessas páginas."""
+    global _preloaded
+    t0 = time.perf_counter()
+    warm(app)
+    _preloaded = app
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+    gc.collect()
+    gc.freeze()
+    app.extensions["startup"]["preload_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    log.info("preload: %d objetos congelados", gc.get_freeze_count())
@@ -0,0 +1,82 @@
+# app/team.py – consultas da equipe (roster) com keyset pagination
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import contains_eager
+
+from . import db
+from .models import Membership, User
+
+TEAM_PAGE_SIZE = 50
+
+
+def encode_cursor(joined_at, member_id) -> str:
+    raw = f"{joined_at.isoformat() if joined_at else ''}|{member_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Retorna (joined_at, id) ou None se o cursor for inválido."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, member_id = raw.split("|", 1)
+        return (datetime.fromisoformat(ts) if ts else None), int(member_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def team_query(company_id: int, after=None, limit: int = TEAM_PAGE_SIZE):
+    # um único SELECT com JOIN em users; ordem estável por (joined_at, id)
+    stmt = (
+        select(Membership)
+        .join(Membership.user)
+        .options(contains_eager(Membership.user))
+        .where(Membership.company_id == company_id, Membership.is_active.is_(True))
+        .order_by(Membership.joined_at, Membership.id)
+        .limit(limit + 1)
+    )
+    if after:
+        joined_at, member_id = after
+        if joined_at is None:
+            stmt = stmt.where(
+                or_(
+                    Membership.joined_at.isnot(None),
+                    and_(Membership.joined_at.is_(None), Membership.id > member_id),
+                )
+            )
+        else:
+            stmt = stmt.where(
+                or_(
+                    Membership.joined_at > joined_at,
+                    and_(Membership.joined_at == joined_at, Membership.id > member_id),
+                )
+            )
+    return stmt
+
+
+def split_page(rows, limit: int = TEAM_PAGE_SIZE):
+    """Separa a linha extra (limit + 1) e devolve (página, próximo cursor)."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last.joined_at, last.id)
+
+
+def team_page(company_id: int, cursor=None, limit: int = TEAM_PAGE_SIZE):
+    stmt = team_query(company_id, after=decode_cursor(cursor), limit=limit)
+    return split_page(db.session.execute(stmt).scalars(), limit)
+
+
+def team_count_query(company_id: int):
+    return select(func.count(Membership.id)).where(
+        Membership.company_id == company_id, Membership.is_active.is_(True)
+    )
+
+
+def team_count(company_id: int) -> int:
+    return db.session.execute(team_count_query(company_id)).scalar_one()
@@ -0,0 +1,56 @@
+# app/templating.py – cache de bytecode do Jinja em disco + pré-compilação no build
+#
+# O Jinja guarda em cada arquivo o sha1 do fonte do template: se o conteúdo mudar,
+# o bytecode antigo é descartado e recompilado. Os workers compartilham o diretório
+# (escrita atômica), então só o primeiro compila; com `flask templates compile`
+# no build, nenhum compila.
+import pathlib
+import sys
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache, TemplateSyntaxError
+
+
+def compile_all(env) -> list:
+    """Compila todos os templates do app; devolve [(nome, erro)] dos que falharam."""
+    errors = []
+    for name in env.list_templates():
+        try:
+            env.get_template(name)
+        except TemplateSyntaxError as e:
+            errors.append((name, f"linha {e.lineno}: {e.message}"))
+    return errors
+
+
+templates_cli = AppGroup("templates", help="Templates Jinja.")
+
+
+@templates_cli.command("compile")
+@click.option("--check", is_flag=True, help="Só valida, sem gravar o cache de bytecode.")
+def compile_command(check):
+    """Pré-compila os templates para o cache de bytecode; falha se algum não compilar."""
+    env = current_app.jinja_env
+    if check:
+        env.bytecode_cache = None
+    elif env.bytecode_cache is None:
+        raise click.ClickException("JINJA_BYTECODE_CACHE vazio: nada para gravar (use --check).")
+    t0 = time.perf_counter()
+    errors = compile_all(env)
+    for name, message in errors:
+        click.echo(f"[erro] {name}: {message}", err=True)
+    total = len(env.list_templates())
+    click.echo(f"{total - len(errors)}/{total} templates compilados em {time.perf_counter() - t0:.2f}s.")
+    if errors:
+        sys.exit(1)
+
+
+def init_app(app):
+    app.config.setdefault("JINJA_BYTECODE_CACHE", "")
+    path = app.config["JINJA_BYTECODE_CACHE"]
+    if path:
+        pathlib.Path(path).mkdir(parents=True, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(path)
+    app.cli.add_command(templates_cli)
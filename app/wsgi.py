@@ -1,3 +1,10 @@
 # app/wsgi.py
-from . import create_app
+import os
+
+from . import create_app, startup
+
 wsgi_app = create_app()
+
+if os.getenv("WSGI_PRELOAD") == "1":
+    # gunicorn --preload: aquece no master e congela o heap antes do fork dos workers
+    startup.preload(wsgi_app)
@@ -0,0 +1,18 @@
+"""Teste de carga ponta a ponta: dataset multi-empresa sintético + cenários concorrentes.
+
+    python -m bench                              # perfil "smoke", compara com bench/baselines/smoke.json
+    python -m bench -p default -c 16 -d 60       # mais empresas/clientes/tempo
+    python -m bench --save-baseline              # grava o resultado como baseline do perfil (árvore limpa)
+    python -m bench --url http://staging:8000    # servidor já rodando (dataset semeado antes)
+    python -m bench.compare                      # WSGI x ASGI (app/asgi.py) nas rotas de leitura
+
+O resultado (JSON) vai para bench/results/; exit 1 se algum p95 ou o throughput
+piorar além da tolerância em relação ao baseline.
+
+Baselines dependem da máquina e não vão para o repositório (bench/baselines/ é
+ignorado). Baseline de outro host, de árvore suja ou de outra carga não é usado
+na comparação. No CI, grave-o no mesmo runner antes de medir o PR:
+
+    git checkout origin/main && python -m bench --save-baseline
+    git checkout - && python -m bench
+"""
@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from . import __doc__ as DOC
+from .client import Client
+from .scenarios import MIX, SCENARIOS, Shared, Skip, owner_login
+from .seed import Dataset, seed
+from .server import ROOT, default_cmd, free_port, server_env, start, stop
+from .stats import Recorder, compare, incomparable, summarize
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PROFILES = {
+    "smoke": {"companies": 20, "members": 50, "invites": 40, "clients": 8, "duration": 20, "warmup": 3},
+    "default": {"companies": 200, "members": 200, "invites": 200, "clients": 16, "duration": 60, "warmup": 5},
+}
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, vu_id, shared, mix, deadline, recorder, seed_):
+        super().__init__(name=f"vu-{vu_id}", daemon=True)
+        self.id = vu_id
+        self.shared = shared
+        self.deadline = deadline
+        self.recorder = recorder
+        self.rng = random.Random(seed_)
+        self.names, self.weights = zip(*mix.items())
+        companies = shared.dataset.companies
+        self.owner = shared.dataset.owner_emails()[vu_id % companies]
+        self.client = self.new_client()
+        self._n = 0
+
+    def new_client(self):
+        return Client(self.shared.base_url, self.recorder.request)
+
+    def next(self) -> int:
+        self._n += 1
+        return self._n
+
+    def _play(self, name, fn):
+        t0 = time.perf_counter()
+        try:
+            fn(self)
+        except Skip:
+            self.recorder.skip(name)
+        except Exception as e:  # noqa: BLE001 – qualquer falha vira erro do cenário
+            self.recorder.scenario(name, 0, error=f"{type(e).__name__}: {e}")
+        else:
+            self.recorder.scenario(name, (time.perf_counter() - t0) * 1000)
+
+    def run(self):
+        self._play("owner_login", owner_login)
+        while time.perf_counter() < self.deadline:
+            name = self.rng.choices(self.names, self.weights)[0]
+            self._play(name, SCENARIOS[name])
+
+
+def run_load(base_url, dataset, clients, duration, warmup, mix, seed_=1):
+    shared = Shared(base_url, dataset, run_id=int(time.time()))
+    t0 = time.perf_counter()
+    measure_from, deadline = t0 + warmup, t0 + warmup + duration
+    recorders = [Recorder(measure_from) for _ in range(clients)]
+    vus = [VirtualUser(i, shared, mix, deadline, recorders[i], seed_ * 1000 + i) for i in range(clients)]
+    for vu in vus:
+        vu.start()
+    for vu in vus:
+        vu.join()
+    # cenários em andamento no deadline terminam depois dele: mede o tempo real
+    seconds = time.perf_counter() - measure_from
+    return summarize(recorders, seconds)
+
+
+def git_info():
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True,
+                                  timeout=30).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {"commit": git("rev-parse", "--short", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def print_result(result, regressions):
+    print(f"\n{result['throughput_rps']} req/s em {result['seconds']}s, "
+          f"{result['errors_total']} cenários com erro")
+    fmt = "  {:<30} {:>6} {:>8} {:>8} {:>8} {:>8}"
+    print(fmt.format("cenário", "n", "p50", "p95", "p99", "erros"))
+    for name, s in result["scenarios"].items():
+        print(fmt.format(name, s["count"], s["p50"], s["p95"], s["p99"], s["errors"]))
+    print(fmt.format("request", "n", "p50", "p95", "p99", "srv p50"))
+    for name, s in result["requests"].items():
+        print(fmt.format(name, s["count"], s["p50"], s["p95"], s["p99"], s["server_p50"] or "-"))
+    for line in result["errors"][:5]:
+        print(f"  [erro] {line}")
+    for key, before, after in regressions:
+        print(f"  [regressão] {key}: {before} -> {after}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=DOC.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=DOC)
+    parser.add_argument("-p", "--profile", choices=sorted(PROFILES), default="smoke")
+    parser.add_argument("-c", "--clients", type=int, help="clientes virtuais concorrentes")
+    parser.add_argument("-d", "--duration", type=float, help="segundos medidos (após o aquecimento)")
+    parser.add_argument("--companies", type=int)
+    parser.add_argument("--members", type=int, help="membros por empresa")
+    parser.add_argument("--invites", type=int, help="convites por empresa")
+    parser.add_argument("--mix", help='pesos dos cenários, ex.: "dashboard=50,login=10"')
+    parser.add_argument("--hash-method", default=os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256"))
+    parser.add_argument("--server", help="comando do servidor; {port} é substituído "
+                                         '(ex.: "gunicorn -w 4 -b 127.0.0.1:{port} app.wsgi:wsgi_app")')
+    parser.add_argument("--url", help="servidor já rodando (semeie antes com --seed-only)")
+    parser.add_argument("--seed-only", metavar="DATABASE_URL", help="só semeia o banco e sai")
+    parser.add_argument("--baseline", help="arquivo de baseline (padrão: bench/baselines/<perfil>.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="piora relativa aceita (0.3 = 30%%)")
+    parser.add_argument("--min-ms", type=float, default=25, help="piora absoluta mínima de um p95 (ruído)")
+    parser.add_argument("-o", "--output", help="arquivo do resultado (padrão: bench/results/)")
+    args = parser.parse_args()
+
+    cfg = dict(PROFILES[args.profile])
+    for key in ("clients", "duration", "companies", "members", "invites"):
+        if getattr(args, key) is not None:
+            cfg[key] = getattr(args, key)
+    dataset = Dataset(cfg["companies"], cfg["members"], cfg["invites"])
+    mix = dict(MIX)
+    if args.mix:
+        mix = {k: float(v) for k, v in (item.split("=") for item in args.mix.split(","))}
+        unknown = set(mix) - set(SCENARIOS)
+        if unknown:
+            parser.error(f"cenários desconhecidos: {', '.join(sorted(unknown))}")
+
+    git = git_info()
+    if args.save_baseline and git["dirty"]:
+        parser.error("árvore com alterações: faça commit (ou stash) antes de --save-baseline")
+
+    if args.seed_only:
+        t0 = time.perf_counter()
+        counts = seed(args.seed_only, dataset, args.hash_method)
+        print(f"semeado em {time.perf_counter() - t0:.1f}s: {counts}")
+        return
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        proc = None
+        if args.url:
+            base_url = args.url
+        else:
+            db_url = f"sqlite:///{tmp}/bench.db"
+            t0 = time.perf_counter()
+            counts = seed(db_url, dataset, args.hash_method)
+            print(f"dataset semeado em {time.perf_counter() - t0:.1f}s: {counts}")
+            port = free_port()
+            cmd = shlex.split(args.server.format(port=port)) if args.server else default_cmd(port)
+            proc, base_url = start(cmd, server_env(tmp, db_url, PASSWORD_HASH_METHOD=args.hash_method), port)
+        print(f"{cfg['clients']} clientes, {cfg['warmup']}s aquecimento + {cfg['duration']}s contra {base_url}")
+        try:
+            result = run_load(base_url, dataset, cfg["clients"], cfg["duration"], cfg["warmup"], mix)
+        finally:
+            if proc is not None:
+                stop(proc)
+
+    result = {
+        "profile": args.profile,
+        "git": git,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "config": {**cfg, "dataset": dataset.as_dict(), "mix": mix, "hash_method": args.hash_method,
+                   "server": args.url or args.server or "werkzeug threaded"},
+        **result,
+    }
+
+    baseline_path = args.baseline or os.path.join(HERE, "baselines", f"{args.profile}.json")
+    regressions, skipped = [], None
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        skipped = incomparable(result, baseline)
+        if skipped is None:
+            regressions = compare(result, baseline, tolerance=args.tolerance, min_ms=args.min_ms)
+        result["baseline"] = {"path": os.path.relpath(baseline_path, ROOT), "skipped": skipped,
+                              "regressions": [list(r) for r in regressions]}
+
+    out = args.output or os.path.join(
+        HERE, "results", f"{args.profile}-{result['git']['commit'] or 'nogit'}-{int(time.time())}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+
+    print_result(result, regressions)
+    if skipped:
+        print(f"  [baseline ignorado] {skipped}")
+    elif not os.path.exists(baseline_path):
+        print("  [sem baseline] grave um nesta máquina com --save-baseline")
+    print(f"resultado: {os.path.relpath(out, ROOT)}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
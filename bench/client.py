@@ -0,0 +1,85 @@
+# bench/client.py – "navegador" mínimo: cookies, CSRF do formulário e redirects medidos um a um
+import re
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+_CSRF = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+_TIMING = re.compile(r"total;dur=([\d.]+)")
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def location(self):
+        return self.headers.get("Location", "")
+
+    def text(self):
+        return self.body.decode("utf-8", "replace")
+
+    def csrf(self) -> str:
+        m = _CSRF.search(self.text())
+        if not m:
+            raise AssertionError("página sem csrf_token")
+        return m.group(1)
+
+
+class Client:
+    """Um usuário: cookie jar próprio; cada request (inclusive redirect) vira uma amostra."""
+
+    def __init__(self, base_url: str, record, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.record = record  # record(nome, ms, status, server_ms)
+        self.timeout = timeout
+        self._opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()), _NoRedirect)
+
+    def request(self, method, path, data=None, name=None, expect=(200,)):
+        url = path if path.startswith("http") else self.base_url + path
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(url, data=body, method=method)
+        t0 = time.perf_counter()
+        try:
+            with self._opener.open(req, timeout=self.timeout) as r:
+                resp = Response(r.status, r.headers, r.read())
+        except urllib.error.HTTPError as e:  # 3xx/4xx/5xx chegam aqui sem redirect automático
+            resp = Response(e.code, e.headers, e.read())
+        ms = (time.perf_counter() - t0) * 1000
+        m = _TIMING.search(resp.headers.get("Server-Timing", ""))
+        self.record(name or f"{method} {_route(path)}", ms, resp.status, float(m.group(1)) if m else None)
+        if resp.status not in expect:
+            raise AssertionError(f"{method} {path}: {resp.status} (esperado {expect})")
+        return resp
+
+    def get(self, path, **kw):
+        return self.request("GET", path, **kw)
+
+    def post(self, path, data, **kw):
+        kw.setdefault("expect", (302,))
+        return self.request("POST", path, data=data, **kw)
+
+    def follow(self, resp, **kw):
+        """Segue o redirect de `resp` (uma request medida)."""
+        parts = urllib.parse.urlsplit(resp.location)
+        return self.get((parts.path or "/") + (f"?{parts.query}" if parts.query else ""), **kw)
+
+    def form(self, path, data, **kw):
+        """GET do formulário (para o CSRF) + POST; devolve a resposta do POST."""
+        page = self.get(path)
+        return self.post(path, {"csrf_token": page.csrf(), **data}, **kw)
+
+
+def _route(path: str) -> str:
+    # agrupa /invites/123/revoke e query strings por rota
+    path = urllib.parse.urlsplit(path).path
+    return re.sub(r"/\d+(?=/|$)", "/<id>", path)
@@ -0,0 +1,102 @@
+"""WSGI x ASGI no mesmo dataset: throughput e p95 das leituras com concorrência crescente.
+
+    pip install -r requirements-asgi.txt
+    python -m bench.compare                          # 8, 32 e 64 clientes, 15 s cada
+    python -m bench.compare -c 16,128 -d 30 --workers 2
+
+Os dois modos rodam no uvicorn (mesmo servidor HTTP), cada um numa cópia do
+banco semeado; só muda a camada do app: app.wsgi (threads) ou app.asgi
+(AsyncSession no event loop). O cache de fragmentos usa o padrão do app
+("file", com ETag/304); --fragment-cache off faz toda request chegar ao banco.
+"""
+import argparse
+import json
+import os
+import shlex
+import shutil
+import tempfile
+import time
+
+from . import __main__ as bench
+from .seed import Dataset, seed
+from .server import ROOT, free_port, server_env, start, stop
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+MODES = {
+    "wsgi": "uvicorn --interface wsgi --workers {workers} --port {port} --no-access-log app.wsgi:wsgi_app",
+    "asgi": "uvicorn --workers {workers} --port {port} --no-access-log app.asgi:asgi_app",
+}
+# só as rotas servidas pelo caminho async (leituras), no peso do mix principal
+READ_MIX = {"dashboard": 60, "invites_list": 30, "invite_view": 10}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument("-c", "--clients", default="8,32,64", help="níveis de concorrência, separados por vírgula")
+    parser.add_argument("-d", "--duration", type=float, default=15)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="processos do uvicorn em cada modo")
+    parser.add_argument("--companies", type=int, default=50)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--invites", type=int, default=100)
+    parser.add_argument("--modes", default="wsgi,asgi")
+    parser.add_argument("--fragment-cache", default="file", choices=("file", "memory", "off"))
+    # o login de cada cliente não é o que se compara: hash barato acelera o aquecimento
+    parser.add_argument("--hash-method", default="pbkdf2:sha256:1000")
+    parser.add_argument("-o", "--output", help="arquivo do resultado (padrão: bench/results/)")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.clients.split(",")]
+    modes = args.modes.split(",")
+    dataset = Dataset(args.companies, args.members, args.invites)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-compare-") as tmp:
+        seeded = os.path.join(tmp, "seed.db")
+        t0 = time.perf_counter()
+        counts = seed(f"sqlite:///{seeded}", dataset, args.hash_method)
+        print(f"dataset semeado em {time.perf_counter() - t0:.1f}s: {counts}")
+        for mode in modes:
+            work = os.path.join(tmp, mode)
+            os.makedirs(work)
+            shutil.copy(seeded, os.path.join(work, "bench.db"))
+            port = free_port()
+            cmd = shlex.split(MODES[mode].format(workers=args.workers, port=port))
+            # hash inline: com dezenas de logins simultâneos o pool de hash responderia 503
+            env = server_env(work, f"sqlite:///{work}/bench.db", PASSWORD_HASH_METHOD=args.hash_method,
+                             PASSWORD_HASH_WORKERS="0", FRAGMENT_CACHE_BACKEND=args.fragment_cache,
+                             CONDITIONAL_GET="1" if args.fragment_cache == "file" else "0")
+            proc, base_url = start(cmd, env, port)
+            try:
+                for clients in levels:
+                    r = bench.run_load(base_url, dataset, clients, args.duration, args.warmup, READ_MIX)
+                    results.setdefault(mode, {})[clients] = r
+                    print(f"{mode} c={clients}: {r['throughput_rps']} req/s, {r['errors_total']} erros")
+            finally:
+                stop(proc)
+
+    fmt = "  {:<6} {:>8} {:>10} " + " ".join(["{:>22}"] * 3)
+    routes = ["GET /dashboard", "GET /invites", "GET /accept-invite"]
+    print()
+    print(fmt.format("modo", "clientes", "req/s", *[f"{r} p50/p95" for r in routes]))
+    for clients in levels:
+        for mode in modes:
+            r = results[mode][clients]
+            cols = []
+            for name in routes:
+                s = r["requests"].get(name)
+                cols.append(f"{s['p50']}/{s['p95']}" if s else "-")
+            print(fmt.format(mode, clients, r["throughput_rps"], *cols))
+
+    out = args.output or os.path.join(HERE, "results", f"compare-{int(time.time())}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"git": bench.git_info(), "config": {**vars(args), "dataset": dataset.as_dict(),
+                                                       "mix": READ_MIX, "modes": MODES},
+                   "results": results}, f, indent=2)
+    print(f"resultado: {os.path.relpath(out, ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
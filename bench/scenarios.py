@@ -0,0 +1,121 @@
+# bench/scenarios.py – fluxos reais de usuário, sorteados por peso em cada cliente virtual
+#
+# Cada cliente virtual é o dono de uma empresa já logado (dashboard/convites);
+# login, aceite de convite e cadastro usam um navegador novo, sem cookies.
+import re
+import threading
+
+from .seed import DOMAIN, PASSWORD
+
+_REVOKE = re.compile(r'/invites/(\d+)/revoke')
+
+# peso relativo de cada cenário no mix
+MIX = {
+    "dashboard": 35,
+    "invites_list": 20,
+    "login": 10,
+    "invite_create": 10,
+    "invite_revoke": 8,
+    "accept_invite": 7,
+    "register": 5,
+}
+
+
+class Skip(Exception):
+    """Cenário sem dados disponíveis (ex.: tokens de convite esgotados)."""
+
+
+class Shared:
+    """Estado comum aos clientes virtuais: dataset e tokens de uso único."""
+
+    def __init__(self, base_url, dataset, run_id):
+        self.base_url = base_url
+        self.dataset = dataset
+        self.run_id = run_id
+        self.members = dataset.member_emails()
+        self.tokens = tuple(dataset.pending_tokens())
+        self._tokens = list(self.tokens)
+        self._lock = threading.Lock()
+
+    def take_token(self):
+        with self._lock:
+            if not self._tokens:
+                raise Skip("tokens de convite esgotados")
+            return self._tokens.pop()
+
+
+def _expect_location(resp, path):
+    if not resp.location.split("?")[0].endswith(path):
+        raise AssertionError(f"redirect para {resp.location!r}, esperado {path}")
+
+
+def owner_login(vu):
+    resp = vu.client.form("/login", {"email": vu.owner, "password": PASSWORD})
+    _expect_location(resp, "/dashboard")
+
+
+def login(vu):
+    c = vu.new_client()
+    resp = c.form("/login", {"email": vu.rng.choice(vu.shared.members), "password": PASSWORD})
+    _expect_location(resp, "/dashboard")
+    c.follow(resp)
+
+
+def dashboard(vu):
+    vu.client.get("/dashboard")
+
+
+def invites_list(vu):
+    vu.client.get("/invites")
+
+
+def invite_create(vu):
+    email = f"new-{vu.shared.run_id}-{vu.id}-{vu.next()}@{DOMAIN}"
+    resp = vu.client.form("/invites", {"email": email, "role": "viewer", "days_valid": "7"})
+    _expect_location(resp, "/invites")
+    vu.client.follow(resp)
+
+
+def invite_revoke(vu):
+    ids = _REVOKE.findall(vu.client.get("/invites").text())
+    if not ids:
+        raise Skip("nenhum convite pendente")
+    resp = vu.client.post(f"/invites/{vu.rng.choice(ids)}/revoke", {})
+    _expect_location(resp, "/invites")
+    vu.client.follow(resp)
+
+
+def accept_invite(vu):
+    c = vu.new_client()
+    resp = c.form(f"/accept-invite?token={vu.shared.take_token()}", {
+        "first_name": "Convidado", "last_name": "Bench", "password": PASSWORD, "confirm": PASSWORD,
+    })
+    _expect_location(resp, "/dashboard")
+    c.follow(resp)
+
+
+def invite_view(vu):
+    # só abre o link do convite (validação do token), sem aceitar: leitura pura
+    vu.new_client().get(f"/accept-invite?token={vu.rng.choice(vu.shared.tokens)}")
+
+
+def register(vu):
+    c = vu.new_client()
+    email = f"reg-{vu.shared.run_id}-{vu.id}-{vu.next()}@{DOMAIN}"
+    resp = c.form("/register/company/step-1", {
+        "first_name": "Nova", "last_name": "Conta", "email": email,
+        "password": PASSWORD, "confirm": PASSWORD, "tz": "America/Sao_Paulo",
+    })
+    _expect_location(resp, "/register/company/step-2")
+    resp = c.form("/register/company/step-2", {
+        "company_legal_name": f"Empresa {email}", "country": "BR", "company_tz": "America/Sao_Paulo",
+    })
+    _expect_location(resp, "/register/company/confirm")
+    resp = c.form("/register/company/confirm", {"accept_terms": "y"})
+    _expect_location(resp, "/dashboard")
+    c.follow(resp)
+
+
+SCENARIOS = {fn.__name__: fn for fn in (
+    dashboard, invites_list, login, invite_create, invite_revoke, accept_invite, invite_view, register,
+)}
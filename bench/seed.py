@@ -0,0 +1,99 @@
+# bench/seed.py – dataset sintético multi-empresa via SQLAlchemy Core (executemany em lotes)
+#
+# Tudo é determinístico a partir das contagens: o runner sabe quais e-mails,
+# senhas e tokens existem sem consultar o banco (útil com --url remoto).
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from werkzeug.security import generate_password_hash
+
+PASSWORD = "bench-senha-123"
+DOMAIN = "bench.example.com"
+MEMBER_ROLES = ("admin", "manager", "operator", "viewer", "viewer")
+CHUNK = 5000
+
+
+def owner_email(c: int) -> str:
+    return f"owner-{c}@{DOMAIN}"
+
+
+def member_email(c: int, m: int) -> str:
+    return f"u{c}-{m}@{DOMAIN}"
+
+
+def invite_token(c: int, i: int) -> str:
+    return f"bench-{c}-{i}"
+
+
+def invite_state(i: int) -> str:
+    # metade pendente, o resto dividido entre aceitos e expirados
+    return ("pending", "accepted", "pending", "expired")[i % 4]
+
+
+class Dataset:
+    def __init__(self, companies: int, members: int, invites: int):
+        self.companies = companies
+        self.members = members
+        self.invites = invites
+
+    def owner_emails(self):
+        return [owner_email(c) for c in range(1, self.companies + 1)]
+
+    def member_emails(self):
+        return [member_email(c, m) for c in range(1, self.companies + 1) for m in range(self.members)]
+
+    def pending_tokens(self):
+        """Tokens de convites pendentes para e-mails sem conta (aceitáveis uma vez cada)."""
+        return [invite_token(c, i) for c in range(1, self.companies + 1)
+                for i in range(self.invites) if invite_state(i) == "pending"]
+
+    def as_dict(self):
+        return {"companies": self.companies, "members": self.members, "invites": self.invites}
+
+
+def _chunks(rows):
+    for i in range(0, len(rows), CHUNK):
+        yield rows[i:i + CHUNK]
+
+
+def seed(url: str, ds: Dataset, hash_method: str = "pbkdf2:sha256") -> dict:
+    """Cria o schema e insere o dataset; devolve as contagens de linhas."""
+    from app import db
+    from app.models import Company, Invite, Membership, User
+
+    now = datetime.utcnow()
+    # um único hash para todo mundo: pbkdf2 por linha levaria minutos
+    pwhash = generate_password_hash(PASSWORD, hash_method)
+    companies, users, mems, invs = [], [], [], []
+    for c in range(1, ds.companies + 1):
+        owner_id = len(users) + 1
+        companies.append({"id": c, "legal_name": f"Bench {c} Ltda", "trade_name": f"Bench {c}",
+                          "owner_user_id": owner_id, "created_at": now - timedelta(days=c % 365)})
+        users.append({"id": owner_id, "email": owner_email(c), "password_hash": pwhash,
+                      "first_name": "Dono", "last_name": str(c)})
+        mems.append({"user_id": owner_id, "company_id": c, "role": "owner", "is_active": True,
+                     "joined_at": now - timedelta(days=400)})
+        for m in range(ds.members):
+            uid = len(users) + 1
+            users.append({"id": uid, "email": member_email(c, m), "password_hash": pwhash,
+                          "first_name": "Membro", "last_name": f"{c}-{m}"})
+            mems.append({"user_id": uid, "company_id": c, "role": MEMBER_ROLES[m % len(MEMBER_ROLES)],
+                         "is_active": m % 10 != 9, "joined_at": now - timedelta(minutes=m * 7)})
+        for i in range(ds.invites):
+            state = invite_state(i)
+            invs.append({
+                "company_id": c, "email": f"inv{c}-{i}@{DOMAIN}", "role": "viewer",
+                "token": invite_token(c, i), "created_at": now - timedelta(hours=i),
+                "expires_at": now - timedelta(days=1) if state == "expired" else now + timedelta(days=7),
+                "accepted_at": now - timedelta(hours=i) if state == "accepted" else None,
+            })
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        db.metadata.create_all(conn)
+        for model, rows in ((Company, companies), (User, users), (Membership, mems), (Invite, invs)):
+            for chunk in _chunks(rows):
+                conn.execute(insert(model), chunk)
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    return {"companies": len(companies), "users": len(users), "memberships": len(mems), "invites": len(invs)}
@@ -0,0 +1,84 @@
+# bench/server.py – sobe o app num processo separado, com banco/sessões/caches temporários
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_env(tmp: str, database_url: str, **extra) -> dict:
+    return {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "SECRET_KEY": "bench",
+        "DATABASE_URL": database_url,
+        "SESSION_STORE_PATH": os.path.join(tmp, "sessions.db"),
+        "FRAGMENT_CACHE_PATH": os.path.join(tmp, "fragments.db"),
+        "RATELIMIT_SQLITE_PATH": os.path.join(tmp, "ratelimit.db"),
+        "JINJA_BYTECODE_CACHE": os.path.join(tmp, "jinja_cache"),
+        "MAIL_FILE_PATH": os.path.join(tmp, "mail"),
+        # todos os clientes vêm de 127.0.0.1: o limiter barraria o teste, não o app
+        "RATELIMIT_ENABLED": "0",
+        # e-mails ficam na outbox; a entrega não compete com as requests medidas
+        "OUTBOX_INTERVAL": "0",
+        "INVITE_SWEEP_INTERVAL": "0",
+        # tempo do servidor por request (bench/client.py lê o Server-Timing)
+        "SERVER_TIMING": "1",
+        **extra,
+    }
+
+
+def start(cmd, env, port: int, timeout: float = 60):
+    """Inicia `cmd` e espera /livez responder; devolve (processo, url base)."""
+    proc = subprocess.Popen(cmd, env=env, cwd=ROOT)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"servidor saiu com código {proc.returncode}")
+        try:
+            with urllib.request.urlopen(url + "/livez", timeout=1):
+                return proc, url
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"servidor não respondeu em {timeout:.0f}s")
+
+
+def stop(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def default_cmd(port: int):
+    return [sys.executable, "-m", "bench.server", str(port)]
+
+
+def main():
+    # servidor de desenvolvimento com threads: reproduzível sem gunicorn instalado
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    from app.wsgi import wsgi_app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):  # uma linha por request distorce a medição
+            pass
+
+    make_server("127.0.0.1", int(sys.argv[1]), wsgi_app, threaded=True,
+                request_handler=QuietHandler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# bench/stats.py – amostras por cliente, percentis e comparação com baseline
+import math
+import time
+from collections import Counter, defaultdict
+
+
+def percentile(sorted_values, p: float) -> float:
+    """Nearest-rank: o menor valor com pelo menos p% das amostras abaixo ou igual."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[k]
+
+
+class Recorder:
+    """Amostras de um cliente virtual (sem lock: cada thread tem o seu)."""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from  # perf_counter; antes disso é aquecimento
+        self.requests = defaultdict(list)
+        self.server_ms = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.scenarios = defaultdict(list)
+        self.failures = Counter()
+        self.skipped = Counter()
+        self.errors = []
+
+    def measuring(self) -> bool:
+        return time.perf_counter() >= self.measure_from
+
+    def request(self, name, ms, status, server_ms):
+        if not self.measuring():
+            return
+        self.requests[name].append(ms)
+        self.statuses[name][status] += 1
+        if server_ms is not None:
+            self.server_ms[name].append(server_ms)
+
+    def skip(self, name):
+        if self.measuring():
+            self.skipped[name] += 1
+
+    def scenario(self, name, ms, error=None):
+        if not self.measuring():
+            return
+        if error is None:
+            self.scenarios[name].append(ms)
+            return
+        self.failures[name] += 1
+        if len(self.errors) < 20:
+            self.errors.append(f"{name}: {error}")
+
+
+def _summary(values, seconds):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "per_s": round(len(values) / seconds, 2),
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "mean": round(sum(values) / len(values), 2) if values else 0.0,
+        "max": round(values[-1], 2) if values else 0.0,
+    }
+
+
+def summarize(recorders, seconds: float) -> dict:
+    requests, server_ms, statuses = defaultdict(list), defaultdict(list), defaultdict(Counter)
+    scenarios, failures, skipped, errors = defaultdict(list), Counter(), Counter(), []
+    for r in recorders:
+        for name, values in r.requests.items():
+            requests[name] += values
+            statuses[name].update(r.statuses[name])
+        for name, values in r.server_ms.items():
+            server_ms[name] += values
+        for name, values in r.scenarios.items():
+            scenarios[name] += values
+        failures.update(r.failures)
+        skipped.update(r.skipped)
+        errors += r.errors
+
+    out_requests = {}
+    for name in sorted(requests):
+        s = _summary(requests[name], seconds)
+        s["server_p50"] = round(percentile(sorted(server_ms[name]), 50), 2) if server_ms[name] else None
+        s["statuses"] = {str(k): v for k, v in sorted(statuses[name].items())}
+        out_requests[name] = s
+    out_scenarios = {}
+    for name in sorted(set(scenarios) | set(failures) | set(skipped)):
+        s = _summary(scenarios[name], seconds)
+        s["errors"] = failures[name]
+        s["skipped"] = skipped[name]
+        out_scenarios[name] = s
+    total = sum(len(v) for v in requests.values())
+    return {
+        "seconds": round(seconds, 2),
+        "throughput_rps": round(total / seconds, 2),
+        "requests_total": total,
+        "errors_total": sum(failures.values()),
+        "scenarios": out_scenarios,
+        "requests": out_requests,
+        "errors": errors[:20],
+    }
+
+
+def incomparable(result: dict, baseline: dict):
+    """Motivo para o baseline não servir de referência para `result`, ou None.
+
+    Throughput e p95 só dizem algo contra a mesma máquina, árvore limpa e mesma carga.
+    """
+    if baseline.get("git", {}).get("dirty"):
+        return f"baseline gravado com árvore suja ({baseline['git'].get('commit')})"
+    if baseline.get("host") != result["host"]:
+        return f"baseline de outra máquina ({baseline.get('host')} x {result['host']})"
+    keys = ("dataset", "clients", "duration", "mix", "hash_method", "server")
+    diff = [k for k in keys if baseline.get("config", {}).get(k) != result["config"].get(k)]
+    if diff:
+        return f"configuração diferente do baseline: {', '.join(diff)}"
+    return None
+
+
+def compare(result: dict, baseline: dict, tolerance: float = 0.3, min_ms: float = 25.0,
+            min_count: int = 20) -> list:
+    """Regressões de `result` frente ao baseline: [(chave, antes, depois)].
+
+    p95 conta só se piorar mais que `tolerance` (relativo) E mais que `min_ms`
+    (absoluto), e com pelo menos `min_count` amostras nos dois lados; throughput
+    regride se cair mais que `tolerance`; erros, se surgirem onde não havia.
+    """
+    out = []
+    for section in ("scenarios", "requests"):
+        for name, base in baseline.get(section, {}).items():
+            cur = result.get(section, {}).get(name)
+            if cur is None or min(cur["count"], base["count"]) < min_count:
+                continue
+            if cur["p95"] > base["p95"] * (1 + tolerance) and cur["p95"] - base["p95"] > min_ms:
+                out.append((f"{section}.{name}.p95", base["p95"], cur["p95"]))
+            if section == "scenarios" and cur["errors"] > base.get("errors", 0):
+                out.append((f"{section}.{name}.errors", base.get("errors", 0), cur["errors"]))
+    if result["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        out.append(("throughput_rps", baseline["throughput_rps"], result["throughput_rps"]))
+    return out
@@ -0,0 +1,26 @@
+"""index for keyset pagination of invites in the JSON API
+
+Revision ID: a41c0e6b9d27
+Revises: ee1155d1cacd
+Create Date: 2026-10-18 13:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41c0e6b9d27'
+down_revision = 'ee1155d1cacd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('invites', schema=None) as batch_op:
+        batch_op.create_index('ix_invites_company', ['company_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('invites', schema=None) as batch_op:
+        batch_op.drop_index('ix_invites_company')
@@ -0,0 +1,27 @@
+"""session version that survives a same-password rehash
+
+Revision ID: c5d2f8a1b3e4
+Revises: a41c0e6b9d27
+Create Date: 2026-10-18 16:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d2f8a1b3e4'
+down_revision = 'a41c0e6b9d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NULL nas contas existentes: a versão continua derivada do hash até a próxima troca/rehash
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('session_key', sa.String(length=16), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('session_key')
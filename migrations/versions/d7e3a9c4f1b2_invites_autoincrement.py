@@ -0,0 +1,39 @@
+"""invites ids are never reused (AUTOINCREMENT)
+
+Revision ID: d7e3a9c4f1b2
+Revises: c5d2f8a1b3e4
+Create Date: 2026-10-18 18:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e3a9c4f1b2'
+down_revision = 'c5d2f8a1b3e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # sem AUTOINCREMENT o SQLite reaproveita o maior id depois do DELETE da varredura,
+    # e o convite novo colidia com o arquivado de mesmo id
+    with op.batch_alter_table('invites', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        pass
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    # ids já arquivados acima do maior convite vivo também não podem voltar
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'invites'")
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'invites', max("
+        "(SELECT coalesce(max(id), 0) FROM invites), "
+        "(SELECT coalesce(max(id), 0) FROM invites_archive))"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('invites', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        pass
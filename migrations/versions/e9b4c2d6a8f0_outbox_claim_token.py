@@ -0,0 +1,27 @@
+"""outbox claim token
+
+Revision ID: e9b4c2d6a8f0
+Revises: d7e3a9c4f1b2
+Create Date: 2026-10-18 18:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b4c2d6a8f0'
+down_revision = 'd7e3a9c4f1b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # reservas em andamento no deploy ficam sem token: o lease vence e elas voltam à fila
+    with op.batch_alter_table('outbox', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claim_token', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('outbox', schema=None) as batch_op:
+        batch_op.drop_column('claim_token')
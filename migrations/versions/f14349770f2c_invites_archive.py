@@ -0,0 +1,41 @@
+"""invites archive
+
+Revision ID: f14349770f2c
+Revises: 7acd7f7d7e29
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f14349770f2c'
+down_revision = '7acd7f7d7e29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('invites_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=160), nullable=False),
+    sa.Column('role', sa.String(length=16), nullable=True),
+    sa.Column('token', sa.String(length=64), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('accepted_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.Column('reason', sa.String(length=16), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('invites_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_invites_archive_company', ['company_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('invites_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_invites_archive_company')
+
+    op.drop_table('invites_archive')
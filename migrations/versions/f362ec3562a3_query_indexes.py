@@ -0,0 +1,40 @@
+"""indexes for pending/used invites and membership lookups
+
+Revision ID: f362ec3562a3
+Revises: f14349770f2c
+Create Date: 2026-10-18 09:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f362ec3562a3'
+down_revision = 'f14349770f2c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('invites', schema=None) as batch_op:
+        batch_op.create_index('ix_invites_pending', ['company_id', 'expires_at'], unique=False,
+                              sqlite_where=sa.text('accepted_at IS NULL'),
+                              postgresql_where=sa.text('accepted_at IS NULL'))
+        batch_op.create_index('ix_invites_used', ['company_id', 'accepted_at'], unique=False,
+                              sqlite_where=sa.text('accepted_at IS NOT NULL'),
+                              postgresql_where=sa.text('accepted_at IS NOT NULL'))
+
+    with op.batch_alter_table('memberships', schema=None) as batch_op:
+        batch_op.create_index('ix_memberships_user_active', ['user_id', 'is_active'], unique=False)
+        batch_op.create_index('ix_memberships_roster', ['company_id', 'is_active', 'joined_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('memberships', schema=None) as batch_op:
+        batch_op.drop_index('ix_memberships_roster')
+        batch_op.drop_index('ix_memberships_user_active')
+
+    with op.batch_alter_table('invites', schema=None) as batch_op:
+        batch_op.drop_index('ix_invites_used')
+        batch_op.drop_index('ix_invites_pending')
@@ -0,0 +1,133 @@
+"""Benchmark de partida: tempo até a 1ª request e RSS por worker.
+
+    python scripts/bench_startup.py            # cold start (eager vs FAST_START) + preload/fork
+    python scripts/bench_startup.py -n 5 -w 4 --imports
+
+Cada medição roda num processo novo, com banco/sessões temporários.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLD = """
+import json, time
+from app.wsgi import wsgi_app
+r = wsgi_app.test_client().get("/login")
+assert r.status_code == 200, r.status_code
+print(json.dumps({"ready": time.perf_counter(), "rss_kb": RSS(), **wsgi_app.extensions["startup"]}))
+"""
+
+FORK = """
+import gc, json, os, sys
+from app.wsgi import wsgi_app
+workers = int(sys.argv[1])
+pipes = []
+for _ in range(workers):
+    r, w = os.pipe()
+    if os.fork() == 0:
+        os.close(r)
+        wsgi_app.test_client().get("/login")
+        gc.collect()  # um ciclo do GC no worker: sem freeze ele suja as páginas herdadas
+        os.write(w, json.dumps(SMAPS()).encode())
+        os._exit(0)
+    os.close(w)
+    pipes.append(r)
+out = []
+for r in pipes:
+    out.append(json.loads(os.read(r, 4096)))
+    os.wait()
+print(json.dumps(out))
+"""
+
+PROC = """
+def RSS():
+    for line in open("/proc/self/status"):
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+
+def SMAPS():
+    out = {}
+    for line in open("/proc/self/smaps_rollup"):
+        parts = line.split()
+        if parts[0] in ("Rss:", "Pss:", "Private_Dirty:", "Shared_Clean:", "Shared_Dirty:"):
+            out[parts[0][:-1]] = int(parts[1])
+    return out
+"""
+
+
+def _env(tmp, **extra):
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+        "SESSION_BACKEND": "memory",
+        "PASSWORD_HASH_WORKERS": "0",
+        **extra,
+    }
+    return env
+
+
+def cold_start(runs: int, tmp: str, **extra):
+    ready, rss, create = [], [], []
+    last = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-c", PROC + COLD], env=_env(tmp, **extra),
+            capture_output=True, text=True, check=True, cwd=ROOT,
+        )
+        ready.append((time.perf_counter() - t0) * 1000)
+        last = json.loads(proc.stdout.strip().splitlines()[-1])
+        rss.append(last["rss_kb"])
+        create.append(last["create_app_ms"])
+    return {
+        "first_request_ms": round(statistics.median(ready), 1),
+        "create_app_ms": round(statistics.median(create), 1),
+        "rss_mb": round(statistics.median(rss) / 1024, 1),
+        "imports": last.get("imports", []),
+    }
+
+
+def fork_workers(workers: int, tmp: str, **extra):
+    proc = subprocess.run(
+        [sys.executable, "-c", PROC + FORK, str(workers)], env=_env(tmp, **extra),
+        capture_output=True, text=True, check=True, cwd=ROOT,
+    )
+    stats = json.loads(proc.stdout.strip().splitlines()[-1])
+    mean = lambda k: round(statistics.mean(s[k] for s in stats) / 1024, 1)  # noqa: E731
+    return {"rss_mb": mean("Rss"), "pss_mb": mean("Pss"), "private_dirty_mb": mean("Private_Dirty")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--runs", type=int, default=3)
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    parser.add_argument("--imports", action="store_true", help="top imports (IMPORT_TIMING=1)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        timing = {"IMPORT_TIMING": "1"} if args.imports else {}
+        print("cold start (mediana de %d processos)" % args.runs)
+        for label, extra in (("eager", {"FAST_START": "0"}), ("fast", {"FAST_START": "1"})):
+            res = cold_start(args.runs, tmp, **extra, **timing)
+            print(f"  {label:<6} 1ª request {res['first_request_ms']:>7} ms | "
+                  f"create_app {res['create_app_ms']:>6} ms | RSS {res['rss_mb']} MB")
+            for name, cum, own in res["imports"][:10]:
+                print(f"           {own:>8.1f} ms próprio {cum:>8.1f} ms total  {name}")
+
+        print(f"preload + fork ({args.workers} workers, média por worker)")
+        for label, extra in (("fork sem freeze", {}), ("preload+freeze", {"WSGI_PRELOAD": "1"})):
+            res = fork_workers(args.workers, tmp, FAST_START="1", **extra)
+            print(f"  {label:<15} RSS {res['rss_mb']} MB | PSS {res['pss_mb']} MB | "
+                  f"privado sujo {res['private_dirty_mb']} MB")
+
+
+if __name__ == "__main__":
+    main()
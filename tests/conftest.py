@@ -0,0 +1,52 @@
+# tests/conftest.py – app com banco SQLite temporário semeado pelo dataset do bench
+import pytest
+
+from app.querywatch import watch
+from bench.seed import PASSWORD, Dataset, owner_email, seed
+
+DATASET = Dataset(companies=2, members=40, invites=20)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    seed(url, DATASET, "pbkdf2:sha256:1000")
+    for key, value in {
+        "DATABASE_URL": url,
+        "SESSION_STORE_PATH": str(tmp_path / "sessions.db"),
+        "FRAGMENT_CACHE_PATH": str(tmp_path / "fragments.db"),
+        "RATELIMIT_SQLITE_PATH": str(tmp_path / "ratelimit.db"),
+        "JINJA_BYTECODE_CACHE": str(tmp_path / "jinja_cache"),
+        "MAIL_FILE_PATH": str(tmp_path / "mail"),
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        "PASSWORD_HASH_WORKERS": "0",
+        "RATELIMIT_ENABLED": "0",
+        "OUTBOX_INTERVAL": "0",
+        "INVITE_SWEEP_INTERVAL": "0",
+        "QUERYWATCH": "raise",
+    }.items():
+        monkeypatch.setenv(key, value)
+    from app import create_app
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def owner(client):
+    """Cliente logado como dono da empresa 1."""
+    resp = client.post("/login", data={"email": owner_email(1), "password": PASSWORD})
+    assert resp.status_code == 302, resp.status_code
+    return client
+
+
+@pytest.fixture
+def query_budget():
+    """`with query_budget(n, endpoint=None): ...` – falha se passar de n statements."""
+    return watch.budget
@@ -0,0 +1,92 @@
+import pytest
+
+from app.api import decode_cursor, encode_cursor
+from bench.seed import PASSWORD, member_email
+
+
+def _login(client, email):
+    resp = client.post("/login", data={"email": email, "password": PASSWORD})
+    assert resp.status_code == 302, resp.status_code
+    return client
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(12345)) == 12345
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("cursor", ["lixo", encode_cursor(1).replace("aWQ", "eHg"), "aWQ6YWJj"])
+def test_invalid_cursor(owner, cursor):
+    resp = owner.get(f"/api/v1/members?cursor={cursor}")
+    assert resp.status_code == 400
+    assert resp.get_json() == {"error": "invalid_cursor"}
+
+
+def test_members_pages_follow_next_cursor(owner):
+    ids, url = [], "/api/v1/members?limit=7&status=all"
+    while url:
+        body = owner.get(url).get_json()
+        ids += [m["id"] for m in body["data"]]
+        url = body["next_cursor"] and f"/api/v1/members?limit=7&status=all&cursor={body['next_cursor']}"
+    assert ids == sorted(set(ids))
+    assert len(ids) == 41  # dono + 40 membros, cada um uma vez
+
+
+def test_members_link_header(owner):
+    resp = owner.get("/api/v1/members?limit=2")
+    body = resp.get_json()
+    assert body["has_more"] is True and len(body["data"]) == 2
+    assert f"cursor={body['next_cursor']}" in resp.headers["Link"]
+    assert resp.headers["Link"].endswith('rel="next"')
+
+
+def test_members_fields_role_and_status(owner):
+    body = owner.get("/api/v1/members?fields=email,role&role=viewer,admin&status=all&limit=500").get_json()
+    assert {frozenset(m) for m in body["data"]} == {frozenset({"id", "email", "role"})}  # id sempre vem
+    assert {m["role"] for m in body["data"]} == {"viewer", "admin"}
+    assert len(body["data"]) == 24
+    inactive = owner.get("/api/v1/members?status=inactive&fields=is_active").get_json()["data"]
+    assert len(inactive) == 4 and not any(m["is_active"] for m in inactive)
+
+
+@pytest.mark.parametrize("query, error", [
+    ("fields=email,senha", "unknown_fields"),
+    ("role=root", "unknown_role"),
+    ("status=banido", "invalid_status"),
+    ("limit=dez", "invalid_limit"),
+    ("company_id=x", "invalid_company_id"),
+])
+def test_members_bad_params(owner, query, error):
+    resp = owner.get(f"/api/v1/members?{query}")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == error
+
+
+@pytest.mark.parametrize("status, count", [("pending", 10), ("accepted", 5), ("expired", 5), ("all", 20)])
+def test_invites_status_filter(owner, status, count):
+    body = owner.get(f"/api/v1/invites?status={status}&fields=email,status").get_json()
+    assert len(body["data"]) == count
+    if status != "all":
+        assert {i["status"] for i in body["data"]} == {status}
+    assert {frozenset(i) for i in body["data"]} == {frozenset({"id", "email", "status"})}
+
+
+def test_api_requires_login(client):
+    resp = client.get("/api/v1/members")
+    assert resp.status_code == 401
+    assert resp.get_json() == {"error": "unauthorized"}
+
+
+def test_other_company_is_404(owner):
+    resp = owner.get("/api/v1/members?company_id=2")
+    assert resp.status_code == 404
+    assert resp.get_json() == {"error": "no_company"}
+
+
+@pytest.mark.parametrize("path", ["/api/v1/invites", "/api/v1/members/export", "/api/v1/invites/export"])
+def test_viewer_is_403(client, path):
+    _login(client, member_email(1, 3))  # MEMBER_ROLES[3] == "viewer"
+    assert client.get("/api/v1/members").status_code == 200
+    resp = client.get(path)
+    assert resp.status_code == 403
+    assert resp.get_json() == {"error": "forbidden"}
@@ -0,0 +1,133 @@
+import asyncio
+import gzip
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from bench.seed import PASSWORD, invite_token, owner_email  # noqa: E402
+
+from app import asgi  # noqa: E402
+
+
+class Client:
+    """Fala ASGI direto com o AsgiApp; o corpo da request chega em pedaços pequenos."""
+
+    def __init__(self, app, chunk=16):
+        self.asgi = asgi.AsgiApp(app, threads=4)
+        self.chunk = chunk
+        self.cookies = {}
+
+    async def request(self, method, path, query=b"", body=b"", headers=()):
+        parts = [body[i:i + self.chunk] for i in range(0, len(body), self.chunk)] or [b""]
+        incoming = [{"type": "http.request", "body": p, "more_body": i < len(parts) - 1}
+                    for i, p in enumerate(parts)]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0) if incoming else {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        headers = list(headers)
+        if self.cookies:
+            cookie = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+            headers.append((b"cookie", cookie.encode()))
+        scope = {
+            "type": "http", "method": method, "path": path, "query_string": query,
+            "headers": headers, "http_version": "1.1", "scheme": "http",
+            "server": ("testserver", 80), "client": ("127.0.0.1", 5000),
+        }
+        await self.asgi(scope, receive, send)
+        start, body_messages = sent[0], sent[1:]
+        assert start["type"] == "http.response.start"
+        assert body_messages[-1]["more_body"] is False
+        resp_headers = [(k.decode(), v.decode()) for k, v in start["headers"]]
+        for k, v in resp_headers:
+            if k == "set-cookie":
+                for name, morsel in SimpleCookie(v).items():
+                    self.cookies[name] = morsel.value
+        return start["status"], dict(resp_headers), b"".join(m["body"] for m in body_messages), body_messages
+
+    async def login(self):
+        form = urlencode({"email": owner_email(1), "password": PASSWORD}).encode()
+        # sem content-length: o _Body lê até o more_body=False
+        status, headers, _, _ = await self.request(
+            "POST", "/login", body=form,
+            headers=[(b"content-type", b"application/x-www-form-urlencoded")],
+        )
+        assert status == 302, status
+
+
+@pytest.fixture
+def hooks(app):
+    calls = {"before": 0, "teardown": 0}
+    app.before_request(lambda: calls.__setitem__("before", calls["before"] + 1))
+    app.teardown_request(lambda e: calls.__setitem__("teardown", calls["teardown"] + 1))
+    return calls
+
+
+def test_async_views_and_wsgi_bridge(app, monkeypatch):
+    served = []
+    view, serves = asgi.ASYNC_VIEWS["web_auth.dashboard"]
+
+    async def spy(s):
+        served.append(True)
+        return await view(s)
+
+    monkeypatch.setitem(asgi.ASYNC_VIEWS, "web_auth.dashboard", (spy, serves))
+    client = Client(app)
+
+    async def run():
+        await client.login()
+        status, _, body, _ = await client.request("GET", "/dashboard")
+        assert status == 200 and b"Bench 1" in body
+        status, _, body, chunks = await client.request("GET", "/api/v1/members/export", b"format=csv")
+        assert status == 200 and body.startswith(b"membership_id,user_id,email")
+        assert chunks[0]["more_body"] is True  # corpo do gerador, fechado por uma mensagem vazia
+        await client.asgi.db.dispose()
+
+    asyncio.run(run())
+    assert served == [True]
+
+
+def test_fallback_runs_hooks_once_and_pops_context(app, hooks):
+    from flask import has_request_context
+
+    client = Client(app)
+
+    async def run():
+        # sem token: o async_view não serve e a request vai inteira para o WSGI
+        status, headers, _, _ = await client.request("GET", "/accept-invite")
+        assert status == 302
+        assert not has_request_context()
+        assert hooks["before"] == 1
+        status, _, body, _ = await client.request("GET", "/accept-invite", f"token={invite_token(1, 0)}".encode())
+        assert status == 200 and b"inv1-0@" in body
+        assert not has_request_context()
+        assert hooks["before"] == 2
+        await client.asgi.db.dispose()
+
+    asyncio.run(run())
+
+
+def test_gzip_export_through_bridge(app):
+    client = Client(app)
+
+    async def run():
+        await client.login()
+        status, headers, body, _ = await client.request(
+            "GET", "/api/v1/members/export", b"format=ndjson",
+            headers=[(b"accept-encoding", b"gzip")],
+        )
+        await client.asgi.db.dispose()
+        return status, headers, body
+
+    status, headers, body = asyncio.run(run())
+    assert status == 200
+    if headers.get("content-encoding") == "gzip":
+        body = gzip.decompress(body)
+    assert body.count(b"\n") == 41  # dono + 40 membros
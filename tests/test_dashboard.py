@@ -0,0 +1,33 @@
+def test_dashboard_query_budget(owner, query_budget):
+    # user, vínculos, empresa, contagem, convites pendentes, página do time
+    with query_budget(6, endpoint="web_auth.dashboard"):
+        resp = owner.get("/dashboard")
+    assert resp.status_code == 200
+
+
+def test_dashboard_cached_fragments(owner, query_budget):
+    owner.get("/dashboard")
+    # fragmentos em cache: só o principal (vínculos + empresa)
+    with query_budget(2, endpoint="web_auth.dashboard"):
+        resp = owner.get("/dashboard")
+    assert resp.status_code == 200
+
+
+def test_locked_fragment_cache_renders_without_cache(owner, monkeypatch):
+    import sqlite3
+
+    from app.fragments import fragment_cache
+
+    owner.get("/dashboard")  # aquece: o cache existe mas fica inacessível
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    for name in ("get", "set", "version"):
+        monkeypatch.setattr(fragment_cache.backend, name, locked)
+    errors = fragment_cache.errors
+    for path in ("/dashboard", "/invites"):
+        resp = owner.get(path)
+        assert resp.status_code == 200
+        assert "ETag" not in resp.headers
+    assert fragment_cache.errors > errors
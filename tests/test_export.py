@@ -0,0 +1,68 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+from app import db
+from app.export import chunked, encode_csv
+from app.maintenance import sweep_invites
+from app.models import Invite
+
+
+def _download(client, path, **headers):
+    resp = client.get(path, headers=headers)
+    try:
+        assert resp.status_code == 200
+        assert resp.is_streamed
+        return resp, resp.get_data()
+    finally:
+        resp.close()
+
+
+def test_members_csv(owner):
+    resp, body = _download(owner, "/api/v1/members/export?format=csv")
+    assert resp.mimetype == "text/csv"
+    assert resp.headers["Content-Disposition"].startswith('attachment; filename="members-1-')
+    assert "Content-Encoding" not in resp.headers
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+    assert len(rows) == 41  # ativos e inativos
+    assert {r["is_active"] for r in rows} == {"true", "false"}
+    assert len({r["membership_id"] for r in rows}) == 41
+
+
+def test_invites_ndjson_includes_archived_once(app, owner):
+    with app.app_context():
+        assert sweep_invites(pause=0)["expired"] == 10  # 5 vencidos em cada empresa
+        live = db.session.scalar(db.select(db.func.count(Invite.id)).where(Invite.company_id == 1))
+    resp, body = _download(owner, "/api/v1/invites/export?format=ndjson")
+    assert resp.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert len(rows) == live + 5
+    assert len({r["invite_id"] for r in rows}) == len(rows)  # vivos e arquivados não colidem
+    archived = [r for r in rows if r["archived_at"]]
+    assert len(archived) == 5 and {r["status"] for r in archived} == {"expired"}
+
+
+def test_gzip_export_decodes_to_the_plain_one(owner):
+    _, plain = _download(owner, "/api/v1/members/export?format=ndjson")
+    resp, body = _download(owner, "/api/v1/members/export?format=ndjson", **{"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert gzip.decompress(body) == plain
+
+
+def test_csv_cells_are_not_formulas():
+    lines = encode_csv(("email", "job_title", "joined_at"),
+                       [("=cmd@x.com", "-chefe", datetime(2026, 1, 2, 3, 4, 5)), ("a@x.com", None, None)])
+    rows = list(csv.reader(io.StringIO("".join(lines))))
+    assert rows[1] == ["'=cmd@x.com", "'-chefe", "2026-01-02T03:04:05"]
+    assert rows[2] == ["a@x.com", "", ""]
+
+
+def test_chunked_groups_lines_without_splitting_them():
+    lines = [f"linha {i}\n" for i in range(100)]
+    chunks = list(chunked(lines, size=50))
+    assert len(chunks) > 1
+    assert all(c.endswith(b"\n") for c in chunks)
+    assert b"".join(chunks).decode() == "".join(lines)
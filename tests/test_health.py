@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from app import health
+
+
+@pytest.fixture
+def db_check(monkeypatch):
+    check = health.DbCheck(interval=60)
+    monkeypatch.setattr(health, "db_check", check)
+    return check
+
+
+def test_livez_skips_the_app(client):
+    resp = client.get("/livez")
+    assert resp.status_code == 200
+    assert resp.data == b"ok"
+    assert "Set-Cookie" not in resp.headers
+
+
+def test_readyz_anonymous_gets_only_the_verdict(app, client, db_check):
+    resp = client.get("/readyz")
+    assert resp.status_code == 200
+    assert resp.get_json() == {"status": "ok"}
+    # mesmo com token configurado, quem não o envia (ou erra) não vê detalhes
+    app.config["HEALTH_TOKEN"] = "s3cret"
+    resp = client.get("/readyz", headers={"Authorization": "Bearer errado"})
+    assert resp.get_json() == {"status": "ok"}
+
+
+def test_readyz_details_with_token(app, client, db_check):
+    app.config["HEALTH_TOKEN"] = "s3cret"
+    resp = client.get("/readyz", headers={"Authorization": "Bearer s3cret"})
+    body = resp.get_json()
+    assert body["status"] == "ok"
+    assert body["db"]["primary"]["ok"] is True
+    assert body["queues"]["sqlite_write_queue_waiting"] == 0
+    assert "primary" in body["pool"] and "pid" in body
+
+
+def test_readyz_db_failure_is_503_without_leaking_the_error(app, client, db_check, monkeypatch):
+    monkeypatch.setattr(db_check, "_run", lambda app: {
+        "ok": False, "engines": {"primary": {"ok": False, "error": "OperationalError: /srv/app.db"}}, "queues": {},
+    })
+    resp = client.get("/readyz")
+    assert resp.status_code == 503
+    assert resp.get_json() == {"status": "fail"}
+
+
+def test_db_check_is_cached(app, db_check, monkeypatch):
+    calls = []
+    monkeypatch.setattr(db_check, "_run", lambda app: calls.append(1) or {"ok": True, "engines": {}, "queues": {}})
+    for _ in range(5):
+        assert db_check.get(app)["ok"] is True
+    assert len(calls) == 1
+    db_check._checked_at -= 61  # intervalo vencido: refaz uma vez
+    db_check.get(app)
+    db_check.get(app)
+    assert len(calls) == 2
+
+
+def test_db_check_serves_stale_result_while_another_thread_pings(app, db_check, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    results = iter([{"ok": True, "engines": {}, "queues": {}}, {"ok": False, "engines": {}, "queues": {}}])
+
+    def slow_run(app):
+        result = next(results)
+        if not result["ok"]:
+            started.set()
+            release.wait(5)
+        return result
+
+    monkeypatch.setattr(db_check, "_run", slow_run)
+    db_check.get(app)
+    db_check._checked_at -= 61
+    worker = threading.Thread(target=db_check.get, args=(app,))
+    worker.start()
+    assert started.wait(5)
+    # o ping está em andamento na outra thread: devolve o anterior sem esperar
+    assert db_check.get(app)["ok"] is True
+    release.set()
+    worker.join(5)
+    assert db_check.get(app)["ok"] is False
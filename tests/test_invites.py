@@ -0,0 +1,66 @@
+import pytest
+
+from app import db
+from app.models import Invite
+
+
+def test_invites_query_budget(owner, query_budget):
+    with query_budget(5, endpoint="web_auth.invites"):
+        resp = owner.get("/invites")
+    assert resp.status_code == 200
+
+
+@pytest.mark.parametrize("count", [5, 100])
+def test_bulk_invites_query_budget(owner, query_budget, count):
+    # o número de statements não cresce com o número de convites
+    invites = [{"email": f"bulk{count}-{i}@example.com"} for i in range(count)]
+    with query_budget(7, endpoint="web_auth.bulk_invites"):
+        resp = owner.post("/invites/bulk", json={"invites": invites})
+    assert resp.status_code == 200
+    assert resp.get_json()["summary"] == {"created": count}
+
+
+def test_bulk_invites_rejects_non_utf8_csv(app, owner):
+    body = "email\nok@example.com\njosé@example.com\n".encode("latin-1")
+    resp = owner.post("/invites/bulk", data=body, content_type="text/csv")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "invalid_csv"
+    with app.app_context():
+        assert db.session.scalar(db.select(Invite.id).where(Invite.email == "ok@example.com")) is None
+
+
+def test_bulk_invites_row_cap(app, owner):
+    app.config["INVITE_IMPORT_MAX_ROWS"] = 3
+    body = "".join(f"cap{i}@example.com\n" for i in range(4)).encode()
+    resp = owner.post("/invites/bulk", data=body, content_type="text/csv")
+    assert resp.status_code == 413
+    assert resp.get_json()["error"] == "too_many_rows"
+    resp = owner.post("/invites/bulk", json={"invites": [{"email": f"cap{i}@example.com"} for i in range(4)]})
+    assert resp.status_code == 413
+    with app.app_context():
+        assert db.session.scalar(db.select(Invite.id).where(Invite.email.like("cap%"))) is None
+
+
+def test_bulk_invites_body_limit(app, owner):
+    app.config["MAX_CONTENT_LENGTH"] = 64
+    body = "".join(f"big{i}@example.com\n" for i in range(20)).encode()
+    resp = owner.post("/invites/bulk", data=body, content_type="text/csv")
+    assert resp.status_code == 413
+
+
+def test_import_error_in_later_chunk_rolls_back_everything(app):
+    from app.bulk_invites import import_invites
+
+    calls = []
+
+    def on_chunk(values):
+        calls.append(values)
+        if len(calls) == 2:  # segundo chunk falha depois do primeiro já inserido
+            raise RuntimeError("disco cheio")
+
+    rows = [(n, f"atomic{n}@example.com", "viewer") for n in range(1, 5)]
+    with app.app_context():
+        with pytest.raises(RuntimeError):
+            import_invites(1, rows, chunk_size=2, on_chunk=on_chunk)
+        assert len(calls) == 2
+        assert db.session.scalar(db.select(Invite.id).where(Invite.email.like("atomic%"))) is None
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db, mailer
+from app.models import OutboxMessage
+
+
+class Recorder:
+    def __init__(self, fail=None):
+        self.sent, self.fail = [], fail
+
+    def send(self, msg):
+        if self.fail is not None:
+            raise self.fail
+        self.sent.append(msg["To"])
+
+    def close(self):
+        pass
+
+
+PAYLOAD = {"company": "Bench 1", "role": "viewer", "expires_at": "01/01/2030 00:00",
+           "accept_url": "http://x/accept-invite?token=t"}
+
+
+@pytest.fixture
+def outbox(app):
+    with app.app_context():
+        for i in range(3):
+            mailer.enqueue("invite", f"r{i}@example.com", PAYLOAD)
+        db.session.commit()
+        yield
+        db.session.remove()
+
+
+def _rows():
+    return {r.recipient: r for r in db.session.scalars(db.select(OutboxMessage)).all()}
+
+
+def test_claim_does_not_overlap(outbox):
+    _, first = mailer.claim(2, lease=60)
+    _, second = mailer.claim(2, lease=60)
+    assert len(first) == 2 and len(second) == 1
+    assert not {r.id for r in first} & {r.id for r in second}
+    # lease vencido: volta a ser reservável
+    _, again = mailer.claim(5, lease=60, now=datetime.utcnow() + timedelta(seconds=61))
+    assert {r.id for r in again} == {r.id for r in first + second}
+
+
+def test_deliver_marks_each_row_sent(outbox):
+    backend = Recorder()
+    assert mailer.deliver_batch(backend, batch_size=10) == {"sent": 3, "retry": 0, "failed": 0, "lost": 0}
+    assert sorted(backend.sent) == ["r0@example.com", "r1@example.com", "r2@example.com"]
+    assert {r.status for r in _rows().values()} == {"sent"}
+    assert mailer.deliver_batch(backend, batch_size=10)["sent"] == 0
+
+
+def test_temporary_failure_backs_off_then_gives_up(outbox):
+    backend = Recorder(fail=OSError("timeout"))
+    res = mailer.deliver_batch(backend, batch_size=10, max_attempts=2, backoff_base=30)
+    assert res["retry"] == 3
+    rows = _rows()
+    assert {r.status for r in rows.values()} == {"pending"}
+    assert all(r.next_attempt_at > datetime.utcnow() + timedelta(seconds=20) for r in rows.values())
+    # antes do backoff nada é reservado
+    assert mailer.deliver_batch(backend, batch_size=10)["retry"] == 0
+    later = datetime.utcnow() + timedelta(hours=1)
+    res = mailer.deliver_batch(backend, batch_size=10, max_attempts=2, now=later)
+    assert res["failed"] == 3
+    assert {(r.status, r.attempts) for r in _rows().values()} == {("failed", 2)}
+
+
+def test_permanent_failure_is_not_retried(outbox):
+    res = mailer.deliver_batch(Recorder(fail=mailer.PermanentFailure("550 no such user")), batch_size=10)
+    assert res["failed"] == 3
+    assert {r.last_error for r in _rows().values()} == {"550 no such user"}
+
+
+def test_lost_lease_does_not_mark_sent(outbox):
+    # outro worker repega o lote depois que o lease venceu, no meio do nosso envio
+    claim = mailer.claim
+
+    class Slow(Recorder):
+        def send(self, msg):
+            super().send(msg)
+            if len(self.sent) == 1:
+                claim(10, lease=60, now=datetime.utcnow() + timedelta(seconds=120))
+
+    res = mailer.deliver_batch(Slow(), batch_size=10, lease=60)
+    assert res == {"sent": 0, "retry": 0, "failed": 0, "lost": 1}
+    assert {r.status for r in _rows().values()} == {"sending"}
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.maintenance import sweep_invites
+from app.models import Invite, InviteArchive
+
+
+def _expired_invite(email):
+    inv = Invite.new(1, email, commit=False)
+    inv.expires_at = datetime.utcnow() - timedelta(days=1)
+    db.session.commit()
+    return inv.id
+
+
+def test_sweep_never_reuses_an_archived_id(app):
+    with app.app_context():
+        sweep_invites(pause=0)
+        first = _expired_invite("a@example.com")
+        assert sweep_invites(pause=0)["expired"] == 1
+        # o maior id acabou de sair de invites: sem AUTOINCREMENT ele voltaria aqui
+        second = _expired_invite("b@example.com")
+        assert second != first
+        assert sweep_invites(pause=0)["expired"] == 1
+        archived = set(db.session.execute(
+            db.select(InviteArchive.id, InviteArchive.email)
+            .where(InviteArchive.email.in_(["a@example.com", "b@example.com"]))
+        ).all())
+        assert archived == {(first, "a@example.com"), (second, "b@example.com")}
+        assert db.session.scalar(db.select(db.func.count(Invite.id)).where(Invite.id.in_([first, second]))) == 0
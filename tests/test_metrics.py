@@ -0,0 +1,12 @@
+from bench.seed import PASSWORD, owner_email
+
+
+def test_server_timing_only_for_logged_in_users(app, client):
+    app.config["SERVER_TIMING"] = True
+    resp = client.post("/login", data={"email": owner_email(1), "password": "errada"})
+    assert "Server-Timing" not in resp.headers
+    resp = client.post("/login", data={"email": owner_email(1), "password": PASSWORD})
+    assert resp.status_code == 302
+    # o hash do login não aparece nem para quem acabou de entrar
+    assert "hash;" not in resp.headers["Server-Timing"]
+    assert "total;dur=" in client.get("/dashboard").headers["Server-Timing"]
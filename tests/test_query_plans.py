@@ -0,0 +1,42 @@
+from bench.seed import invite_token
+
+from app import db
+from app.querywatch import watch
+from app.queryplan import FULL_SCAN
+
+# o que as rotas realmente executam, não a lista de app/queryplan.py
+ROUTES = [
+    ("GET", "/dashboard", None),
+    ("GET", "/invites", None),
+    ("GET", "/api/v1/members?limit=5", None),
+    ("GET", "/api/v1/members?status=all&role=viewer&role=admin&limit=5", None),
+    ("GET", "/api/v1/invites?status=all&limit=5", None),
+    ("GET", "/api/v1/invites?status=accepted", None),
+    ("GET", "/api/v1/members/export?format=csv", None),
+    ("GET", "/api/v1/invites/export?format=ndjson", None),
+    ("POST", "/invites/bulk", {"invites": [{"email": "plan@example.com"}]}),
+    ("GET", f"/accept-invite?token={invite_token(1, 0)}", None),
+]
+
+
+def test_routes_never_full_scan(app, owner):
+    with watch.capture() as captured:
+        for method, path, body in ROUTES:
+            resp = owner.open(path, method=method, json=body)
+            resp.get_data()
+            resp.close()
+            assert resp.status_code < 400, (path, resp.status_code)
+        # próxima página do roster pelo cursor devolvido
+        cursor = owner.get("/api/v1/members?limit=5").get_json()["next_cursor"]
+        owner.get(f"/api/v1/members?limit=5&cursor={cursor}")
+
+    assert {route for route, *_ in captured} >= {"web_auth.dashboard", "api.members"}
+    scans = []
+    with app.app_context():
+        conn = db.session.connection()
+        for route, statement, params, many in captured:
+            if many or not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+                continue
+            plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params).all()
+            scans += [(route, d[-1], statement[:200]) for d in plan if FULL_SCAN.match(d[-1])]
+    assert scans == []
@@ -0,0 +1,27 @@
+from app.ratelimit import MemoryBackend
+
+
+def test_memory_backend_sliding_counts():
+    b = MemoryBackend()
+    assert b.incr("k", 60, 60) == (1, 0)
+    assert b.incr("k", 60, 60) == (2, 0)
+    assert b.incr("k", 120, 60) == (1, 2)  # janela anterior ainda pesa
+    assert b.incr("k", 240, 60) == (1, 0)
+
+
+def test_memory_backend_evicts_expired_keys_from_the_front():
+    b = MemoryBackend()
+    for i in range(50):
+        b.incr(f"old{i}", 0, 60)
+    b.incr("new", 120, 60)  # janelas 0 e 60 já não contam para ninguém
+    assert list(b._data) == ["new"]
+
+
+def test_memory_backend_caps_live_keys_evicting_least_recently_used():
+    b = MemoryBackend(max_keys=3)
+    for key in ("a", "b", "c"):
+        b.incr(key, 0, 60)
+    b.incr("a", 0, 60)  # "a" volta para o fim
+    b.incr("d", 0, 60)
+    assert list(b._data) == ["c", "a", "d"]
+    assert b.incr("a", 0, 60) == (3, 0)
@@ -0,0 +1,26 @@
+import shutil
+
+import pytest
+from bench.seed import PASSWORD, owner_email
+
+from app.fragments import fragment_cache
+
+
+@pytest.fixture
+def replica_client(request, tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_REPLICA_URLS", f"sqlite:///{tmp_path / 'replica.db'}")
+    app = request.getfixturevalue("app")
+    shutil.copy(tmp_path / "app.db", tmp_path / "replica.db")  # réplica = cópia do primário
+    client = app.test_client()
+    assert client.post("/login", data={"email": owner_email(1), "password": PASSWORD}).status_code == 302
+    client.delete_cookie("ryw")  # fora da janela read-your-writes do login
+    return client
+
+
+def test_replica_pages_are_not_cached(replica_client, monkeypatch):
+    written = []
+    monkeypatch.setattr(fragment_cache.backend, "set", lambda key, value, ttl: written.append(key))
+    resp = replica_client.get("/dashboard")
+    assert resp.status_code == 200
+    assert written == []
+    assert "ETag" not in resp.headers
@@ -0,0 +1,41 @@
+import threading
+import time
+import types
+
+import pytest
+
+from app.sqlite_profile import WriteQueue, fcntl
+
+
+@pytest.mark.skipif(fcntl is None, reason="flock indisponível")
+def test_write_queue_serializes_across_processes(tmp_path):
+    # duas filas com fds próprios no mesmo arquivo fazem o papel de dois workers
+    a, b = WriteQueue(timeout=0.05), WriteQueue(timeout=0.05)
+    a.path = b.path = str(tmp_path / "app.db-writelock")
+    sa, sb = types.SimpleNamespace(info={}), types.SimpleNamespace(info={})
+
+    a.acquire(sa)
+    b.acquire(sb)
+    assert sa.info.get("_write_lock") and not sb.info.get("_write_lock")
+    assert (b.waits, b.timeouts, b.waiting) == (1, 1, 0)
+
+    a.release(sa)
+    b.acquire(sb)
+    assert sb.info.get("_write_lock")
+    b.release(sb)
+
+
+def test_write_queue_waiting_is_current_not_cumulative():
+    q = WriteQueue(timeout=5)
+    sa, sb = types.SimpleNamespace(info={}), types.SimpleNamespace(info={})
+    q.acquire(sa)
+    waiter = threading.Thread(target=q.acquire, args=(sb,))
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while q.waiting != 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert q.waiting == 1
+    q.release(sa)
+    waiter.join(5)
+    assert (q.waiting, q.waits) == (0, 1)
+    q.release(sb)
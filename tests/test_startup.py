@@ -0,0 +1,29 @@
+import sys
+import threading
+
+from app.startup import lazy_import
+
+
+def test_lazy_import_concurrent_first_access(tmp_path, monkeypatch):
+    # módulo lento de propósito: quem chega durante o exec não pode vê-lo pela metade
+    (tmp_path / "slow_forms.py").write_text("import time\ntime.sleep(0.2)\nLoginForm = object\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "slow_forms", raising=False)
+    forms = lazy_import("slow_forms")
+    start = threading.Barrier(8)
+    seen, errors = [], []
+
+    def first_request():
+        start.wait()
+        try:
+            seen.append(forms.LoginForm)
+        except AttributeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert seen == [object] * 8